@@ -1,22 +1,155 @@
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+import time
+from contextlib import asynccontextmanager
+
+from typing import Optional
+
+from fastapi import FastAPI, Request, Form, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from src.constants import APP_HOST, APP_PORT
+from src.constants import (
+    ADMISSION_MAX_IN_FLIGHT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_RETRY_AFTER_SECONDS,
+    APP_HOST,
+    APP_PORT,
+    BATCH_PREDICTION_MAX_ROWS,
+    INFERENCE_BACKEND,
+    INFERENCE_MAX_PENDING,
+    INFERENCE_WORKERS,
+    PREDICT_BATCHING_ENABLED,
+    PREDICT_BATCH_MAX_SIZE,
+    PREDICT_BATCH_MAX_WAIT_MS,
+    PROFILE_ADMIN_TOKEN,
+    PROFILE_DIR,
+    PROFILE_INTERVAL_MS,
+    PROFILE_MAX_FILES,
+    PROFILE_MAX_SECONDS,
+    PROFILE_SAMPLE_RATE,
+    REQUEST_DEADLINE_MS,
+    STARTUP_BUDGET_SECONDS,
+    STREAM_CHUNK_ROWS,
+    STREAM_SATURATED_WAIT_SECONDS
+)
+from src.entity.api_entity import (
+    BatchPredictionRequest,
+    BatchPredictionResponse,
+    MentalHealthRecord,
+    PredictionResponse
+)
+from src.logger import logging
+from src.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+from src.metrics.profiling import ProfilingMiddleware, RequestProfiler
+from src.metrics.stages import PARSE, RENDER, RequestStartMiddleware, observe_stage, time_stage
 from src.pipeline.prediction_pipeline import (
+    INPUT_COLUMNS,
     MentalHealthData,
     MentalHealthPredictor
 )
+from src.pipeline.admission import AdmissionController, AdmissionMiddleware, DeadlineExceededError
+from src.pipeline.inference_executor import InferenceExecutor, InferenceSaturatedError
+from src.pipeline.micro_batcher import PredictionBatcher
+from src.pipeline.model_preloader import ModelPreloader
+from src.pipeline.stream_scoring import FullDuplexStreamingResponse, StreamScorer
 
 import uvicorn
 
+try:
+    # orjson serializes several times faster than the standard library json module
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    FastJSONResponse = JSONResponse
+
 
 # -----------------------------------
 # App Initialization
 # -----------------------------------
 
-app = FastAPI(title="Mental Health Predictor")
+# Predictor (shared by every request, model made resident at startup)
+predictor = MentalHealthPredictor()
+
+# Runs scoring off the event loop (thread or process pool)
+executor = InferenceExecutor(
+    predictor=predictor,
+    backend=INFERENCE_BACKEND,
+    max_workers=INFERENCE_WORKERS,
+    max_pending=INFERENCE_MAX_PENDING
+)
+
+# Coalesces concurrent /predict requests into vectorized batches
+batcher = PredictionBatcher(
+    score_batch=executor.predict_records,
+    max_batch_size=PREDICT_BATCH_MAX_SIZE,
+    max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS,
+    max_concurrent_batches=INFERENCE_WORKERS
+)
+
+# Scores CSV / NDJSON uploads chunk by chunk while they are received
+stream_scorer = StreamScorer(
+    score_batch=executor.predict_batch,
+    chunk_rows=STREAM_CHUNK_ROWS,
+    saturated_wait=STREAM_SATURATED_WAIT_SECONDS
+)
+
+
+def preload_model() -> None:
+    executor.preload()
+    # process workers run their own refresher
+    if executor.backend != 'process':
+        predictor.start_model_refresh()
+
+
+# Loads and warms up the model in the background, /readyz reports when it is done
+preloader = ModelPreloader(preload=preload_model, budget_seconds=STARTUP_BUDGET_SECONDS)
+
+# Bounds the prediction requests served at once and queued, drops the ones past their deadline
+admission = AdmissionController(
+    max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+    max_queue=ADMISSION_MAX_QUEUE,
+    default_deadline_ms=REQUEST_DEADLINE_MS
+)
+
+# Opt-in profiling of prediction requests, kept in a ring of files served by /admin/profiles
+profiler = RequestProfiler(
+    directory=PROFILE_DIR,
+    max_files=PROFILE_MAX_FILES,
+    interval_ms=PROFILE_INTERVAL_MS,
+    max_seconds=PROFILE_MAX_SECONDS,
+    sample_rate=PROFILE_SAMPLE_RATE,
+    admin_token=PROFILE_ADMIN_TOKEN
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executor.start()
+    # the server accepts connections (and answers /healthz) while the model loads
+    preloader.start()
+    if PREDICT_BATCHING_ENABLED:
+        await batcher.start()
+    yield
+    await preloader.stop()
+    await batcher.stop()
+    predictor.stop_model_refresh()
+    executor.shutdown()
+
+
+app = FastAPI(title="Mental Health Predictor", lifespan=lifespan)
+
+# Marks when each request arrived, for the parse stage timing
+app.add_middleware(RequestStartMiddleware)
+
+# Admits prediction requests before their body is read, overload is answered with a 429 / 503
+if ADMISSION_MAX_IN_FLIGHT > 0:
+    app.add_middleware(AdmissionMiddleware, controller=admission, paths=("/predict", "/api/v1/predict"),
+                       retry_after_seconds=ADMISSION_RETRY_AFTER_SECONDS)
+
+# Not installed at all when profiling is disabled, so it costs nothing then
+if profiler.enabled:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, paths=("/predict", "/api/v1/predict"))
 
 # Static files (CSS)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -24,8 +157,47 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Templates
 templates = Jinja2Templates(directory="templates")
 
-# Predictor (loaded once)
-predictor = MentalHealthPredictor()
+REQUEST_ERRORS = REGISTRY.counter('http_request_errors_total', 'Failed prediction requests by route and reason',
+                                  labelnames=('route', 'reason'))
+
+
+def observe_parse(request: Request) -> None:
+    # from the arrival of the request to here: body read, form / JSON validation, input object
+    received_at = getattr(request.state, 'received_at', None)
+    if received_at is not None:
+        observe_stage(PARSE, time.perf_counter() - received_at)
+
+
+@app.exception_handler(InferenceSaturatedError)
+async def inference_saturated_handler(request: Request, exc: InferenceSaturatedError):
+
+    REQUEST_ERRORS.labels(route=request.url.path, reason='saturated').inc()
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Prediction service is busy, retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
+
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError):
+
+    REQUEST_ERRORS.labels(route=request.url.path, reason='deadline_exceeded').inc()
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Request deadline passed before it was scored, retry shortly"},
+        headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)}
+    )
+
+
+def request_deadline(request: Request) -> Optional[float]:
+    # set by AdmissionMiddleware
+    return getattr(request.state, 'deadline', None)
+
+
+def request_arrival(request: Request) -> Optional[float]:
+    # set by AdmissionMiddleware, the model tier depends on how long ago the request arrived
+    return getattr(request.state, 'arrived_at', None)
 
 
 # -----------------------------------
@@ -116,20 +288,20 @@ async def predict(
 
             Family_History=Family_History
         )
-
-
-        # -----------------------------------
-        # Convert to DataFrame
-        # -----------------------------------
-
-        df = user_data.get_input_dataframe()
+        observe_parse(request)
 
 
         # -----------------------------------
         # Prediction
         # -----------------------------------
 
-        prediction = predictor.predict(df)[0]
+        if batcher.is_running:
+            prediction, _, tier, _ = await batcher.submit(user_data.get_input_record(), request_deadline(request),
+                                                          request_arrival(request))
+        else:
+            labels, _, tier, _ = await executor.predict_records([user_data.get_input_record()],
+                                                                request_deadline(request), request_arrival(request))
+            prediction = labels[0]
 
 
         # -----------------------------------
@@ -146,17 +318,23 @@ async def predict(
         # Render Page
         # -----------------------------------
 
-        return templates.TemplateResponse(
-            "index.html",
-            {
-                "request": request,
-                "result": result
-            }
-        )
+        with time_stage(RENDER):
+            return templates.TemplateResponse(
+                "index.html",
+                {
+                    "request": request,
+                    "result": result
+                },
+                headers={"X-Model-Tier": tier}
+            )
+
 
+    except (InferenceSaturatedError, DeadlineExceededError):
+        raise
 
     except Exception as e:
 
+        REQUEST_ERRORS.labels(route='/predict', reason='prediction_error').inc()
         return templates.TemplateResponse(
             "index.html",
             {
@@ -166,6 +344,174 @@ async def predict(
         )
 
 
+# -----------------------------------
+# JSON Prediction API
+# -----------------------------------
+
+@app.post("/api/v1/predict", response_model=PredictionResponse, response_class=FastJSONResponse)
+async def predict_json(request: Request, payload: MentalHealthRecord):
+
+    observe_parse(request)
+    record = {column: getattr(payload, field) for field, column in INPUT_COLUMNS.items()}
+
+    try:
+        if batcher.is_running:
+            label, probability, tier, version = await batcher.submit(record, request_deadline(request),
+                                                                     request_arrival(request))
+        else:
+            labels, probabilities, tier, version = await executor.predict_records([record], request_deadline(request),
+                                                                                  request_arrival(request))
+            label, probability = int(labels[0]), float(probabilities[0])
+    except (InferenceSaturatedError, DeadlineExceededError):
+        raise
+    except Exception:
+        REQUEST_ERRORS.labels(route='/api/v1/predict', reason='prediction_error').inc()
+        raise
+
+    # returned as is: no template, no response_model validation, one orjson call
+    received_at = getattr(request.state, 'received_at', None)
+    return FastJSONResponse({
+        "label": label,
+        "probability": probability,
+        "model_version": version,
+        "model_tier": tier,
+        "latency_ms": round((time.perf_counter() - received_at) * 1000, 3) if received_at is not None else None
+    })
+
+
+# -----------------------------------
+# Batch Prediction API
+# -----------------------------------
+
+@app.post("/api/v1/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(request: Request, response: Response, payload: BatchPredictionRequest):
+
+    observe_parse(request)
+
+    if payload.records is not None:
+        n_rows = len(payload.records)
+    else:
+        unknown = set(payload.columns) - set(INPUT_COLUMNS)
+        if unknown:
+            REQUEST_ERRORS.labels(route='/api/v1/predict/batch', reason='invalid_input').inc()
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {sorted(unknown)}")
+        n_rows = max((len(values) for values in payload.columns.values()), default=0)
+
+    if n_rows == 0 or n_rows > BATCH_PREDICTION_MAX_ROWS:
+        REQUEST_ERRORS.labels(route='/api/v1/predict/batch', reason='invalid_input').inc()
+        if n_rows == 0:
+            raise HTTPException(status_code=400, detail="No rows to score")
+        raise HTTPException(status_code=413,
+                            detail=f"Batch of {n_rows} rows exceeds the limit of {BATCH_PREDICTION_MAX_ROWS}")
+
+    try:
+        if payload.records is not None:
+            df = await run_in_threadpool(MentalHealthData.records_to_dataframe,
+                                         [record.model_dump() for record in payload.records])
+        else:
+            df = await run_in_threadpool(MentalHealthData.columns_to_dataframe, payload.columns)
+    except Exception as e:
+        REQUEST_ERRORS.labels(route='/api/v1/predict/batch', reason='invalid_input').inc()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        labels, probabilities, tier, _ = await executor.predict_batch(df, request_deadline(request),
+                                                                      request_arrival(request))
+    except (InferenceSaturatedError, DeadlineExceededError):
+        raise
+    except Exception:
+        REQUEST_ERRORS.labels(route='/api/v1/predict/batch', reason='prediction_error').inc()
+        raise
+
+    response.headers["X-Model-Tier"] = tier
+    return BatchPredictionResponse(
+        count=len(labels),
+        labels=labels.astype(int).tolist(),
+        probabilities=probabilities.tolist(),
+        model_tier=tier
+    )
+
+
+# -----------------------------------
+# Streaming Prediction API
+# -----------------------------------
+
+STREAM_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@app.post("/api/v1/predict/stream")
+async def predict_stream(request: Request, fmt: Optional[str] = Query(None, alias="format")):
+
+    # format from ?format=csv|ndjson, else from the Content-Type of the upload
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = "csv" if "csv" in content_type else "ndjson"
+    if fmt not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=415, detail=f"Unsupported format '{fmt}', use csv or ndjson")
+
+    return FullDuplexStreamingResponse(
+        stream_scorer.score_stream(request.stream(), fmt),
+        media_type=STREAM_MEDIA_TYPES[fmt]
+    )
+
+
+# -----------------------------------
+# Probes
+# -----------------------------------
+
+@app.get("/healthz")
+async def healthz():
+
+    # liveness: the event loop answers
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+
+    # readiness: the model is resident and warmed up
+    return JSONResponse(status_code=200 if preloader.ready else 503, content=preloader.status())
+
+
+# -----------------------------------
+# Metrics
+# -----------------------------------
+
+@app.get("/metrics")
+async def metrics():
+
+    return Response(content=REGISTRY.render_text(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# -----------------------------------
+# Profiles
+# -----------------------------------
+
+def require_admin(token: Optional[str]) -> None:
+    # 404 rather than 401 when no token is configured: the endpoints do not exist then
+    if not profiler.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiler.is_admin(token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.get("/admin/profiles")
+async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+
+    require_admin(x_admin_token)
+    return {"profiles": await run_in_threadpool(profiler.list_profiles)}
+
+
+@app.get("/admin/profiles/{name}")
+async def get_profile(name: str, x_admin_token: Optional[str] = Header(None)):
+
+    require_admin(x_admin_token)
+    content = await run_in_threadpool(profiler.read_profile, name)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"No profile named {name}")
+    return PlainTextResponse(content)
+
+
 # -----------------------------------
 # Run Server
 # -----------------------------------
@@ -0,0 +1,58 @@
+"""
+Scaling of the offline scorer (src.pipeline.batch_predict) with the number
+of worker processes. Every run scores the same synthetic CSV and must produce
+the same output file.
+
+    python -m benchmarks.bench_batch_predict --rows 200000 --workers 1 2 4 8
+"""
+import argparse
+import filecmp
+import json
+import os
+import tempfile
+
+from benchmarks.server import ensure_local_model
+from benchmarks.synthetic import make_raw_dataframe
+from src.constants import MODEL_BUCKET_NAME, MODEL_FILE_NAME
+from src.pipeline.batch_predict import batch_predict
+
+GENERATE_ROWS = 50000
+
+
+def _write_input(path: str, n_rows: int) -> None:
+    for start in range(0, n_rows, GENERATE_ROWS):
+        df = make_raw_dataframe(min(GENERATE_ROWS, n_rows - start), seed=start, with_target=False)
+        df['id'] = df['id'] + start
+        df.to_csv(path, mode='a' if start else 'w', header=not start, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--chunk-rows', type=int, default=20000)
+    parser.add_argument('--storage-dir', default='local_storage')
+    args = parser.parse_args()
+
+    ensure_local_model(args.storage_dir)
+    model_path = os.path.join(args.storage_dir, MODEL_BUCKET_NAME, MODEL_FILE_NAME)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, 'input.csv')
+        _write_input(input_path, args.rows)
+
+        baseline, reference = None, None
+        for workers in args.workers:
+            output_path = os.path.join(work_dir, f'predictions_{workers}.csv')
+            n_rows, elapsed = batch_predict(input_path, output_path, workers=workers,
+                                            chunk_rows=args.chunk_rows, model_path=model_path)
+            baseline = baseline or elapsed
+            reference = reference or output_path
+            print(json.dumps({'workers': workers, 'cpus': os.cpu_count(), 'rows': n_rows,
+                              'seconds': round(elapsed, 2), 'rows_per_second': round(n_rows / elapsed),
+                              'speedup': round(baseline / elapsed, 2),
+                              'same_output': filecmp.cmp(reference, output_path, shallow=False)}))
+
+
+if __name__ == '__main__':
+    main()
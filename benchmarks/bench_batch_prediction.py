@@ -0,0 +1,45 @@
+"""
+Compares scoring N rows with one predict_batch call against N single-row
+predict calls (the /predict path).
+
+    python -m benchmarks.bench_batch_prediction --sizes 1 10 100 1000
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.local_model import train_local_model, load_local_predictor
+from benchmarks.synthetic import make_raw_dataframe
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--train-rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        predictor = load_local_predictor(train_local_model(work_dir, n_rows=args.train_rows))
+
+    df = make_raw_dataframe(max(args.sizes), seed=7, with_target=False).drop(columns=['id'])
+    predictor.predict_batch(df.head(10))
+
+    print(f"{'rows':>8} {'single calls (s)':>18} {'batch call (s)':>16} {'speedup':>9} {'rows/s batch':>14}")
+    for size in args.sizes:
+        rows = df.head(size)
+
+        start = time.perf_counter()
+        single = [predictor.predict(rows.iloc[[i]])[0] for i in range(size)]
+        single_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        labels, _, _ = predictor.predict_batch(rows)
+        batch_elapsed = time.perf_counter() - start
+
+        assert list(labels) == single, "batch and single-row predictions differ"
+        print(f"{size:>8} {single_elapsed:>18.4f} {batch_elapsed:>16.4f} "
+              f"{single_elapsed / batch_elapsed:>8.1f}x {size / batch_elapsed:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
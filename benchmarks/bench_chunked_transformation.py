@@ -0,0 +1,143 @@
+"""
+Peak RSS and wall clock of the data transformation reading the train / test
+csv files whole against reading them --chunk-size rows at a time
+(DataTransformationConfig.chunk_size), at increasing row counts: the first
+grows with the dataset, the second should stay flat.
+
+Every run is a fresh process (the peak is its VmHWM) writing the default
+sparse artifacts; the parent then compares the matrices and targets both
+modes wrote. A tenth of the rows is repeated, as in exports of the same
+records, so the duplicate removal has work to do. One JSON line per row count
+and mode, one with the comparison. A last case checks the same parity on a
+train file whose last chunk only repeats rows of the first, so that chunk is
+empty once duplicates are removed.
+
+    python -m benchmarks.bench_chunked_transformation --sizes 250000 500000 1000000 --chunk-size 50000
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_transformation_memory import _peak_rss_mb
+from benchmarks.server import REPO_ROOT
+from benchmarks.synthetic import make_raw_dataframe
+
+
+def write_dataset(work_dir: str, n_rows: int, seed: int):
+    df = make_raw_dataframe(n_rows, seed=seed)
+    repeated = df.iloc[:n_rows // 10].assign(id=lambda rows: rows['id'] + n_rows)
+    df = pd.concat([df, repeated], ignore_index=True).sample(frac=1, random_state=seed)
+    split = int(len(df) * 0.8)
+    train_path, test_path = os.path.join(work_dir, 'train.csv'), os.path.join(work_dir, 'test.csv')
+    df.iloc[:split].to_csv(train_path, index=False)
+    df.iloc[split:].to_csv(test_path, index=False)
+    return train_path, test_path
+
+
+def write_duplicate_tail_dataset(work_dir: str, chunk_size: int, seed: int):
+    df = make_raw_dataframe(3 * chunk_size, seed=seed)
+    train = df.iloc[:2 * chunk_size]
+    repeated = train.iloc[:chunk_size].assign(id=lambda rows: rows['id'] + 3 * chunk_size)
+    train_path, test_path = os.path.join(work_dir, 'train.csv'), os.path.join(work_dir, 'test.csv')
+    pd.concat([train, repeated], ignore_index=True).to_csv(train_path, index=False)
+    df.iloc[2 * chunk_size:].to_csv(test_path, index=False)
+    return train_path, test_path
+
+
+def _config(out_dir: str, chunk_size: int):
+    from src.entity.config_entity import DataTransformationConfig
+
+    return DataTransformationConfig(
+        data_transformation_dir=out_dir,
+        sparse_output=True,
+        chunk_size=chunk_size,
+        transformed_train_file_path=os.path.join(out_dir, 'train.npz'),
+        transformed_test_file_path=os.path.join(out_dir, 'test.npz'),
+        transformed_train_target_file_path=os.path.join(out_dir, 'train_target.npy'),
+        transformed_test_target_file_path=os.path.join(out_dir, 'test_target.npy'),
+        transformed_object_file_path=os.path.join(out_dir, 'preprocessing.pkl'),
+        feature_engineer_file_path=os.path.join(out_dir, 'feature_engineer.pkl'),
+    )
+
+
+def run_child(out_dir: str, chunk_size: str, train_path: str, test_path: str) -> None:
+    from src.components.data_transformation import DataTransformation
+    from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+
+    transformation = DataTransformation(
+        data_ingestion_artifact=DataIngestionArtifact(trained_file_path=train_path, test_file_path=test_path),
+        data_transformation_config=_config(out_dir, int(chunk_size)),
+        data_validation_artifact=DataValidationArtifact(validation_status=True, message='',
+                                                        validation_report_file_path=''),
+    )
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    transformation.initiate_data_transformation()
+    print(json.dumps({'baseline_rss_mb': round(baseline, 1), 'peak_rss_mb': round(_peak_rss_mb(), 1),
+                      'seconds': round(time.perf_counter() - start, 2)}), flush=True)
+
+
+def compare_outputs(left_dir: str, right_dir: str) -> dict:
+    from src.utils.main_utils import load_transformed_data
+
+    result = {}
+    for split in ('train', 'test'):
+        left = load_transformed_data(os.path.join(left_dir, f'{split}.npz'),
+                                     os.path.join(left_dir, f'{split}_target.npy'))
+        right = load_transformed_data(os.path.join(right_dir, f'{split}.npz'),
+                                      os.path.join(right_dir, f'{split}_target.npy'))
+        result[f'{split}_shape_equal'] = left[0].shape == right[0].shape
+        result[f'{split}_max_abs_diff'] = (float(abs(left[0] - right[0]).max())
+                                           if result[f'{split}_shape_equal'] else None)
+        result[f'{split}_target_equal'] = bool(np.array_equal(left[1], right[1]))
+    return result
+
+
+def run_modes(work_dir: str, train_path: str, test_path: str, chunk_size: int, case: dict) -> None:
+    out_dirs = {}
+    for mode, mode_chunk_size in (('whole', 0), ('chunked', chunk_size)):
+        out_dirs[mode] = os.path.join(work_dir, mode)
+        command = [sys.executable, '-m', 'benchmarks.bench_chunked_transformation', '--child',
+                   out_dirs[mode], str(mode_chunk_size), train_path, test_path]
+        result = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        line = result.stdout.strip().splitlines()[-1]
+        print(json.dumps({**case, 'mode': mode, 'chunk_size': mode_chunk_size, **json.loads(line)}), flush=True)
+    print(json.dumps({**case, **compare_outputs(out_dirs['whole'], out_dirs['chunked'])}), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[250000, 500000, 1000000])
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--duplicate-chunk-size', type=int, default=1000,
+                        help='chunk size of the case whose last train chunk is all duplicates')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--child', nargs=4, metavar=('OUT_DIR', 'CHUNK_SIZE', 'TRAIN', 'TEST'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    logging.getLogger().setLevel(logging.WARNING)
+    for n_rows in args.sizes:
+        with tempfile.TemporaryDirectory() as work_dir:
+            train_path, test_path = write_dataset(work_dir, n_rows, args.seed)
+            run_modes(work_dir, train_path, test_path, args.chunk_size, {'rows': n_rows})
+    with tempfile.TemporaryDirectory() as work_dir:
+        train_path, test_path = write_duplicate_tail_dataset(work_dir, args.duplicate_chunk_size, args.seed)
+        run_modes(work_dir, train_path, test_path, args.duplicate_chunk_size,
+                  {'rows': 3 * args.duplicate_chunk_size, 'case': 'duplicate_last_chunk'})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Time of every cleaning step, the former DataTransformation methods
+(benchmarks.legacy_transformation) against their FeatureEngineer
+counterparts, at increasing row counts. Each step is timed on the frame as
+the previous steps left it (copied outside the timer), with statistics
+learned from the same training rows; one JSON line per step and row count.
+
+    python -m benchmarks.bench_cleaning_steps --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import logging
+import time
+
+import pandas as pd
+
+from benchmarks.legacy_transformation import LegacyCleaning
+from benchmarks.synthetic import make_raw_dataframe
+from src.components.data_transformation import DataTransformation
+from src.constants import TARGET_COLUMN
+from src.entity.feature_engineer import FeatureEngineer
+
+
+def _best(function, frame: pd.DataFrame, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        df = frame.copy()
+        start = time.perf_counter()
+        function(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def time_steps(n_rows: int, train: pd.DataFrame, repeat: int, seed: int) -> list:
+    legacy = LegacyCleaning()
+    reference, student_mean = legacy.clean_train(train)
+    feature_engineer = FeatureEngineer().fit(train.drop(columns=[TARGET_COLUMN]))
+
+    raw = make_raw_dataframe(n_rows, seed=seed).drop(columns=['id'])
+    # a tenth of the rows repeated, as in exports of the same records
+    raw = pd.concat([raw, raw.iloc[:n_rows // 10]], ignore_index=True)
+    results = [('drop_duplicates', _best(legacy._drop_duplicates, raw, repeat),
+                _best(DataTransformation._drop_duplicates, raw, repeat))]
+
+    frame = raw.drop_duplicates().drop(columns=[TARGET_COLUMN, 'Name'])
+    combined = feature_engineer._combine(frame.copy())
+    results.append(('combine_columns',
+                    _best(lambda df: legacy._combine_work_academic_pressure(
+                        legacy._combine_job_study_satisfaction(df)), frame, repeat),
+                    _best(feature_engineer._combine, frame, repeat)))
+    frame = combined
+
+    students, professionals = feature_engineer._status_masks(frame)
+    # the legacy steps compare the status column inside each step, the new ones share these masks
+    results.append(('status_masks', 0.0, _best(feature_engineer._status_masks, frame, repeat)))
+
+    steps = [
+        ('fill_cgpa', lambda df: legacy._fill_cgpa_values(df, student_mean),
+         lambda df: feature_engineer._fill_cgpa(df, students, professionals)),
+        ('fill_numeric', lambda df: legacy._fill_numerical_nulls(df, reference),
+         feature_engineer._fill_numeric),
+        ('fill_profession', lambda df: legacy._fill_profession(df, reference),
+         lambda df: feature_engineer._fill_profession(df, students)),
+        ('map_city', lambda df: legacy._map_city_values(df, reference),
+         lambda df: feature_engineer._map_column(df, 'City')),
+        ('map_dietary_habits', lambda df: legacy._map_dietary_habits(df, reference),
+         lambda df: feature_engineer._map_column(df, 'Dietary Habits')),
+        ('map_degree', lambda df: legacy._map_degree_values(df, reference),
+         lambda df: feature_engineer._map_column(df, 'Degree')),
+        ('map_sleep_duration', lambda df: legacy._map_sleep_duration(df, reference),
+         lambda df: feature_engineer._map_column(df, 'Sleep Duration')),
+    ]
+    for name, legacy_step, new_step in steps:
+        results.append((name, _best(legacy_step, frame, repeat), _best(new_step, frame, repeat)))
+        new_step(frame)
+
+    rows = [{'rows': n_rows, 'step': name, 'legacy_ms': round(legacy_ms, 2), 'new_ms': round(new_ms, 2),
+             'speedup': round(legacy_ms / new_ms, 1) if legacy_ms else None}
+            for name, legacy_ms, new_ms in results]
+    total_legacy, total_new = sum(row['legacy_ms'] for row in rows), sum(row['new_ms'] for row in rows)
+    rows.append({'rows': n_rows, 'step': 'total', 'legacy_ms': round(total_legacy, 2),
+                 'new_ms': round(total_new, 2), 'speedup': round(total_legacy / total_new, 1)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--train-rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    # the legacy steps log one INFO line per call
+    logging.getLogger().setLevel(logging.WARNING)
+    train = make_raw_dataframe(args.train_rows, seed=args.seed).drop(columns=['id']).drop_duplicates()
+    for n_rows in args.sizes:
+        for row in time_steps(n_rows, train, args.repeat, args.seed + 1):
+            print(json.dumps(row), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Checks that the compiled ensemble reproduces GradientBoostingClassifier
+bit for bit (decision_function, predict and predict_proba) on the
+transformed training data, then compares their latency per batch size.
+
+    python -m benchmarks.bench_compiled_ensemble --sizes 1 10 100 1000 10000
+    python -m benchmarks.bench_compiled_ensemble --model artifact/.../model.pkl --csv artifact/.../train.csv
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.local_model import train_local_model, load_local_predictor
+from benchmarks.synthetic import make_raw_dataframe
+from src.entity.compiled_ensemble import CompiledEnsemble
+
+
+def check_parity(sklearn_model, compiled: CompiledEnsemble, X: np.ndarray) -> None:
+    expected = sklearn_model.decision_function(X)
+    actual = compiled.decision_function(X)
+    mismatched = np.flatnonzero(expected.view(np.int64) != actual.view(np.int64))
+    assert len(mismatched) == 0, f"{len(mismatched)} decision scores differ, first at row {mismatched[0]}"
+    assert np.array_equal(sklearn_model.predict(X), compiled.predict(X))
+    assert np.array_equal(sklearn_model.predict_proba(X).view(np.int64), compiled.predict_proba(X).view(np.int64))
+    print(f"parity ok: {len(X)} rows, {compiled.n_trees} trees, {len(compiled.value)} nodes, "
+          f"max depth {compiled.max_depth}")
+
+
+def _best_of(function, X: np.ndarray, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+    parser.add_argument('--train-rows', type=int, default=20000)
+    parser.add_argument('--csv', help='Raw rows to check (defaults to the synthetic training data)')
+    parser.add_argument('--model', help='Trained model.pkl (defaults to one trained on synthetic data)')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.model:
+        predictor = load_local_predictor(args.model)
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            predictor = load_local_predictor(train_local_model(work_dir, n_rows=args.train_rows))
+
+    model = predictor.model_holder.get_model()
+    sklearn_model = model.trained_model_object
+    compiled = CompiledEnsemble.from_gradient_boosting(sklearn_model)
+    assert compiled is not None, "model could not be compiled"
+
+    df = pd.read_csv(args.csv) if args.csv else make_raw_dataframe(max(args.train_rows, max(args.sizes)),
+                                                                      with_target=False)
+    X = model.preprocessing_object.transform(predictor.transformer.transform(df, model.get_feature_engineer()))
+    check_parity(sklearn_model, compiled, X)
+
+    print(f"{'rows':>8} {'sklearn (ms)':>14} {'compiled (ms)':>14} {'speedup':>9}")
+    for size in args.sizes:
+        rows = X[:size]
+        sklearn_elapsed = _best_of(sklearn_model.predict_proba, rows, args.repeat)
+        compiled_elapsed = _best_of(compiled.predict_proba, rows, args.repeat)
+        print(f"{size:>8} {sklearn_elapsed * 1000:>14.3f} {compiled_elapsed * 1000:>14.3f} "
+              f"{sklearn_elapsed / compiled_elapsed:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
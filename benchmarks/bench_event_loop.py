@@ -0,0 +1,95 @@
+"""
+Measures the latency of the home page (/) while /predict is under load, for
+each inference backend. With scoring on the event loop ('inline') every
+prediction stalls the home page; with a thread or process pool its p99
+should stay close to the idle value.
+
+    python -m benchmarks.bench_event_loop --backends inline thread process --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.server import ensure_local_model, run_server
+from benchmarks.synthetic import make_raw_dataframe, to_input_records, to_form_payload
+
+
+async def _drive_predict(base_url: str, concurrency: int, duration: float, payloads: list) -> int:
+    done = 0
+    stop_at = time.perf_counter() + duration
+
+    async def worker(offset: int):
+        nonlocal done
+        async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+            i = offset
+            while time.perf_counter() < stop_at:
+                await client.post('/predict', data=payloads[i % len(payloads)])
+                done += 1
+                i += concurrency
+
+    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    return done
+
+
+def _load_process(base_url: str, concurrency: int, duration: float, queue) -> None:
+    payloads = [to_form_payload(r) for r in to_input_records(make_raw_dataframe(500, seed=3, with_target=False))]
+    queue.put(asyncio.run(_drive_predict(base_url, concurrency, duration, payloads)))
+
+
+async def _probe_home(base_url: str, duration: float, interval: float = 0.02) -> list:
+    latencies = []
+    stop_at = time.perf_counter() + duration
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            await client.get('/')
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(interval)
+    return latencies
+
+
+def _percentiles(latencies: list) -> dict:
+    values = np.array(latencies) * 1000
+    return {'p50_ms': round(float(np.percentile(values, 50)), 2),
+            'p99_ms': round(float(np.percentile(values, 99)), 2)}
+
+
+def run_backend(backend: str, storage_dir: str, concurrency: int, duration: float, workers: int) -> dict:
+    env = {'INFERENCE_BACKEND': backend, 'INFERENCE_WORKERS': str(workers),
+           'INFERENCE_MAX_PENDING': str(max(64, concurrency * 2))}
+    with run_server(storage_dir, env=env) as (base_url, _):
+        idle = asyncio.run(_probe_home(base_url, duration=2.0))
+
+        queue = multiprocessing.Queue()
+        load = multiprocessing.Process(target=_load_process, args=(base_url, concurrency, duration, queue))
+        load.start()
+        time.sleep(0.5)
+        loaded = asyncio.run(_probe_home(base_url, duration=duration - 1.0))
+        load.join()
+        predictions = queue.get()
+
+    return {'backend': backend, 'home_idle': _percentiles(idle), 'home_under_load': _percentiles(loaded),
+            'predict_rps': round(predictions / duration, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['inline', 'thread', 'process'])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--storage-dir', default='local_storage')
+    args = parser.parse_args()
+
+    ensure_local_model(args.storage_dir)
+    for backend in args.backends:
+        print(json.dumps(run_backend(backend, args.storage_dir, args.concurrency, args.duration, args.workers)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Cold-start profile of the service:
+- import time of app.py (python -X importtime), the slowest top level
+  packages, and whether serving-irrelevant heavy packages got imported
+- time from spawning uvicorn to /healthz (live) and to /readyz (model
+  resident and warmed up), against STARTUP_BUDGET_SECONDS
+
+    python -m benchmarks.bench_import_time --repeat 3 --storage-dir local_storage
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.server import REPO_ROOT, ensure_local_model, server_env
+from src.constants import STARTUP_BUDGET_SECONDS
+
+# must not be imported by `import app` (training / cloud only, or loaded with the model)
+DEFERRED_PACKAGES = ('boto3', 'botocore', 'pymongo', 'dill', 'sklearn', 'scipy')
+
+
+def profile_import(env: dict) -> dict:
+    """
+    One `import app` in a fresh interpreter, parsed from the -X importtime report
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=REPO_ROOT,
+                               env=env, capture_output=True, text=True, check=True)
+    packages = defaultdict(int)
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.rstrip()
+        packages[name.strip().split('.')[0]] += int(self_us)
+        if name == ' app':
+            total_us = int(cumulative_us)
+    return {'import_seconds': total_us / 1e6, 'packages': packages}
+
+
+def measure_startup(env: dict, port: int, timeout: float = 120.0) -> dict:
+    """
+    Seconds from spawning the server to /healthz answering and to /readyz answering 200
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1',
+                                '--port', str(port), '--log-level', 'warning'],
+                               cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    result = {}
+    try:
+        while 'ready_seconds' not in result:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError("Server did not become ready")
+            try:
+                if 'live_seconds' not in result and httpx.get(base_url + '/healthz', timeout=1.0).status_code == 200:
+                    result['live_seconds'] = time.perf_counter() - started
+                response = httpx.get(base_url + '/readyz', timeout=1.0)
+                if response.status_code == 200:
+                    result['ready_seconds'] = time.perf_counter() - started
+                    result['preload_seconds'] = response.json()['preload_seconds']
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=8, help='slowest top level packages to report')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--storage-dir', default='local_storage')
+    args = parser.parse_args()
+
+    ensure_local_model(args.storage_dir)
+    env = server_env(args.storage_dir)
+
+    imports = [profile_import(env) for _ in range(args.repeat)]
+    packages = imports[-1]['packages']
+    print(json.dumps({
+        'import_app_seconds': round(statistics.median(run['import_seconds'] for run in imports), 3),
+        'slowest_packages_seconds': {name: round(us / 1e6, 3) for name, us in
+                                     sorted(packages.items(), key=lambda item: -item[1])[:args.top]},
+        'deferred_packages_imported': [name for name in DEFERRED_PACKAGES if name in packages]
+    }))
+
+    runs = [measure_startup(env, args.port) for _ in range(args.repeat)]
+    ready_seconds = statistics.median(run['ready_seconds'] for run in runs)
+    print(json.dumps({
+        'live_seconds': round(statistics.median(run['live_seconds'] for run in runs), 3),
+        'ready_seconds': round(ready_seconds, 3),
+        'preload_seconds': round(statistics.median(run['preload_seconds'] for run in runs), 3),
+        'budget_seconds': STARTUP_BUDGET_SECONDS,
+        'within_budget': ready_seconds <= STARTUP_BUDGET_SECONDS
+    }))
+
+
+if __name__ == '__main__':
+    main()
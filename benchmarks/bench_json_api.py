@@ -0,0 +1,97 @@
+"""
+Single predictions through the HTML form route (/predict: form parsing,
+Jinja2 page rendering) against the JSON route (/api/v1/predict: typed record
+in, label and probability out, serialized with orjson when installed).
+
+Boots app.py against the local stand-in of the model bucket, sends the same
+synthetic rows one at a time to both routes and prints one JSON line per
+route with latency percentiles and response size; then times the response
+encoders alone on the JSON route's payload.
+
+    python -m benchmarks.bench_json_api --requests 2000
+"""
+import argparse
+import json
+import logging
+import time
+import timeit
+
+import httpx
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from benchmarks.load_test import FORM_REQUIRED_FIELDS, make_rows
+from benchmarks.server import ensure_local_model, run_server
+from benchmarks.synthetic import to_form_payload
+
+
+def measure_route(client: httpx.Client, route: str, payloads: list, requests: int, warmup: int) -> dict:
+    latencies, sizes, errors = [], [], 0
+    for i in range(warmup + requests):
+        payload = payloads[i % len(payloads)]
+        sent = time.perf_counter()
+        response = client.post(route, **payload)
+        elapsed = time.perf_counter() - sent
+        if i < warmup:
+            continue
+        latencies.append(elapsed)
+        sizes.append(len(response.content))
+        errors += response.status_code >= 400 or 'Error:' in response.text
+    values = np.array(latencies) * 1000
+    return {
+        'route': route,
+        'requests': requests,
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'mean_ms': round(float(values.mean()), 3),
+        'response_bytes': int(np.mean(sizes)),
+        'errors': errors,
+    }
+
+
+def measure_encoders(number: int) -> list:
+    body = {'label': 1, 'probability': 0.8734151198312235, 'model_version': '"9b2cf535f27731c974343645a3985328"',
+            'model_tier': 'primary', 'latency_ms': 2.418}
+    encoders = [('json', JSONResponse)]
+    try:
+        from fastapi.responses import ORJSONResponse
+        ORJSONResponse(body)
+        encoders.append(('orjson', ORJSONResponse))
+    except AssertionError:
+        pass
+    return [{'encoder': name, 'us_per_response': round(timeit.timeit(lambda: cls(body), number=number)
+                                                      / number * 1e6, 2)}
+            for name, cls in encoders]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='measured requests per route')
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=2000, help='distinct synthetic rows to cycle through')
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--storage-dir', default='local_storage')
+    args = parser.parse_args()
+
+    records = make_rows(args.rows, args.seed)
+    forms = [to_form_payload(record) for record in records]
+    routes = {
+        '/predict': [{'data': form} for form in forms if all(field in form for field in FORM_REQUIRED_FIELDS)],
+        '/api/v1/predict': [{'json': record} for record in records],
+    }
+
+    # src.logger sets the root logger to INFO, one line per request would drown the results
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    ensure_local_model(args.storage_dir)
+    with run_server(args.storage_dir, port=args.port) as (base_url, _), \
+            httpx.Client(base_url=base_url, timeout=30) as client:
+        for route, payloads in routes.items():
+            print(json.dumps(measure_route(client, route, payloads, args.requests, args.warmup)), flush=True)
+    for result in measure_encoders(number=20000):
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == '__main__':
+    main()
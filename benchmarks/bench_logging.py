@@ -0,0 +1,116 @@
+"""
+Logging overhead per request, for the previous synchronous handlers (file +
+console written on the caller's thread) and the queue based configuration of
+src.logger, with and without the hot path sampling.
+
+A request is the DataFrame prediction path (MentalHealthData ->
+MentalHealthPredictor.predict), which emits 8 INFO records; 'logging only'
+times those 8 logging calls without the prediction. Overhead is measured
+against the same loop with logging disabled. The console goes to /dev/null,
+the log file to a temporary directory.
+
+    python -m benchmarks.bench_logging --requests 2000
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+import src.logger
+from benchmarks.server import ensure_local_model
+from benchmarks.local_model import load_local_predictor
+from src.constants import MODEL_BUCKET_NAME, MODEL_FILE_NAME
+from src.pipeline.prediction_pipeline import MentalHealthData
+
+REQUEST = dict(Name="Bench", Gender="Male", Age=23, City="Delhi", Working_Professional_or_Student="Student",
+               Profession=None, Academic_Pressure=4.5, Work_Pressure=None, CGPA=8.2, Study_Satisfaction=3.5,
+               Job_Satisfaction=None, Sleep_Duration="6-7 hours", Dietary_Habits="More Healthy", Degree="B.Tech",
+               Suicidal_Thoughts="No", Work_Study_Hours=6.0, Financial_Stress=2.5, Family_History="No")
+
+
+def configure_sync(file_path: str, stream) -> None:
+    """
+    The previous configuration: handlers called directly by every logging call
+    """
+    src.logger._stop_listener()
+    root = logging.getLogger()
+    root.handlers.clear()
+    for sampled in src.logger._sampled_loggers:
+        sampled.filters.clear()
+    root.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
+    file_handler = RotatingFileHandler(file_path, maxBytes=src.logger.MAX_LOG_SIZE, backupCount=src.logger.BACKUP_COUNT)
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler(stream)
+    console_handler.setFormatter(formatter)
+    console_handler.setLevel(logging.INFO)
+    root.addHandler(file_handler)
+    root.addHandler(console_handler)
+
+
+def configure_queue(file_path: str, stream, sample_rates: str) -> None:
+    root = logging.getLogger()
+    root.handlers.clear()
+    src.logger._queue_handler = None
+    src.logger.LOG_SAMPLE_RATES = sample_rates
+    src.logger.configure_logger(file_path=file_path, stream=stream)
+
+
+def time_per_call(function, n: int) -> float:
+    function()
+    start = time.perf_counter()
+    for _ in range(n):
+        function()
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--storage-dir', default='local_storage')
+    args = parser.parse_args()
+
+    ensure_local_model(args.storage_dir)
+    predictor = load_local_predictor(os.path.join(args.storage_dir, MODEL_BUCKET_NAME, MODEL_FILE_NAME))
+    default_sample_rates = src.logger.LOG_SAMPLE_RATES
+    hot_path_logger = logging.getLogger('src.pipeline.prediction_pipeline')
+
+    def request():
+        predictor.predict(MentalHealthData(**REQUEST).get_input_dataframe())
+
+    def logging_only():
+        for i in range(8):
+            hot_path_logger.info(f'Benchmark record {i}')
+
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, 'w') as devnull:
+        configs = {
+            'sync': lambda: configure_sync(os.path.join(log_dir, 'sync.log'), devnull),
+            'queue': lambda: configure_queue(os.path.join(log_dir, 'queue.log'), devnull, ''),
+            'queue_sampled': lambda: configure_queue(os.path.join(log_dir, 'sampled.log'), devnull,
+                                                     default_sample_rates),
+        }
+        for name, function in (('request', request), ('logging only', logging_only)):
+            # configs interleaved over several rounds, best round kept, to cancel out drift
+            best = {config: float('inf') for config in ['disabled', *configs]}
+            for _ in range(args.rounds):
+                for config in best:
+                    if config == 'disabled':
+                        logging.disable(logging.CRITICAL)
+                    else:
+                        logging.disable(logging.NOTSET)
+                        configs[config]()
+                    best[config] = min(best[config], time_per_call(function, args.requests // args.rounds))
+            logging.disable(logging.NOTSET)
+            for config in configs:
+                print(json.dumps({'path': name, 'config': config, 'us_per_request': round(best[config] * 1e6, 1),
+                                  'logging_overhead_us': round((best[config] - best['disabled']) * 1e6, 1),
+                                  'disabled_us_per_request': round(best['disabled'] * 1e6, 1)}))
+        src.logger._stop_listener()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Memory of N serving workers: serve.py (model loaded once in the master,
+workers forked and sharing it copy-on-write) against `uvicorn --workers N`
+(every worker imports the app and loads its own model).
+
+Per process, /proc/<pid>/smaps_rollup gives RSS (pages mapped, shared ones
+counted in every process), PSS (shared pages split between their users, so
+the PSS of all processes adds up to the real footprint) and private memory.
+
+    python -m benchmarks.bench_prefork_memory --workers 1 4 16
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.server import ensure_local_model, run_server
+from benchmarks.synthetic import make_raw_dataframe, to_input_records
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                # the command may contain spaces, ppid is the 2nd field after it
+                ppid = int(stat.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+def _cpu_ticks(pids: List[int]) -> int:
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as stat:
+                fields = stat.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        total += int(fields[11]) + int(fields[12])  # utime + stime
+    return total
+
+
+def _wait_idle(pids: List[int], timeout: float, interval: float = 1.0) -> None:
+    """
+    Wait until the processes stop using CPU, i.e. every worker finished loading
+    """
+    deadline = time.time() + timeout
+    previous = _cpu_ticks(pids)
+    while time.time() < deadline:
+        time.sleep(interval)
+        current = _cpu_ticks(pids)
+        if current - previous <= 2:
+            return
+        previous = current
+
+
+def _memory_mb(pid: int) -> Dict[str, float]:
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'private': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def _exercise(base_url: str, requests: int) -> None:
+    # each worker has to have served requests, the untouched pages are not the interesting ones
+    payload = {'records': to_input_records(make_raw_dataframe(50, seed=5, with_target=False))}
+    with httpx.Client(timeout=30) as client:
+        for _ in range(requests):
+            client.post(base_url + '/api/v1/predict/batch', json=payload).raise_for_status()
+
+
+def measure(mode: str, workers: int, storage_dir: str, port: int, requests: int) -> dict:
+    if mode == 'prefork':
+        command = [sys.executable, 'serve.py', '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port)]
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', str(workers), '--log-level', 'warning']
+
+    with run_server(storage_dir, port=port, command=command, timeout=60 + 15 * workers) as (base_url, master):
+        # /readyz answered by one worker, wait for the others to load too
+        deadline = time.time() + 30 * workers
+        while len(_children(master.pid)) < workers and time.time() < deadline:
+            time.sleep(0.2)
+        _wait_idle([master.pid, *_children(master.pid)], timeout=30 * workers)
+        _exercise(base_url, requests * workers)
+        _wait_idle([master.pid, *_children(master.pid)], timeout=30)
+
+        worker_memory = [_memory_mb(pid) for pid in _children(master.pid)]
+        master_memory = _memory_mb(master.pid)
+        if not worker_memory:
+            # uvicorn with a single worker serves from the process it was started as
+            worker_memory, master_memory = [master_memory], {'rss': 0.0, 'pss': 0.0, 'private': 0.0}
+
+    def mean(key):
+        return round(sum(memory[key] for memory in worker_memory) / len(worker_memory), 1)
+
+    return {
+        'mode': mode,
+        'workers': workers,
+        'processes': len(worker_memory) + (master_memory['rss'] > 0),
+        'master_rss_mb': round(master_memory['rss'], 1),
+        'worker_rss_mb': mean('rss'),
+        'worker_pss_mb': mean('pss'),
+        'worker_private_mb': mean('private'),
+        'total_rss_mb': round(master_memory['rss'] + sum(memory['rss'] for memory in worker_memory), 1),
+        'total_pss_mb': round(master_memory['pss'] + sum(memory['pss'] for memory in worker_memory), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--mode', nargs='+', default=['prefork', 'uvicorn'], choices=['prefork', 'uvicorn'])
+    parser.add_argument('--requests', type=int, default=20, help='batch requests per worker before measuring')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--storage-dir', default='local_storage')
+    args = parser.parse_args()
+
+    ensure_local_model(args.storage_dir)
+    for mode in args.mode:
+        for workers in args.workers:
+            print(json.dumps(measure(mode, workers, args.storage_dir, args.port, args.requests)), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Dense against sparse transformed data, end to end: the data transformation
+writing one dense .npy per split (target appended with np.c_) or a CSR .npz
+plus a target .npy, then the model trainer fitting the gradient boosting and
+the fallback models on what it loads.
+
+City, Profession and Degree get --cardinality distinct values each (the
+synthetic rows only have a few dozen), so the one-hot width is that of a
+real high-cardinality export. Every stage runs in a fresh process, the peak
+is the VmHWM of that process; one JSON line per mode and stage, with the size
+of the transformed files and the F1 scores (identical in both modes).
+
+    python -m benchmarks.bench_sparse_pipeline --rows 100000 --cardinality 500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_transformation_memory import _peak_rss_mb
+from benchmarks.server import REPO_ROOT
+from benchmarks.synthetic import make_raw_dataframe
+
+MODES = ('dense', 'sparse')
+STAGES = ('transform', 'train')
+
+
+def write_dataset(work_dir: str, n_rows: int, cardinality: int, seed: int):
+    df = make_raw_dataframe(n_rows, seed=seed)
+    rng = np.random.default_rng(seed)
+    for column in ('City', 'Profession', 'Degree'):
+        present = df[column].notna().to_numpy()
+        values = df[column].to_numpy(dtype=object)
+        values[present] = np.char.add(f'{column} ', rng.integers(cardinality, size=int(present.sum())).astype(str))
+        df[column] = values
+    split = int(n_rows * 0.8)
+    train_path, test_path = os.path.join(work_dir, 'train.csv'), os.path.join(work_dir, 'test.csv')
+    df.iloc[:split].to_csv(train_path, index=False)
+    df.iloc[split:].to_csv(test_path, index=False)
+    return train_path, test_path
+
+
+def _configs(mode: str, work_dir: str):
+    from src.entity.config_entity import DataTransformationConfig, ModelTrainerConfig
+
+    out_dir = os.path.join(work_dir, mode)
+    extension = 'npz' if mode == 'sparse' else 'npy'
+    transformation_config = DataTransformationConfig(
+        data_transformation_dir=out_dir,
+        sparse_output=mode == 'sparse',
+        transformed_train_file_path=os.path.join(out_dir, f'train.{extension}'),
+        transformed_test_file_path=os.path.join(out_dir, f'test.{extension}'),
+        transformed_train_target_file_path=os.path.join(out_dir, 'train_target.npy'),
+        transformed_test_target_file_path=os.path.join(out_dir, 'test_target.npy'),
+        transformed_object_file_path=os.path.join(out_dir, 'preprocessing.pkl'),
+        feature_engineer_file_path=os.path.join(out_dir, 'feature_engineer.pkl'),
+    )
+    trainer_config = ModelTrainerConfig(
+        model_trainer_dir=out_dir,
+        trained_model_file_path=os.path.join(out_dir, 'model.pkl'),
+        fallback_model_file_path=os.path.join(out_dir, 'fallback_model.pkl'),
+        expected_accuracy=0.0,
+    )
+    return transformation_config, trainer_config
+
+
+def run_child(mode: str, stage: str, work_dir: str, train_path: str, test_path: str, n_estimators: str) -> None:
+    from src.components.data_transformation import DataTransformation
+    from src.components.model_trainer import ModelTrainer
+    from src.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, DataValidationArtifact
+    from src.utils.main_utils import load_transformed_data
+
+    transformation_config, trainer_config = _configs(mode, work_dir)
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    result = {'mode': mode, 'stage': stage}
+    if stage == 'transform':
+        DataTransformation(
+            data_ingestion_artifact=DataIngestionArtifact(trained_file_path=train_path, test_file_path=test_path),
+            data_transformation_config=transformation_config,
+            data_validation_artifact=DataValidationArtifact(validation_status=True, message='',
+                                                            validation_report_file_path=''),
+        ).initiate_data_transformation()
+        seconds = time.perf_counter() - start
+        paths = [transformation_config.transformed_train_file_path, transformation_config.transformed_test_file_path]
+        if mode == 'sparse':
+            paths += [transformation_config.transformed_train_target_file_path,
+                      transformation_config.transformed_test_target_file_path]
+        result['artifact_mb'] = round(sum(os.path.getsize(path) for path in paths) / 2 ** 20, 1)
+        X_train, _ = load_transformed_data(paths[0], paths[2] if mode == 'sparse' else None)
+        result['n_features'] = X_train.shape[1]
+    else:
+        trainer_config._n_estimators = int(n_estimators)
+        trainer = ModelTrainer(
+            data_transformation_artifact=DataTransformationArtifact(
+                transformed_object_file_path=transformation_config.transformed_object_file_path,
+                transformed_train_file_path=transformation_config.transformed_train_file_path,
+                transformed_test_file_path=transformation_config.transformed_test_file_path,
+                feature_engineer_file_path=transformation_config.feature_engineer_file_path,
+                transformed_train_target_file_path=(transformation_config.transformed_train_target_file_path
+                                                    if mode == 'sparse' else None),
+                transformed_test_target_file_path=(transformation_config.transformed_test_target_file_path
+                                                   if mode == 'sparse' else None),
+            ),
+            model_trainer_config=trainer_config,
+        )
+        artifact = trainer.initiate_model_trainer()
+        seconds = time.perf_counter() - start
+        result['f1'] = round(artifact.metric_artifact.f1_score, 6)
+        result['fallback_f1'] = round(artifact.fallback_metric_artifact.f1_score, 6)
+    result.update({'baseline_rss_mb': round(baseline, 1), 'peak_rss_mb': round(_peak_rss_mb(), 1),
+                   'seconds': round(seconds, 2)})
+    print(json.dumps(result), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--cardinality', type=int, default=500,
+                        help='distinct City, Profession and Degree values')
+    parser.add_argument('--n-estimators', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    parser.add_argument('--child', nargs=6, metavar=('MODE', 'STAGE', 'WORK_DIR', 'TRAIN', 'TEST', 'N_ESTIMATORS'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        train_path, test_path = write_dataset(work_dir, args.rows, args.cardinality, args.seed)
+        for mode in args.modes:
+            for stage in STAGES:
+                command = [sys.executable, '-m', 'benchmarks.bench_sparse_pipeline', '--child', mode, stage,
+                           work_dir, train_path, test_path, str(args.n_estimators)]
+                result = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+                line = result.stdout.strip().splitlines()[-1]
+                print(json.dumps({'rows': args.rows, 'cardinality': args.cardinality, **json.loads(line)}),
+                      flush=True)
+
+
+if __name__ == '__main__':
+    main()
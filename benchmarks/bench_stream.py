@@ -0,0 +1,127 @@
+"""
+Streams N synthetic rows through /api/v1/predict/stream and reports the
+client side rows/sec, the server's own summary and the peak RSS of the
+server process, which should stay flat as N grows.
+
+The client is full duplex (it reads predictions while still uploading),
+as the endpoint requires for inputs larger than the socket buffers.
+
+    python -m benchmarks.bench_stream --rows 100000 1000000 --format csv ndjson
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+from benchmarks.server import ensure_local_model, run_server
+from benchmarks.synthetic import make_raw_dataframe
+
+GENERATE_ROWS = 10000
+
+
+def _rss_kb(pid: int) -> int:
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+class _PeakRss(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.pid, self.interval = pid, interval
+        self.peak_kb = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak_kb = max(self.peak_kb, _rss_kb(self.pid))
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        return self.peak_kb
+
+
+def _body_pieces(n_rows: int, fmt: str):
+    """
+    The upload, generated GENERATE_ROWS at a time so the client's memory stays flat too
+    """
+    for start in range(0, n_rows, GENERATE_ROWS):
+        df = make_raw_dataframe(min(GENERATE_ROWS, n_rows - start), seed=start, with_target=False)
+        df['id'] = df['id'] + start
+        if fmt == 'csv':
+            yield df.to_csv(index=False, header=(start == 0)).encode()
+        else:
+            yield df.to_json(orient='records', lines=True).encode()
+
+
+async def _stream(base_url: str, n_rows: int, fmt: str) -> dict:
+    url = urlparse(base_url)
+    reader, writer = await asyncio.open_connection(url.hostname, url.port)
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    writer.write((f"POST /api/v1/predict/stream?format={fmt} HTTP/1.1\r\nHost: {url.netloc}\r\n"
+                  f"Content-Type: {content_type}\r\nTransfer-Encoding: chunked\r\n\r\n").encode())
+
+    async def upload():
+        for piece in _body_pieces(n_rows, fmt):
+            writer.write(f"{len(piece):x}\r\n".encode() + piece + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    started = time.perf_counter()
+    upload_task = asyncio.create_task(upload())
+
+    status = (await reader.readline()).decode().strip()
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+
+    # chunked response: count prediction lines, keep the trailer
+    predictions, tail = 0, b''
+    while True:
+        size = int((await reader.readline()).strip(), 16)
+        if size == 0:
+            break
+        data = tail + await reader.readexactly(size)
+        await reader.readexactly(2)
+        lines = data.split(b'\n')
+        tail = lines.pop()
+        predictions += len(lines)
+    elapsed = time.perf_counter() - started
+    await upload_task
+    writer.close()
+
+    # the last line is the trailer; for csv the first one is the header
+    trailer = data.rstrip(b'\n').split(b'\n')[-1].decode()
+    predictions -= 1 + (fmt == 'csv')
+    return {'status': status, 'rows_sent': n_rows, 'predictions': predictions,
+            'client_rows_per_second': round(predictions / elapsed, 1), 'trailer': trailer}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--format', nargs='+', default=['csv', 'ndjson'], dest='formats')
+    parser.add_argument('--chunk-rows', type=int, default=5000)
+    parser.add_argument('--storage-dir', default='local_storage')
+    args = parser.parse_args()
+
+    ensure_local_model(args.storage_dir)
+    with run_server(args.storage_dir, env={'STREAM_CHUNK_ROWS': str(args.chunk_rows)}) as (base_url, process):
+        for fmt in args.formats:
+            for n_rows in args.rows:
+                monitor = _PeakRss(process.pid)
+                baseline_kb = _rss_kb(process.pid)
+                monitor.start()
+                result = asyncio.run(_stream(base_url, n_rows, fmt))
+                result.update({'format': fmt, 'server_rss_before_mb': round(baseline_kb / 1024, 1),
+                               'server_peak_rss_mb': round(monitor.stop() / 1024, 1)})
+                print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
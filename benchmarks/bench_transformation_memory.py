@@ -0,0 +1,118 @@
+"""
+Peak RSS of the data transformation stage with the train / test csv read
+with the dtypes of config/schema.yaml (categoricals, float32, small ints)
+against plain pd.read_csv (object strings, float64, int64, as before).
+
+Every measurement runs in a fresh process (the peak only grows): 'clean'
+stops after reading, deduplicating and the FeatureEngineer steps, 'full' is
+the whole initiate_data_transformation (preprocessor and .npy arrays
+included). One JSON line per dtype mode and stage.
+
+    python -m benchmarks.bench_transformation_memory --rows 500000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.server import REPO_ROOT
+from benchmarks.synthetic import make_raw_dataframe
+
+MODES = ('object', 'schema')
+STAGES = ('clean', 'full')
+
+
+def _peak_rss_mb() -> float:
+    # VmHWM starts over at exec, ru_maxrss would include the parent's peak at fork time
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def write_dataset(work_dir: str, n_rows: int, seed: int):
+    df = make_raw_dataframe(n_rows, seed=seed)
+    split = int(n_rows * 0.8)
+    train_path, test_path = os.path.join(work_dir, 'train.csv'), os.path.join(work_dir, 'test.csv')
+    df.iloc[:split].to_csv(train_path, index=False)
+    df.iloc[split:].to_csv(test_path, index=False)
+    return train_path, test_path
+
+
+def run_child(mode: str, stage: str, work_dir: str, train_path: str, test_path: str) -> None:
+    from src.components.data_transformation import DataTransformation
+    from src.constants import TARGET_COLUMN
+    from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+    from src.entity.config_entity import DataTransformationConfig
+    from src.entity.feature_engineer import FeatureEngineer
+
+    if mode == 'object':
+        # the reader as it was before the schema dtypes
+        DataTransformation.read_data = lambda self, file_path: pd.read_csv(file_path)
+
+    out_dir = os.path.join(work_dir, f'{mode}-{stage}')
+    transformation = DataTransformation(
+        data_ingestion_artifact=DataIngestionArtifact(trained_file_path=train_path, test_file_path=test_path),
+        data_transformation_config=DataTransformationConfig(
+            data_transformation_dir=out_dir,
+            # the dense arrays this was measured with, benchmarks.bench_sparse_pipeline compares them to CSR
+            sparse_output=False,
+            transformed_train_file_path=os.path.join(out_dir, 'train.npy'),
+            transformed_test_file_path=os.path.join(out_dir, 'test.npy'),
+            transformed_object_file_path=os.path.join(out_dir, 'preprocessing.pkl'),
+            feature_engineer_file_path=os.path.join(out_dir, 'feature_engineer.pkl'),
+        ),
+        data_validation_artifact=DataValidationArtifact(validation_status=True, message='',
+                                                        validation_report_file_path=''),
+    )
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    train_df = transformation.read_data(train_path)
+    frame_mb = train_df.memory_usage(deep=True).sum() / 2 ** 20
+    if stage == 'clean':
+        test_df = transformation.read_data(test_path)
+        train_df = transformation._drop_duplicates(transformation._drop_id_column(train_df))
+        test_df = transformation._drop_duplicates(transformation._drop_id_column(test_df))
+        feature_engineer = FeatureEngineer()
+        feature_engineer.fit_transform(train_df.drop(columns=[TARGET_COLUMN]))
+        feature_engineer.transform(test_df.drop(columns=[TARGET_COLUMN]))
+    else:
+        del train_df
+        transformation.initiate_data_transformation()
+    print(json.dumps({'mode': mode, 'stage': stage, 'train_frame_mb': round(frame_mb, 1),
+                      'baseline_rss_mb': round(baseline, 1), 'peak_rss_mb': round(_peak_rss_mb(), 1),
+                      'seconds': round(time.perf_counter() - start, 2)}), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=STAGES)
+    parser.add_argument('--child', nargs=5, metavar=('MODE', 'STAGE', 'WORK_DIR', 'TRAIN', 'TEST'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        train_path, test_path = write_dataset(work_dir, args.rows, args.seed)
+        for stage in args.stages:
+            for mode in MODES:
+                command = [sys.executable, '-m', 'benchmarks.bench_transformation_memory',
+                           '--child', mode, stage, work_dir, train_path, test_path]
+                result = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+                line = result.stdout.strip().splitlines()[-1]
+                print(json.dumps({'rows': args.rows, **json.loads(line)}), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Parity check and timing of the compiled single-record encoder.
+
+Every row of the training data is scored through the pandas path
+(PredictionTransformer.transform + preprocessing_object.transform) and
+through transform_record + CompiledEncoder; the feature matrices must be
+identical. Then single-request latency of both paths is compared.
+
+    python -m benchmarks.check_fast_encoder --train-rows 20000
+    python -m benchmarks.check_fast_encoder --csv artifact/.../train.csv --model artifact/.../model.pkl
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.local_model import train_local_model, load_local_predictor
+from benchmarks.synthetic import make_raw_dataframe
+from src.pipeline.prediction_pipeline import INPUT_COLUMNS
+
+
+def _raw_records(df: pd.DataFrame) -> list:
+    df = df[list(INPUT_COLUMNS.values())]
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+
+def check_parity(predictor, df: pd.DataFrame) -> None:
+    model = predictor.model_holder.get_model()
+    encoder = model.get_encoder()
+    assert encoder is not None, "preprocessor could not be compiled"
+
+    feature_engineer = model.get_feature_engineer()
+    expected = model.preprocessing_object.transform(predictor.transformer.transform(df, feature_engineer))
+    records = [predictor.transformer.transform_record(record, feature_engineer) for record in _raw_records(df)]
+    actual = encoder.encode_many(records)
+
+    mismatched = np.flatnonzero((expected != actual).any(axis=1))
+    assert len(mismatched) == 0, f"{len(mismatched)} rows differ, first at index {mismatched[0]}"
+
+    labels, probabilities, _ = predictor.predict_batch(df)
+    fast_labels, fast_probabilities, _ = predictor.predict_records(_raw_records(df))
+    assert np.array_equal(labels, fast_labels) and np.array_equal(probabilities, fast_probabilities)
+    print(f"parity ok: {len(df)} rows, {encoder.n_features} features")
+
+
+def time_single(predictor, df: pd.DataFrame, repeat: int) -> None:
+    frames = [df.iloc[[i % len(df)]] for i in range(repeat)]
+    records = _raw_records(df)
+
+    start = time.perf_counter()
+    for frame in frames:
+        predictor.predict_batch(frame)
+    pandas_elapsed = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        predictor.predict_records([records[i % len(records)]])
+    fast_elapsed = (time.perf_counter() - start) / repeat
+
+    print(f"single row: pandas {pandas_elapsed * 1000:.3f} ms, compiled {fast_elapsed * 1000:.3f} ms "
+          f"({pandas_elapsed / fast_elapsed:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--train-rows', type=int, default=20000)
+    parser.add_argument('--csv', help='Raw rows to check (defaults to the synthetic training data)')
+    parser.add_argument('--model', help='Trained model.pkl (defaults to one trained on synthetic data)')
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    if args.model:
+        predictor = load_local_predictor(args.model)
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            predictor = load_local_predictor(train_local_model(work_dir, n_rows=args.train_rows))
+
+    df = pd.read_csv(args.csv) if args.csv else make_raw_dataframe(args.train_rows, with_target=False)
+    check_parity(predictor, df)
+    time_single(predictor, df, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Parity check and timing of FeatureEngineer against the former cleaning steps
+of DataTransformation (benchmarks.legacy_transformation).
+
+Parity: on synthetic train / test rows, fit_transform(train) and
+transform(test) must equal the legacy train and test outputs, and
+transform_record must give every row of transform, as must transform on
+rows holding None where read_csv gives NaN, and rows read with the
+schema dtypes (categoricals, float32) must clean to the same values, and
+partial_fit over chunks of the training rows must learn what fit does.
+Timing: cleaning N rows
+with statistics learned on the training rows, the legacy test path (which
+recomputes them from the training rows at every step) and the fixed rules
+PredictionTransformer served with, against FeatureEngineer.transform (and
+transform_record for a single row).
+
+    python -m benchmarks.check_feature_engineer --sizes 1 1000 1000000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.legacy_transformation import LegacyCleaning
+from benchmarks.synthetic import make_raw_dataframe
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.entity.feature_engineer import FeatureEngineer
+from src.pipeline.prediction_transformer import PredictionTransformer
+from src.utils.main_utils import apply_schema_dtypes, read_yaml_file
+
+
+def _split(n_rows: int, seed: int):
+    df = make_raw_dataframe(n_rows, seed=seed).drop(columns=['id']).drop_duplicates()
+    split = int(len(df) * 0.8)
+    return df.iloc[:split].reset_index(drop=True), df.iloc[split:].reset_index(drop=True)
+
+
+def _same(left, right) -> bool:
+    if _missing(left) or _missing(right):
+        return _missing(left) and _missing(right)
+    return left == right
+
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def check_parity(train: pd.DataFrame, test: pd.DataFrame) -> FeatureEngineer:
+    legacy = LegacyCleaning()
+    legacy_train, student_mean = legacy.clean_train(train)
+    legacy_test = legacy.clean_test(test, legacy_train, student_mean)
+
+    feature_engineer = FeatureEngineer()
+    new_train = feature_engineer.fit_transform(train.drop(columns=[TARGET_COLUMN]))
+    new_test = feature_engineer.transform(test.drop(columns=[TARGET_COLUMN]))
+    pd.testing.assert_frame_equal(new_train, legacy_train.drop(columns=[TARGET_COLUMN]), check_dtype=False)
+    pd.testing.assert_frame_equal(new_test, legacy_test.drop(columns=[TARGET_COLUMN]), check_dtype=False)
+
+    raw = test.drop(columns=[TARGET_COLUMN])
+    records = raw.astype(object).where(raw.notna(), None).to_dict(orient='records')
+    expected = new_test.to_dict(orient='records')
+    for i, record in enumerate(records):
+        row = feature_engineer.transform_record(record)
+        assert row.keys() == expected[i].keys(), f"row {i}: columns {sorted(row)} != {sorted(expected[i])}"
+        differ = [column for column in row if not _same(row[column], expected[i][column])]
+        assert not differ, f"row {i} differs on {differ}: {row} != {expected[i]}"
+
+    # request frames (records_to_dataframe) hold None, not NaN, in object columns
+    with_none = feature_engineer.transform(raw.astype(object).where(raw.notna(), None))
+    pd.testing.assert_frame_equal(with_none, new_test, check_dtype=False)
+
+    typed = feature_engineer.transform(apply_schema_dtypes(raw.copy(), read_yaml_file(file_path=SCHEMA_FILE_PATH)))
+    categorical = [column for column in typed.columns if isinstance(typed[column].dtype, pd.CategoricalDtype)]
+    assert categorical, "no categorical column left after transform"
+    pd.testing.assert_frame_equal(typed.astype({column: object for column in categorical}), new_test,
+                                  check_dtype=False, rtol=1e-6)
+
+    chunked = FeatureEngineer()
+    for start in range(0, len(train), 7000):
+        chunked.partial_fit(train.iloc[start:start + 7000].drop(columns=[TARGET_COLUMN]))
+    assert chunked.lookup_tables_ == feature_engineer.lookup_tables_, "partial_fit learned other lookup tables"
+    np.testing.assert_allclose(chunked.student_cgpa_mean_, feature_engineer.student_cgpa_mean_, rtol=1e-12)
+    assert chunked.numeric_means_.keys() == feature_engineer.numeric_means_.keys()
+    for column, mean in chunked.numeric_means_.items():
+        np.testing.assert_allclose(mean, feature_engineer.numeric_means_[column], rtol=1e-12)
+    print(f"parity ok: {len(train)} train rows, {len(test)} test rows, {new_train.shape[1]} columns, "
+          f"{len(categorical)} categorical columns kept, partial_fit in chunks of 7000 rows")
+    return feature_engineer
+
+
+def _best(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def time_sizes(feature_engineer: FeatureEngineer, train: pd.DataFrame, sizes: list, seed: int) -> None:
+    legacy = LegacyCleaning()
+    legacy_train, student_mean = legacy.clean_train(train)
+    serving = PredictionTransformer()
+    for n_rows in sizes:
+        rows = make_raw_dataframe(n_rows, seed=seed + 1).drop(columns=['id'])
+        X = rows.drop(columns=[TARGET_COLUMN])
+        repeat = 1 if n_rows >= 100000 else 5
+        result = {
+            'rows': n_rows,
+            'legacy_ms': _best(lambda: legacy.clean_test(rows, legacy_train, student_mean), repeat) * 1000,
+            'legacy_serving_ms': _best(lambda: serving._transform(X), repeat) * 1000,
+            'transform_ms': _best(lambda: feature_engineer.transform(X), repeat) * 1000,
+        }
+        if n_rows == 1:
+            record = X.astype(object).where(X.notna(), None).to_dict(orient='records')[0]
+            result['transform_record_ms'] = _best(lambda: feature_engineer.transform_record(record), 1000) * 1000
+        result['speedup'] = result['legacy_ms'] / result['transform_ms']
+        result['rows_per_second'] = n_rows / result['transform_ms'] * 1000
+        print(json.dumps({key: round(value, 4) if isinstance(value, float) else value
+                          for key, value in result.items()}), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--train-rows', type=int, default=50000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 1000, 1000000])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    train, test = _split(args.train_rows, args.seed)
+    feature_engineer = check_parity(train, test)
+    time_sizes(feature_engineer, train, args.sizes, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+The cleaning steps of DataTransformation as they were before FeatureEngineer,
+kept verbatim as the reference of the parity checks and benchmarks
+(benchmarks.check_feature_engineer, benchmarks.bench_cleaning_steps).
+Not used by the pipeline.
+"""
+import pandas as pd
+
+from src.logger import logging
+
+
+class LegacyCleaning:
+    def _drop_duplicates(self, df):
+        """Drops duplicate rows from the dataset"""
+        total_dups = df.duplicated().sum()
+        if total_dups > 0:
+            logging.info(f"Dropping {total_dups} duplicate rows from dataset.")
+            df = df.drop_duplicates()
+        else:
+            logging.info("No duplicate rows found in dataset.")
+        return df
+
+    def _combine_job_study_satisfaction(self, df):
+        """
+        Combine job satisfaction and study satisfaction into one 'Satisfaction' column.
+        Drops the original Job and Study Satisfaction columns.
+        """
+        logging.info('Combining Job and Study Satisfaction columns')
+        
+        if 'Job Satisfaction' in df.columns and 'Study Satisfaction' in df.columns:
+            df['Satisfaction'] = df['Job Satisfaction'].combine_first(df['Study Satisfaction'])
+            df = df.drop(['Job Satisfaction', 'Study Satisfaction'], axis=1)
+            logging.info('Successfully combined Job and Study Satisfaction into Satisfaction column')
+        else:
+            logging.warning('Job/Study Satisfaction columns not found in dataset; skipping merge')
+        
+        return df
+    
+    def _combine_work_academic_pressure(self, df):
+        """Combine Work Pressure and Academic Pressure into Pressure"""
+        if 'Work Pressure' in df.columns and 'Academic Pressure' in df.columns:
+            df['Pressure'] = df['Work Pressure'].combine_first(df['Academic Pressure'])
+            df.drop(['Work Pressure', 'Academic Pressure'], axis=1, inplace=True)
+            logging.info("Combined Work & Academic Pressure -> Pressure")
+        return df
+    
+    def _fill_cgpa_values(self, df, student_mean=None):
+        """
+        Fill CGPA:
+        - Working Professionals -> 0
+        - Students -> mean of Student CGPA (calculated on train)
+        """
+        if student_mean is None:
+            student_mean = df.loc[df['Working Professional or Student'] == 'Student', 'CGPA'].mean()
+
+        df.loc[df['Working Professional or Student'] == 'Working Professional', 'CGPA'] = (
+            df.loc[df['Working Professional or Student'] == 'Working Professional', 'CGPA'].fillna(0)
+        )
+
+        df.loc[df['Working Professional or Student'] == 'Student', 'CGPA'] = (
+            df.loc[df['Working Professional or Student'] == 'Student', 'CGPA'].fillna(student_mean)
+        )
+        logging.info("Filled CGPA for Professionals (0) and Students (mean)")
+        return df, student_mean
+
+    def _fill_profession(self, df, reference_df=None):
+        """Fill profession based on rules"""
+        df['Profession'] = df.apply(
+            lambda row: 'Student' if row['Working Professional or Student'] == 'Student' and pd.isnull(row['Profession'])
+            else row['Profession'], axis=1
+        )
+        if reference_df is None:
+            reference_df = df
+        df['Profession'] = df['Profession'].fillna('Teacher')
+        logging.info("Filled Profession (Student/Teacher/mode)")
+        return df
+    
+    def _map_city_values(self, df, reference_df):
+        value_count = reference_df["City"].value_counts()
+        df['City'] = df['City'].map(lambda x: x if value_count.get(x, 0) >= 10 else 'other')
+        logging.info("Mapped rare City values -> 'other'")
+        return df
+    
+    def _map_dietary_habits(self, df, reference_df):
+        specific_mappings = {
+            'More Healthy': 'Healthy',
+            'No Healthy': 'Unhealthy',
+            'Less Healthy': 'Unhealthy',
+            'Less than Healthy': 'Unhealthy'
+        }
+        value_count = reference_df['Dietary Habits'].value_counts()
+        mode_value = reference_df['Dietary Habits'].mode()[0]
+
+        def map_habits(v):
+            if v in specific_mappings:
+                return specific_mappings[v]
+            elif value_count.get(v, 0) <= 2:
+                return mode_value
+            return v
+
+        df['Dietary Habits'] = df['Dietary Habits'].map(map_habits)
+        df['Dietary Habits'] = df['Dietary Habits'].fillna(mode_value)
+        logging.info("Cleaned & mapped Dietary Habits")
+        return df
+
+    def _map_degree_values(self, df, reference_df):
+        df['Degree'] = df['Degree'].fillna('B.Ed')
+        value_count = reference_df["Degree"].value_counts()
+        df['Degree'] = df['Degree'].map(lambda x: x if value_count.get(x, 0) > 4 else 'other')
+        logging.info("Filled/mapped Degree values")
+        return df
+
+    def _map_sleep_duration(self, df, reference_df):
+        sleep_map = {
+            'Less than 5 hours': 'Very Low Sleep',
+            '7-8 hours': 'High Sleep',
+            'More than 8 hours': 'Very High Sleep',
+            '5-6 hours': 'Medium Sleep',
+            '3-4 hours': 'Very Low Sleep',
+            '6-7 hours': 'Medium Sleep',
+            '8 hours': 'High Sleep',
+            '8-9 hours': 'Very High Sleep',
+            '9-11 hours': 'Very High Sleep',
+            '10-11 hours': 'Very High Sleep',
+            '9-5 hours': 'Medium Sleep'
+        }
+        df['Sleep Duration'] = df['Sleep Duration'].map(sleep_map)
+        mode_value = reference_df['Sleep Duration'].mode()[0]
+        df['Sleep Duration'] = df['Sleep Duration'].fillna(mode_value)
+        logging.info("Mapped & filled Sleep Duration")
+        return df
+
+    def _fill_numerical_nulls(self, df, reference_df=None):
+        """Fill remaining numerical nulls using mean (based on train reference)"""
+        if reference_df is None:
+            reference_df = df
+        num_cols = ['Financial Stress', 'Satisfaction', 'Pressure']
+        for col in num_cols:
+            if col in df.columns:
+                df[col] = df[col].fillna(reference_df[col].mean())
+        logging.info("Filled numerical nulls using mean values")
+        return df
+
+    def clean_train(self, train_df: pd.DataFrame):
+        """
+        Train side of steps 2 to 6 of the former initiate_data_transformation,
+        on a copy of the (id-less, deduplicated) train rows
+
+        :return: cleaned train DataFrame and the student CGPA mean
+        """
+        train_df = train_df.copy()
+        train_df = self._combine_job_study_satisfaction(train_df)
+        train_df = self._combine_work_academic_pressure(train_df)
+        train_df, student_mean = self._fill_cgpa_values(train_df)
+        train_df = self._fill_numerical_nulls(train_df)
+        train_df = self._fill_profession(train_df)
+        train_df = self._map_city_values(train_df, train_df)
+        train_df = self._map_dietary_habits(train_df, train_df)
+        train_df = self._map_degree_values(train_df, train_df)
+        train_df = self._map_sleep_duration(train_df, train_df)
+        return self._drop_name(train_df), student_mean
+
+    def clean_test(self, test_df: pd.DataFrame, train_df: pd.DataFrame, student_mean: float) -> pd.DataFrame:
+        """
+        Test side of the same steps, with the cleaned train rows as reference
+        (the statistics are recomputed from them by every step)
+        """
+        test_df = test_df.copy()
+        test_df = self._combine_job_study_satisfaction(test_df)
+        test_df = self._combine_work_academic_pressure(test_df)
+        test_df, _ = self._fill_cgpa_values(test_df, student_mean)
+        test_df = self._fill_numerical_nulls(test_df, reference_df=train_df)
+        test_df = self._fill_profession(test_df, reference_df=train_df)
+        test_df = self._map_city_values(test_df, train_df)
+        test_df = self._map_dietary_habits(test_df, train_df)
+        test_df = self._map_degree_values(test_df, train_df)
+        test_df = self._map_sleep_duration(test_df, train_df)
+        return self._drop_name(test_df)
+
+    @staticmethod
+    def _drop_name(df: pd.DataFrame) -> pd.DataFrame:
+        return df.drop(columns=[column for column in ('Name', 'id') if column in df.columns])
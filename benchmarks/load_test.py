@@ -0,0 +1,206 @@
+"""
+Load test of the service without AWS: boots app.py (or serve.py) against the
+local stand-in of the model bucket with a locally trained model, drives
+/predict with form posts, /api/v1/predict with JSON records and
+/api/v1/predict/batch with JSON batches at each
+concurrency for a fixed duration (closed loop: every client sends its next
+request when the previous one answered), and prints one JSON line per run
+with RPS, p50/p95/p99 latency and error rate.
+
+Payloads are synthetic rows with the columns of config/schema.yaml.
+
+    python -m benchmarks.load_test --endpoints predict json batch --concurrency 1 8 32 --duration 20
+    python -m benchmarks.load_test --server prefork --workers 4 --output results.jsonl
+    python -m benchmarks.load_test --url http://staging:5000 --endpoints predict
+    python -m benchmarks.load_test --concurrency 64 --deadline-ms 200 --env ADMISSION_MAX_IN_FLIGHT=8 ADMISSION_MAX_QUEUE=16
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.server import REPO_ROOT, ensure_local_model, run_server
+from benchmarks.synthetic import make_raw_dataframe, to_form_payload, to_input_records
+from src.constants import SCHEMA_FILE_PATH
+from src.pipeline.prediction_pipeline import INPUT_COLUMNS
+from src.utils.main_utils import read_yaml_file
+
+ENDPOINTS = {'predict': '/predict', 'json': '/api/v1/predict', 'batch': '/api/v1/predict/batch'}
+
+# Form(...) fields of /predict, the page cannot be submitted without them
+FORM_REQUIRED_FIELDS = ('Name', 'Gender', 'Age', 'City', 'Working_Professional_or_Student', 'Sleep_Duration',
+                        'Dietary_Habits', 'Degree', 'Suicidal_Thoughts', 'Work_Study_Hours', 'Financial_Stress',
+                        'Family_History')
+
+
+def make_rows(n_rows: int, seed: int) -> list:
+    """
+    Synthetic input records; fails if config/schema.yaml and the API inputs disagree
+    """
+    schema = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+    schema_columns = [name for column in schema['columns'] for name in column]
+    inputs = [column for column in schema_columns if column not in (schema['drop_columns'], schema['target_column'])]
+    missing = set(inputs) ^ set(INPUT_COLUMNS.values())
+    if missing:
+        raise ValueError(f"config/schema.yaml and the prediction inputs differ on {sorted(missing)}")
+    return to_input_records(make_raw_dataframe(n_rows, seed=seed, with_target=False)[inputs])
+
+
+class RequestFactory:
+    """
+    Cycles through the payloads of one endpoint
+    """
+
+    def __init__(self, endpoint: str, records: list, batch_size: int):
+        self.endpoint = endpoint
+        self.path = ENDPOINTS[endpoint]
+        self.batch_size = batch_size
+        if endpoint == 'predict':
+            forms = [to_form_payload(record) for record in records]
+            self.payloads = [{'data': form} for form in forms
+                             if all(field in form for field in FORM_REQUIRED_FIELDS)]
+        elif endpoint == 'json':
+            self.payloads = [{'json': record} for record in records]
+        else:
+            self.payloads = [{'json': {'records': records[start:start + batch_size]}}
+                             for start in range(0, len(records) - batch_size + 1, batch_size)]
+        self.rows_per_request = batch_size if endpoint == 'batch' else 1
+
+    def payload(self, i: int) -> dict:
+        return self.payloads[i % len(self.payloads)]
+
+    def is_error(self, response: httpx.Response) -> bool:
+        if response.status_code >= 400:
+            return True
+        # the form page reports scoring errors in the rendered result with a 200
+        return self.endpoint == 'predict' and 'Error:' in response.text
+
+
+async def run_load(base_url: str, factory: RequestFactory, concurrency: int, duration: float,
+                   warmup: float, headers: Optional[dict] = None) -> dict:
+    latencies: List[float] = []
+    statuses = Counter()
+    errors = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def client_loop(offset: int, client: httpx.AsyncClient):
+        nonlocal errors
+        i = offset
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                return
+            try:
+                response = await client.post(factory.path, **factory.payload(i))
+                status, failed = response.status_code, factory.is_error(response)
+            except httpx.HTTPError as e:
+                status, failed = type(e).__name__, True
+            received = time.perf_counter()
+            i += concurrency
+            if sent < measure_from or received > stop_at:
+                continue
+            latencies.append(received - sent)
+            statuses[str(status)] += 1
+            errors += failed
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits, headers=headers) as client:
+        await asyncio.gather(*[client_loop(offset, client) for offset in range(concurrency)])
+
+    values = np.array(latencies) * 1000 if latencies else np.array([np.nan])
+    n_requests = len(latencies)
+    return {
+        'endpoint': factory.endpoint,
+        'concurrency': concurrency,
+        'duration_s': duration,
+        'requests': n_requests,
+        'rps': round(n_requests / duration, 1),
+        'rows_per_second': round(n_requests * factory.rows_per_request / duration, 1),
+        'p50_ms': round(float(np.percentile(values, 50)), 2),
+        'p95_ms': round(float(np.percentile(values, 95)), 2),
+        'p99_ms': round(float(np.percentile(values, 99)), 2),
+        'max_ms': round(float(np.max(values)), 2),
+        'error_rate': round(errors / n_requests, 4) if n_requests else None,
+        'status_codes': dict(statuses),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextmanager
+def target(args):
+    """
+    Base url of the service under test, started locally unless --url is given
+    """
+    if args.url:
+        yield args.url.rstrip('/')
+        return
+    ensure_local_model(args.storage_dir)
+    command = None
+    if args.server == 'prefork':
+        command = [sys.executable, 'serve.py', '--workers', str(args.workers), '--host', '127.0.0.1',
+                   '--port', str(args.port)]
+    elif args.workers > 1:
+        command = [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(args.port),
+                   '--workers', str(args.workers), '--log-level', 'warning']
+    env = dict(item.split('=', 1) for item in args.env)
+    with run_server(args.storage_dir, port=args.port, env=env, command=command,
+                    timeout=60 + 15 * args.workers) as (base_url, _):
+        yield base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoints', nargs='+', default=['predict', 'batch'], choices=list(ENDPOINTS))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=20.0, help='measured seconds per run')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds of load not measured')
+    parser.add_argument('--batch-size', type=int, default=100, help='rows per /api/v1/predict/batch request')
+    parser.add_argument('--rows', type=int, default=5000, help='distinct synthetic rows to cycle through')
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--server', default='uvicorn', choices=['uvicorn', 'prefork'])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--env', nargs='*', default=[], metavar='NAME=VALUE', help='extra server environment')
+    parser.add_argument('--deadline-ms', type=float, default=None,
+                        help='time budget sent in X-Request-Deadline-Ms with every request')
+    parser.add_argument('--url', default=None, help='test a running service instead of starting one')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--storage-dir', default='local_storage')
+    parser.add_argument('--output', default=None, help='also append the JSON lines to this file')
+    args = parser.parse_args()
+
+    records = make_rows(args.rows, args.seed)
+    headers = {'X-Request-Deadline-Ms': str(args.deadline_ms)} if args.deadline_ms is not None else None
+    meta = {'revision': git_revision(), 'server': 'external' if args.url else args.server,
+            'workers': args.workers, 'env': args.env, 'deadline_ms': args.deadline_ms,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    with target(args) as base_url, (open(args.output, 'a') if args.output else nullcontext()) as output:
+        for endpoint in args.endpoints:
+            factory = RequestFactory(endpoint, records, args.batch_size)
+            for concurrency in args.concurrency:
+                result = {**meta, **asyncio.run(run_load(base_url, factory, concurrency, args.duration,
+                                                         args.warmup, headers))}
+                line = json.dumps(result)
+                print(line, flush=True)
+                if output is not None:
+                    output.write(line + '\n')
+
+
+if __name__ == '__main__':
+    main()
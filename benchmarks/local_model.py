@@ -0,0 +1,103 @@
+"""
+Trains a model on synthetic data with the real transformation / training
+components and publishes it to a LocalStorageService directory.
+
+    python -m benchmarks.local_model --rows 20000 --storage-dir local_storage
+"""
+import argparse
+import os
+
+from benchmarks.synthetic import make_raw_dataframe
+from src.cloud_storage.local_storage import LocalStorageService
+from src.components.data_transformation import DataTransformation
+from src.components.model_trainer import ModelTrainer
+from src.constants import FALLBACK_MODEL_FILE_NAME, MODEL_BUCKET_NAME, MODEL_FILE_NAME
+from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from src.entity.config_entity import DataTransformationConfig, ModelTrainerConfig, DepressionPredictorConfig
+from src.pipeline.prediction_pipeline import MentalHealthPredictor
+from src.utils.main_utils import load_object
+
+
+def train_local_model(work_dir: str, n_rows: int = 20000, seed: int = 42) -> str:
+    """
+    Runs data transformation and model training on synthetic data
+
+    :return: path of the trained model.pkl
+    """
+    ingested_dir = os.path.join(work_dir, 'ingested')
+    os.makedirs(ingested_dir, exist_ok=True)
+    train_path = os.path.join(ingested_dir, 'train.csv')
+    test_path = os.path.join(ingested_dir, 'test.csv')
+
+    df = make_raw_dataframe(n_rows, seed=seed)
+    split = int(n_rows * 0.8)
+    df.iloc[:split].to_csv(train_path, index=False)
+    df.iloc[split:].to_csv(test_path, index=False)
+
+    transformed_dir = os.path.join(work_dir, 'data_transformation')
+    data_transformation = DataTransformation(
+        data_ingestion_artifact=DataIngestionArtifact(trained_file_path=train_path, test_file_path=test_path),
+        data_transformation_config=DataTransformationConfig(
+            data_transformation_dir=transformed_dir,
+            transformed_train_file_path=os.path.join(transformed_dir, 'transformed', 'train.npz'),
+            transformed_test_file_path=os.path.join(transformed_dir, 'transformed', 'test.npz'),
+            transformed_train_target_file_path=os.path.join(transformed_dir, 'transformed', 'train_target.npy'),
+            transformed_test_target_file_path=os.path.join(transformed_dir, 'transformed', 'test_target.npy'),
+            transformed_object_file_path=os.path.join(transformed_dir, 'transformed_object', 'preprocessing.pkl'),
+            feature_engineer_file_path=os.path.join(transformed_dir, 'transformed_object', 'feature_engineer.pkl'),
+        ),
+        data_validation_artifact=DataValidationArtifact(validation_status=True, message='',
+                                                        validation_report_file_path=''),
+    )
+    data_transformation_artifact = data_transformation.initiate_data_transformation()
+
+    model_trainer_dir = os.path.join(work_dir, 'model_trainer')
+    model_trainer = ModelTrainer(
+        data_transformation_artifact=data_transformation_artifact,
+        model_trainer_config=ModelTrainerConfig(
+            model_trainer_dir=model_trainer_dir,
+            trained_model_file_path=os.path.join(model_trainer_dir, 'trained_model', MODEL_FILE_NAME),
+            fallback_model_file_path=os.path.join(model_trainer_dir, 'trained_model', FALLBACK_MODEL_FILE_NAME),
+        ),
+    )
+    return model_trainer.initiate_model_trainer().trained_model_file_path
+
+
+def publish_local_model(model_file_path: str, storage_dir: str) -> LocalStorageService:
+    """
+    Copies a trained model (and the fallback model saved next to it) to the
+    local stand-in of the model bucket
+    """
+    storage = LocalStorageService(root_dir=storage_dir)
+    fallback_path = os.path.join(os.path.dirname(model_file_path), FALLBACK_MODEL_FILE_NAME)
+    if os.path.exists(fallback_path):
+        storage.upload_file(fallback_path, to_filename=FALLBACK_MODEL_FILE_NAME, bucket_name=MODEL_BUCKET_NAME,
+                            remove=False)
+    storage.upload_file(model_file_path, to_filename=MODEL_FILE_NAME, bucket_name=MODEL_BUCKET_NAME, remove=False)
+    return storage
+
+
+def load_local_predictor(model_file_path: str) -> MentalHealthPredictor:
+    """
+    Returns a MentalHealthPredictor whose resident model is the given local file
+    (no s3 access, no refresher, no disk cache)
+    """
+    predictor = MentalHealthPredictor(DepressionPredictorConfig(model_refresh_interval=0, model_cache_dir=''))
+    predictor.model_holder.swap(load_object(model_file_path), version='local')
+    return predictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--work-dir', default=os.path.join('artifact', 'local_model'))
+    parser.add_argument('--storage-dir', default='local_storage')
+    args = parser.parse_args()
+
+    model_path = train_local_model(args.work_dir, n_rows=args.rows)
+    publish_local_model(model_path, args.storage_dir)
+    print(f"Published {model_path} to {args.storage_dir}/{MODEL_BUCKET_NAME}/{MODEL_FILE_NAME}")
+
+
+if __name__ == '__main__':
+    main()
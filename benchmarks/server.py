@@ -0,0 +1,73 @@
+"""
+Boots app.py with uvicorn in a subprocess against a local stand-in of the
+model bucket, so the service can be benchmarked without AWS.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import httpx
+
+from benchmarks.local_model import train_local_model, publish_local_model
+from src.constants import MODEL_BUCKET_NAME, MODEL_FILE_NAME
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def ensure_local_model(storage_dir: str, n_rows: int = 20000) -> None:
+    """
+    Train and publish a synthetic model to storage_dir unless one is already there
+    """
+    if os.path.exists(os.path.join(storage_dir, MODEL_BUCKET_NAME, MODEL_FILE_NAME)):
+        return
+    with tempfile.TemporaryDirectory() as work_dir:
+        publish_local_model(train_local_model(work_dir, n_rows=n_rows), storage_dir)
+
+
+def server_env(storage_dir: str, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        'MODEL_STORAGE_BACKEND': 'local',
+        'LOCAL_STORAGE_DIR': os.path.abspath(storage_dir),
+        'MODEL_CACHE_DIR': '',
+        'MODEL_REFRESH_INTERVAL_SECONDS': '0',
+    })
+    env.update(extra or {})
+    return env
+
+
+@contextmanager
+def run_server(storage_dir: str, port: int = 8765, env: Optional[Dict[str, str]] = None,
+               command: Optional[list] = None, ready_path: str = '/readyz', timeout: float = 120.0):
+    """
+    Start the service and yield its base url once ready_path answers 200
+    """
+    command = command or [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1',
+                          '--port', str(port), '--log-level', 'warning']
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=server_env(storage_dir, env),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                if httpx.get(base_url + ready_path, timeout=1.0).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.time() > deadline:
+                raise TimeoutError('Server did not become ready')
+            time.sleep(0.2)
+        yield base_url, process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
@@ -0,0 +1,118 @@
+"""
+Synthetic rows in the format of the raw dataset (config/schema.yaml), used by
+the benchmarks and the load test so they can run without MongoDB or AWS.
+"""
+import numpy as np
+import pandas as pd
+
+from src.pipeline.prediction_pipeline import INPUT_COLUMNS
+
+CITIES = ['Kalyan', 'Patna', 'Vasai-Virar', 'Kolkata', 'Ahmedabad', 'Meerut', 'Ludhiana', 'Pune', 'Rajkot',
+          'Visakhapatnam', 'Srinagar', 'Mumbai', 'Indore', 'Agra', 'Surat', 'Varanasi', 'Vadodara', 'Hyderabad',
+          'Kanpur', 'Jaipur', 'Thane', 'Lucknow', 'Nagpur', 'Bangalore', 'Chennai', 'Ghaziabad', 'Delhi',
+          'Bhopal', 'Faridabad', 'Nashik']
+RARE_CITIES = ['Morena', 'Ayush', 'Nalini', 'Khushi', 'Less Delhi', 'ME', 'City']
+PROFESSIONS = ['Teacher', 'Content Writer', 'Architect', 'Consultant', 'HR Manager', 'Pharmacist', 'Doctor',
+               'Business Analyst', 'Entrepreneur', 'Chemist', 'Chef', 'Educational Consultant', 'Data Scientist',
+               'Researcher', 'Lawyer', 'Customer Support', 'Marketing Manager', 'Pilot', 'Travel Consultant',
+               'Plumber', 'Sales Executive', 'Manager', 'Judge', 'Electrician', 'Financial Analyst',
+               'Software Engineer', 'Civil Engineer', 'UX/UI Designer', 'Digital Marketer', 'Accountant',
+               'Mechanical Engineer', 'Graphic Designer', 'Research Analyst', 'Investment Banker']
+DEGREES = ['Class 12', 'B.Ed', 'B.Arch', 'B.Com', 'B.Pharm', 'BCA', 'M.Ed', 'MCA', 'BBA', 'BSc', 'MSc', 'LLM',
+           'M.Pharm', 'M.Tech', 'B.Tech', 'LLB', 'BHM', 'MBA', 'BA', 'ME', 'MD', 'MHM', 'BE', 'PhD', 'M.Com',
+           'MBBS', 'MA']
+RARE_DEGREES = ['B.Sc', 'Degree', 'Unite', 'M', 'Nalini']
+SLEEP_DURATIONS = ['Less than 5 hours', '7-8 hours', 'More than 8 hours', '5-6 hours', '3-4 hours', '6-7 hours',
+                   '8 hours', '8-9 hours', '9-11 hours', '10-11 hours']
+DIETARY_HABITS = ['Moderate', 'Unhealthy', 'Healthy', 'More Healthy', 'No Healthy', 'Less Healthy', 'Yes',
+                  'Pratham', 'BSc']
+DIETARY_WEIGHTS = [0.35, 0.32, 0.30, 0.01, 0.01, 0.0098, 0.0001, 0.0001, 0.0000]
+
+
+def _sprinkle(rng, values: np.ndarray, rare: list, rate: float) -> np.ndarray:
+    mask = rng.random(len(values)) < rate
+    values[mask] = rng.choice(rare, mask.sum())
+    return values
+
+
+def make_raw_dataframe(n_rows: int, seed: int = 42, with_target: bool = True) -> pd.DataFrame:
+    """
+    Returns n_rows synthetic rows with the columns and value domains of the raw dataset
+    """
+    rng = np.random.default_rng(seed)
+    is_student = rng.random(n_rows) < 0.2
+    dietary_weights = np.array(DIETARY_WEIGHTS) / np.sum(DIETARY_WEIGHTS)
+
+    def maybe_missing(values: np.ndarray, rate: float) -> np.ndarray:
+        values = values.astype(object)
+        values[rng.random(n_rows) < rate] = None
+        return values
+
+    pressure = rng.integers(1, 6, n_rows).astype(float)
+    satisfaction = rng.integers(1, 6, n_rows).astype(float)
+    financial_stress = rng.integers(1, 6, n_rows).astype(float)
+    hours = rng.integers(0, 13, n_rows).astype(float)
+    suicidal = rng.random(n_rows) < 0.45
+    family_history = rng.random(n_rows) < 0.5
+    age = np.where(is_student, rng.integers(18, 35, n_rows), rng.integers(18, 61, n_rows)).astype(float)
+
+    profession = rng.choice(PROFESSIONS, n_rows).astype(object)
+    profession[is_student] = None
+    profession[~is_student & (rng.random(n_rows) < 0.25)] = None
+
+    df = pd.DataFrame({
+        'id': np.arange(n_rows),
+        'Name': rng.choice(['Aarav', 'Vivaan', 'Aditya', 'Ishaan', 'Anaya', 'Diya', 'Saanvi', 'Kiara'], n_rows),
+        'Gender': rng.choice(['Male', 'Female'], n_rows),
+        'Age': age,
+        'City': _sprinkle(rng, rng.choice(CITIES, n_rows).astype(object), RARE_CITIES, 0.001),
+        'Working Professional or Student': np.where(is_student, 'Student', 'Working Professional'),
+        'Profession': profession,
+        'Academic Pressure': np.where(is_student, pressure, np.nan),
+        'Work Pressure': np.where(is_student, np.nan, pressure),
+        'CGPA': np.where(is_student & (rng.random(n_rows) > 0.01), np.round(rng.uniform(5, 10, n_rows), 2), np.nan),
+        'Study Satisfaction': np.where(is_student, satisfaction, np.nan),
+        'Job Satisfaction': np.where(is_student, np.nan, satisfaction),
+        'Sleep Duration': rng.choice(SLEEP_DURATIONS, n_rows),
+        'Dietary Habits': maybe_missing(rng.choice(DIETARY_HABITS, n_rows, p=dietary_weights), 0.0005),
+        'Degree': maybe_missing(_sprinkle(rng, rng.choice(DEGREES, n_rows).astype(object), RARE_DEGREES, 0.001),
+                                0.0005),
+        'Have you ever had suicidal thoughts ?': np.where(suicidal, 'Yes', 'No'),
+        'Work/Study Hours': hours,
+        'Financial Stress': np.where(rng.random(n_rows) < 0.001, np.nan, financial_stress),
+        'Family History of Mental Illness': np.where(family_history, 'Yes', 'No'),
+    })
+
+    if with_target:
+        score = (0.8 * pressure + 0.6 * financial_stress - 0.5 * satisfaction + 2.0 * suicidal
+                 - 0.08 * (age - 18) + 0.15 * hours + 0.3 * family_history + rng.normal(0, 1, n_rows))
+        df['Depression'] = (score > np.quantile(score, 0.8)).astype(int)
+    return df
+
+
+def to_input_records(df: pd.DataFrame) -> list:
+    """
+    Converts raw dataset rows to records keyed by MentalHealthData fields (the API format)
+    """
+    renamed = df[list(INPUT_COLUMNS.values())].rename(columns={v: k for k, v in INPUT_COLUMNS.items()})
+    renamed = renamed.astype(object).where(renamed.notna(), None)
+    return renamed.to_dict(orient='records')
+
+
+# fields declared as int in the /predict form
+_FORM_INT_FIELDS = ('Age', 'Academic_Pressure', 'Work_Pressure', 'Study_Satisfaction', 'Job_Satisfaction',
+                    'Financial_Stress')
+
+
+def to_form_payload(record: dict) -> dict:
+    """
+    Converts an input record to the form fields posted by templates/index.html
+    """
+    payload = {}
+    for field, value in record.items():
+        if value is None:
+            continue
+        payload[field] = int(round(value)) if field in _FORM_INT_FIELDS else value
+    # the form always sends Financial Stress
+    payload.setdefault('Financial_Stress', 3)
+    return payload
@@ -0,0 +1,151 @@
+"""
+Pre-fork server: the master loads the model once, freezes it and forks the
+workers, which serve app.py on a shared listening socket. The workers share
+the model (and every module imported before the fork) copy-on-write instead
+of unpickling one copy each, and only the master reads it from storage.
+
+    python serve.py --workers 4 --port 5000
+
+Use this instead of `uvicorn app:app --workers N`, which spawns fresh
+interpreters that each import the app and load the model.
+"""
+import argparse
+import atexit
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+from src.constants import APP_HOST, APP_PORT, SERVE_WORKERS
+from src.logger import logging
+
+# a worker exiting sooner than this after being forked is not restarted
+MIN_WORKER_LIFETIME_SECONDS = 5.0
+
+
+class PreforkServer:
+    """
+    Master process: preloads the model, forks `workers` uvicorn workers
+    sharing one socket, restarts the ones that die and stops them all on
+    SIGINT / SIGTERM.
+    """
+
+    def __init__(self, workers: int, host: str, port: int, backlog: int = 2048):
+        """
+        :param workers: Number of worker processes
+        :param host: Address to listen on
+        :param port: Port to listen on
+        :param backlog: Listen backlog of the shared socket
+        """
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.socket = None
+        self._children: Dict[int, float] = {}
+        self._stopping = False
+
+    def preload(self):
+        """
+        Import the app and make its model resident and warm in the master
+        """
+        import app
+
+        if app.executor.backend == 'process':
+            raise ValueError("INFERENCE_BACKEND=process cannot be forked, use 'thread' or 'inline'")
+        app.predictor.load_model()
+        app.predictor.warm_up()
+        return app
+
+    def bind(self) -> None:
+        self.socket = socket.socket(socket.AF_INET6 if ':' in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(self.backlog)
+        self.socket.set_inheritable(True)
+
+    def spawn(self, app_module) -> None:
+        pid = os.fork()
+        if pid:
+            self._children[pid] = time.monotonic()
+            return
+
+        # worker
+        exit_code = 0
+        try:
+            gc.enable()
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            import uvicorn
+
+            config = uvicorn.Config(app_module.app, log_level='info', lifespan='on')
+            uvicorn.Server(config).run(sockets=[self.socket])
+        except BaseException as e:
+            logging.error(f"Worker {os.getpid()} failed: {e}")
+            exit_code = 1
+        finally:
+            # never return into the master's code; flush the logs first
+            atexit._run_exitfuncs()
+            os._exit(exit_code)
+
+    def _stop(self, signum, frame) -> None:
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        # objects allocated until the fork are never collected in the master, so
+        # no collection rewrites their GC headers and unshares their pages
+        gc.disable()
+        started = time.perf_counter()
+        app_module = self.preload()
+        gc.collect()
+        gc.freeze()
+        logging.info(f"Model preloaded in the master in {time.perf_counter() - started:.2f}s, "
+                     f"{gc.get_freeze_count()} objects frozen")
+
+        self.bind()
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        for _ in range(self.workers):
+            self.spawn(app_module)
+        logging.info(f"Serving on {self.host}:{self.port} with {self.workers} workers "
+                     f"{sorted(self._children)}")
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            forked_at = self._children.pop(pid, None)
+            if forked_at is None or self._stopping:
+                continue
+            logging.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+            if time.monotonic() - forked_at < MIN_WORKER_LIFETIME_SECONDS:
+                logging.error(f"Worker {pid} died right after starting, not restarting it")
+                continue
+            self.spawn(app_module)
+        logging.info("All workers stopped")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=SERVE_WORKERS)
+    parser.add_argument('--host', default=APP_HOST)
+    parser.add_argument('--port', type=int, default=APP_PORT)
+    args = parser.parse_args(argv)
+
+    PreforkServer(workers=args.workers, host=args.host, port=args.port).run()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
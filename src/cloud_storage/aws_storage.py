@@ -44,6 +44,43 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys)
 
+    def get_object_etag(self, bucket_name: str, s3_key: str) -> Union[str, None]:
+        """
+        Returns the ETag of an S3 object using a HEAD request (no body is transferred).
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+
+        Returns:
+            Union[str, None]: The ETag without quotes, or None if the object does not exist.
+        """
+        try:
+            response = self.s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+            return response["ETag"].strip('"')
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise MyException(e, sys) from e
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_object_bytes(self, bucket_name: str, s3_key: str) -> bytes:
+        """
+        Downloads the raw content of an S3 object.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+
+        Returns:
+            bytes: The object content.
+        """
+        try:
+            return self.s3_client.get_object(Bucket=bucket_name, Key=s3_key)["Body"].read()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     @staticmethod
     def read_object(object_name: str, decode: bool = True, make_readable: bool = False) -> Union[StringIO, str]:
         """
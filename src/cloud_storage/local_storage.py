@@ -0,0 +1,83 @@
+import hashlib
+import os
+import pickle
+import shutil
+import sys
+from typing import Dict, Tuple, Union
+
+from src.exception import MyException
+from src.logger import logging
+
+
+class LocalStorageService:
+    """
+    Local filesystem stand-in for SimpleStorageService.
+    Buckets are directories under root_dir and keys are relative file paths, so
+    the model code paths can be run and tested without AWS.
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        :param root_dir: Directory that holds one sub directory per bucket
+        """
+        self.root_dir = root_dir
+        # (path) -> (mtime_ns, size, md5) so repeated HEADs do not re-hash the file
+        self._etags: Dict[str, Tuple[int, int, str]] = {}
+
+    def _object_path(self, bucket_name: str, s3_key: str) -> str:
+        return os.path.join(self.root_dir, bucket_name, s3_key)
+
+    def s3_key_path_available(self, bucket_name, s3_key) -> bool:
+        return os.path.exists(self._object_path(bucket_name, s3_key))
+
+    def get_object_etag(self, bucket_name: str, s3_key: str) -> Union[str, None]:
+        """
+        Returns the md5 of the file, which is what s3 uses as ETag for single part uploads
+        """
+        try:
+            path = self._object_path(bucket_name, s3_key)
+            if not os.path.exists(path):
+                return None
+            stat = os.stat(path)
+            cached = self._etags.get(path)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                return cached[2]
+            md5 = hashlib.md5()
+            with open(path, 'rb') as file_obj:
+                for block in iter(lambda: file_obj.read(1024 * 1024), b''):
+                    md5.update(block)
+            etag = md5.hexdigest()
+            self._etags[path] = (stat.st_mtime_ns, stat.st_size, etag)
+            return etag
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_object_bytes(self, bucket_name: str, s3_key: str) -> bytes:
+        try:
+            with open(self._object_path(bucket_name, s3_key), 'rb') as file_obj:
+                return file_obj.read()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
+        try:
+            model_file = model_dir + "/" + model_name if model_dir else model_name
+            model = pickle.loads(self.get_object_bytes(bucket_name, model_file))
+            logging.info("Production model loaded from local storage.")
+            return model
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True):
+        try:
+            target = self._object_path(bucket_name, to_filename)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # copy next to the target and rename so readers never see a partial file
+            tmp_target = target + '.uploading'
+            shutil.copyfile(from_filename, tmp_target)
+            os.replace(tmp_target, target)
+            logging.info(f"Copied {from_filename} to {target}")
+            if remove:
+                os.remove(from_filename)
+        except Exception as e:
+            raise MyException(e, sys) from e
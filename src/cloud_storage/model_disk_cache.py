@@ -0,0 +1,136 @@
+import hashlib
+import os
+import re
+import sys
+import tempfile
+from typing import Optional
+
+from src.exception import MyException
+from src.logger import logging
+from src.metrics import REGISTRY
+
+MODEL_DISK_CACHE_HITS = REGISTRY.counter('model_disk_cache_hits_total', 'Model loads served from the local disk cache')
+MODEL_DISK_CACHE_MISSES = REGISTRY.counter('model_disk_cache_misses_total',
+                                           'Model loads that had to download the model from storage')
+MODEL_DISK_CACHE_EVICTIONS = REGISTRY.counter('model_disk_cache_evictions_total',
+                                              'Cached model files removed by the size limit or a failed validation')
+
+_MD5_ETAG = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ModelDiskCache:
+    """
+    Local disk cache of serialized models keyed by bucket / key / ETag.
+    Every entry is written atomically (temp file + rename) along with a sha256
+    checksum, and validated again when it is read back.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        :param cache_dir: Directory where the cached model files are kept
+        :param max_bytes: Total size of cached files above which the oldest entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, bucket_name: str, s3_key: str, etag: str) -> str:
+        key_hash = hashlib.sha256(f"{bucket_name}/{s3_key}".encode()).hexdigest()[:16]
+        safe_etag = re.sub(r'[^0-9A-Za-z_-]', '_', etag)
+        return os.path.join(self.cache_dir, f"{key_hash}-{safe_etag}.bin")
+
+    @staticmethod
+    def _matches_etag(data: bytes, etag: str) -> bool:
+        # ETag is the md5 of the content for single part uploads; multipart
+        # ETags ("<md5>-<parts>") can't be checked this way
+        if _MD5_ETAG.match(etag):
+            return hashlib.md5(data).hexdigest() == etag
+        return True
+
+    def _remove(self, path: str) -> None:
+        for file_path in (path, path + '.sha256'):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+
+    def _atomic_write(self, path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as file_obj:
+                file_obj.write(data)
+                file_obj.flush()
+                os.fsync(file_obj.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, bucket_name: str, s3_key: str, etag: str) -> Optional[bytes]:
+        """
+        Returns the cached bytes for this exact version, or None on a miss or
+        when the cached file fails validation
+        """
+        path = self._entry_path(bucket_name, s3_key, etag)
+        try:
+            with open(path, 'rb') as file_obj:
+                data = file_obj.read()
+            with open(path + '.sha256', 'r') as file_obj:
+                checksum = file_obj.read().strip()
+        except FileNotFoundError:
+            MODEL_DISK_CACHE_MISSES.inc()
+            return None
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+        if hashlib.sha256(data).hexdigest() != checksum or not self._matches_etag(data, etag):
+            logging.warning(f"Cached model {path} failed validation, discarding it")
+            self._remove(path)
+            MODEL_DISK_CACHE_EVICTIONS.inc()
+            MODEL_DISK_CACHE_MISSES.inc()
+            return None
+
+        # refresh mtime so eviction drops the least recently used versions first
+        os.utime(path)
+        MODEL_DISK_CACHE_HITS.inc()
+        return data
+
+    def put(self, bucket_name: str, s3_key: str, etag: str, data: bytes) -> None:
+        """
+        Store a downloaded model and evict old entries above max_bytes. Bytes
+        that don't match the ETag (SSE-KMS / SSE-C objects, whose ETag is not
+        an md5, or a push landing between the HEAD and the GET) are not cached
+        """
+        try:
+            if not self._matches_etag(data, etag):
+                logging.warning(f"Downloaded s3://{bucket_name}/{s3_key} does not match its ETag {etag}, "
+                                f"not caching it")
+                return
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._entry_path(bucket_name, s3_key, etag)
+            self._atomic_write(path + '.sha256', hashlib.sha256(data).hexdigest().encode())
+            self._atomic_write(path, data)
+            self._evict(keep=path)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _evict(self, keep: str) -> None:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.bin'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+            MODEL_DISK_CACHE_EVICTIONS.inc()
+            logging.info(f"Evicted cached model {path}")
@@ -0,0 +1,14 @@
+from src.constants import MODEL_STORAGE_BACKEND, LOCAL_STORAGE_DIR
+
+
+def get_storage_service():
+    """
+    Returns the storage service selected by MODEL_STORAGE_BACKEND:
+    's3' (default) talks to AWS, 'local' serves buckets from LOCAL_STORAGE_DIR
+    """
+    if MODEL_STORAGE_BACKEND == 'local':
+        from src.cloud_storage.local_storage import LocalStorageService
+        return LocalStorageService(root_dir=LOCAL_STORAGE_DIR)
+
+    from src.cloud_storage.aws_storage import SimpleStorageService
+    return SimpleStorageService()
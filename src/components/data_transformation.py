@@ -1,6 +1,8 @@
 import sys
+from typing import Iterator, Optional, Tuple
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
@@ -9,7 +11,9 @@ from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
 from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN, CURRENT_YEAR
 from src.entity.config_entity import DataTransformationConfig
 from src.entity.artifact_entity import DataTransformationArtifact, DataIngestionArtifact, DataValidationArtifact
-from src.utils.main_utils import read_yaml_file, save_object, save_numpy_array
+from src.entity.feature_engineer import FeatureEngineer
+from src.utils.main_utils import (read_csv, read_csv_chunks, read_yaml_file, save_object, save_numpy_array,
+                                  save_numpy_array_chunks, save_sparse_matrix, save_sparse_matrix_chunks)
 from src.exception import MyException
 from src.logger import logging
 
@@ -25,10 +29,9 @@ class DataTransformation:
         except Exception as e:
             raise MyException(e, sys)
     
-    @staticmethod
-    def read_data(file_path) -> pd.DataFrame:
+    def read_data(self, file_path) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return read_csv(file_path, self._schema_config)
         except Exception as e:
             raise MyException(e,sys)
     
@@ -58,7 +61,7 @@ class DataTransformation:
             preprocessor = ColumnTransformer(transformers=[
                 ('num', numeric_transformer, num_features),
                 ('cat', categorical_transformer, cat_features)
-            ], remainder='drop', sparse_threshold=0)
+            ], remainder='drop', sparse_threshold=1.0 if self.data_transformation_config.sparse_output else 0)
 
             logging.info(f'Preprocessor created. Numeric cols: {num_features} | Categorical cols: {cat_features}')
             return preprocessor
@@ -74,136 +77,33 @@ class DataTransformation:
             df = df.drop(drop_col, axis = 1)
         return df
 
-    def _drop_duplicates(self, df):
+    @staticmethod
+    def _drop_duplicates(df):
         """Drops duplicate rows from the dataset"""
-        total_dups = df.duplicated().sum()
+        # rows are hashed once, the same mask counts and drops them
+        duplicated = df.duplicated().to_numpy()
+        total_dups = int(duplicated.sum())
         if total_dups > 0:
             logging.info(f"Dropping {total_dups} duplicate rows from dataset.")
-            df = df.drop_duplicates()
+            df = df[~duplicated]
         else:
             logging.info("No duplicate rows found in dataset.")
         return df
     
-    def _combine_job_study_satisfaction(self, df):
+    def _save_sparse(self, X_train_arr, y_train, X_test_arr, y_test):
         """
-        Combine job satisfaction and study satisfaction into one 'Satisfaction' column.
-        Drops the original Job and Study Satisfaction columns.
+        Saves the features as CSR matrices and the targets as their own arrays,
+        returns the target file paths (None for a test set without target)
         """
-        logging.info('Combining Job and Study Satisfaction columns')
-        
-        if 'Job Satisfaction' in df.columns and 'Study Satisfaction' in df.columns:
-            df['Satisfaction'] = df['Job Satisfaction'].combine_first(df['Study Satisfaction'])
-            df = df.drop(['Job Satisfaction', 'Study Satisfaction'], axis=1)
-            logging.info('Successfully combined Job and Study Satisfaction into Satisfaction column')
-        else:
-            logging.warning('Job/Study Satisfaction columns not found in dataset; skipping merge')
-        
-        return df
-    
-    def _combine_work_academic_pressure(self, df):
-        """Combine Work Pressure and Academic Pressure into Pressure"""
-        if 'Work Pressure' in df.columns and 'Academic Pressure' in df.columns:
-            df['Pressure'] = df['Work Pressure'].combine_first(df['Academic Pressure'])
-            df.drop(['Work Pressure', 'Academic Pressure'], axis=1, inplace=True)
-            logging.info("Combined Work & Academic Pressure -> Pressure")
-        return df
-    
-    def _fill_cgpa_values(self, df, student_mean=None):
-        """
-        Fill CGPA:
-        - Working Professionals -> 0
-        - Students -> mean of Student CGPA (calculated on train)
-        """
-        if student_mean is None:
-            student_mean = df.loc[df['Working Professional or Student'] == 'Student', 'CGPA'].mean()
-
-        df.loc[df['Working Professional or Student'] == 'Working Professional', 'CGPA'] = (
-            df.loc[df['Working Professional or Student'] == 'Working Professional', 'CGPA'].fillna(0)
-        )
-
-        df.loc[df['Working Professional or Student'] == 'Student', 'CGPA'] = (
-            df.loc[df['Working Professional or Student'] == 'Student', 'CGPA'].fillna(student_mean)
-        )
-        logging.info("Filled CGPA for Professionals (0) and Students (mean)")
-        return df, student_mean
-
-    def _fill_profession(self, df, reference_df=None):
-        """Fill profession based on rules"""
-        df['Profession'] = df.apply(
-            lambda row: 'Student' if row['Working Professional or Student'] == 'Student' and pd.isnull(row['Profession'])
-            else row['Profession'], axis=1
-        )
-        if reference_df is None:
-            reference_df = df
-        df['Profession'] = df['Profession'].fillna('Teacher')
-        logging.info("Filled Profession (Student/Teacher/mode)")
-        return df
-    
-    def _map_city_values(self, df, reference_df):
-        value_count = reference_df["City"].value_counts()
-        df['City'] = df['City'].map(lambda x: x if value_count.get(x, 0) >= 10 else 'other')
-        logging.info("Mapped rare City values -> 'other'")
-        return df
-    
-    def _map_dietary_habits(self, df, reference_df):
-        specific_mappings = {
-            'More Healthy': 'Healthy',
-            'No Healthy': 'Unhealthy',
-            'Less Healthy': 'Unhealthy',
-            'Less than Healthy': 'Unhealthy'
-        }
-        value_count = reference_df['Dietary Habits'].value_counts()
-        mode_value = reference_df['Dietary Habits'].mode()[0]
-
-        def map_habits(v):
-            if v in specific_mappings:
-                return specific_mappings[v]
-            elif value_count.get(v, 0) <= 2:
-                return mode_value
-            return v
-
-        df['Dietary Habits'] = df['Dietary Habits'].map(map_habits)
-        df['Dietary Habits'] = df['Dietary Habits'].fillna(mode_value)
-        logging.info("Cleaned & mapped Dietary Habits")
-        return df
-
-    def _map_degree_values(self, df, reference_df):
-        df['Degree'] = df['Degree'].fillna('B.Ed')
-        value_count = reference_df["Degree"].value_counts()
-        df['Degree'] = df['Degree'].map(lambda x: x if value_count.get(x, 0) > 4 else 'other')
-        logging.info("Filled/mapped Degree values")
-        return df
-
-    def _map_sleep_duration(self, df, reference_df):
-        sleep_map = {
-            'Less than 5 hours': 'Very Low Sleep',
-            '7-8 hours': 'High Sleep',
-            'More than 8 hours': 'Very High Sleep',
-            '5-6 hours': 'Medium Sleep',
-            '3-4 hours': 'Very Low Sleep',
-            '6-7 hours': 'Medium Sleep',
-            '8 hours': 'High Sleep',
-            '8-9 hours': 'Very High Sleep',
-            '9-11 hours': 'Very High Sleep',
-            '10-11 hours': 'Very High Sleep',
-            '9-5 hours': 'Medium Sleep'
-        }
-        df['Sleep Duration'] = df['Sleep Duration'].map(sleep_map)
-        mode_value = reference_df['Sleep Duration'].mode()[0]
-        df['Sleep Duration'] = df['Sleep Duration'].fillna(mode_value)
-        logging.info("Mapped & filled Sleep Duration")
-        return df
-
-    def _fill_numerical_nulls(self, df, reference_df=None):
-        """Fill remaining numerical nulls using mean (based on train reference)"""
-        if reference_df is None:
-            reference_df = df
-        num_cols = ['Financial Stress', 'Satisfaction', 'Pressure']
-        for col in num_cols:
-            if col in df.columns:
-                df[col] = df[col].fillna(reference_df[col].mean())
-        logging.info("Filled numerical nulls using mean values")
-        return df
+        config = self.data_transformation_config
+        # a ColumnTransformer without any one-hot column stays dense
+        save_sparse_matrix(config.transformed_train_file_path, sparse.csr_matrix(X_train_arr))
+        save_sparse_matrix(config.transformed_test_file_path, sparse.csr_matrix(X_test_arr))
+        save_numpy_array(config.transformed_train_target_file_path, array=np.asarray(y_train))
+        if y_test is None:
+            return config.transformed_train_target_file_path, None
+        save_numpy_array(config.transformed_test_target_file_path, array=np.asarray(y_test))
+        return config.transformed_train_target_file_path, config.transformed_test_target_file_path
 
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         """
@@ -213,6 +113,8 @@ class DataTransformation:
             logging.info('Data Transformation Started !!')
             if not self.data_validation_artifact.validation_status:
                 raise Exception(self.data_validation_artifact.message)
+            if self.data_transformation_config.chunk_size:
+                return self._artifact(*self._transform_in_chunks())
             
             # Load train and test data
             train_df = self.read_data(file_path=self.data_ingestion_artifact.trained_file_path)
@@ -229,46 +131,6 @@ class DataTransformation:
             train_df = self._drop_duplicates(train_df)
             test_df = self._drop_duplicates(test_df)
 
-            # Step 2: Combine satisfaction and pressure columns
-            train_df = self._combine_job_study_satisfaction(train_df)
-            test_df = self._combine_job_study_satisfaction(test_df)
-            train_df = self._combine_work_academic_pressure(train_df)
-            test_df = self._combine_work_academic_pressure(test_df)
-
-            # Step 3: Handle CGPA
-            train_df, student_mean = self._fill_cgpa_values(train_df)
-            test_df, _ = self._fill_cgpa_values(test_df, student_mean)
-
-            # Step 4: Fill nulls (numeric + categorical)
-            train_df = self._fill_numerical_nulls(train_df)
-            test_df = self._fill_numerical_nulls(test_df, reference_df=train_df)
-
-            # Step 5: Handle profession, city, dietary habits, degree, sleep
-            train_df = self._fill_profession(train_df)
-            test_df = self._fill_profession(test_df, reference_df=train_df)
-
-            train_df = self._map_city_values(train_df, train_df)
-            test_df = self._map_city_values(test_df, train_df)
-
-            train_df = self._map_dietary_habits(train_df, train_df)
-            test_df = self._map_dietary_habits(test_df, train_df)
-
-            train_df = self._map_degree_values(train_df, train_df)
-            test_df = self._map_degree_values(test_df, train_df)
-
-            train_df = self._map_sleep_duration(train_df, train_df)
-            test_df = self._map_sleep_duration(test_df, train_df)
-
-             # 6. drop 'Name' if present (not used as feature)
-            if 'Name' in train_df.columns:
-                train_df = train_df.drop(columns=['Name'])
-            if 'Name' in test_df.columns:
-                test_df = test_df.drop(columns=['Name'])
-            if 'id' in train_df.columns:
-                train_df = train_df.drop(columns=['id'])
-            if 'id' in test_df.columns:
-                test_df = test_df.drop(columns=['id'])
-
             # split inputs and target
             if  TARGET_COLUMN not in train_df.columns:
                 raise Exception(f"Target column '{TARGET_COLUMN}' not present in train data")
@@ -278,6 +140,12 @@ class DataTransformation:
             X_test = test_df.drop(columns = [TARGET_COLUMN]) if TARGET_COLUMN in test_df.columns else test_df.copy()
             y_test = test_df[TARGET_COLUMN].values if TARGET_COLUMN in test_df.columns else None
 
+            # Step 2: Cleaning steps (merged columns, fills, rare categories), statistics from train only
+            feature_engineer = FeatureEngineer()
+            X_train = feature_engineer.fit_transform(X_train)
+            X_test = feature_engineer.transform(X_test)
+            logging.info('Applied the feature engineering steps fitted on train data')
+
             ##### Tranformer and transforms
             logging.info('Starting data transformation')
             preprocessor = self.get_data_transformer_object(X_train)
@@ -289,25 +157,180 @@ class DataTransformation:
             X_test_arr = preprocessor.transform(X_test)
             logging.info('Transformation done to Train and test df')
 
-            train_arr = np.c_[X_train_arr, np.array(y_train)]
-            if y_test is not None:
-                test_arr = np.c_[X_test_arr, np.array(y_test)]
-            else:
-                test_arr = X_test_arr
-            logging.info('feature target concatentation done for train-test df')
-
             save_object(self.data_transformation_config.transformed_object_file_path, preprocessor)
-            save_numpy_array(self.data_transformation_config.transformed_train_file_path, array=train_arr)
-            save_numpy_array(self.data_transformation_config.transformed_test_file_path, array=test_arr)
+            save_object(self.data_transformation_config.feature_engineer_file_path, feature_engineer)
+            if self.data_transformation_config.sparse_output:
+                train_target_file_path, test_target_file_path = self._save_sparse(X_train_arr, y_train,
+                                                                                   X_test_arr, y_test)
+            else:
+                train_arr = np.c_[X_train_arr, np.array(y_train)]
+                if y_test is not None:
+                    test_arr = np.c_[X_test_arr, np.array(y_test)]
+                else:
+                    test_arr = X_test_arr
+                logging.info('feature target concatentation done for train-test df')
+                save_numpy_array(self.data_transformation_config.transformed_train_file_path, array=train_arr)
+                save_numpy_array(self.data_transformation_config.transformed_test_file_path, array=test_arr)
+                train_target_file_path, test_target_file_path = None, None
             logging.info('Saving transformation object and transformed files.')
 
             logging.info('Data Transformation completed successfully')
-            return DataTransformationArtifact(
-                transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
-                transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
-                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path
-            )
+            return self._artifact(train_target_file_path, test_target_file_path)
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def _artifact(self, train_target_file_path: Optional[str],
+                  test_target_file_path: Optional[str]) -> DataTransformationArtifact:
+        return DataTransformationArtifact(
+            transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
+            transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
+            transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+            feature_engineer_file_path=self.data_transformation_config.feature_engineer_file_path,
+            transformed_train_target_file_path=train_target_file_path,
+            transformed_test_target_file_path=test_target_file_path
+        )
+
+    def _read_chunks(self, file_path: str) -> Iterator[pd.DataFrame]:
+        """Chunks of a csv without the id column"""
+        for chunk in read_csv_chunks(file_path, self._schema_config, self.data_transformation_config.chunk_size):
+            yield chunk.drop(columns=[self._schema_config['drop_columns']], errors='ignore')
+
+    def _first_occurrences(self, file_path: str) -> np.ndarray:
+        """
+        Mask of the rows of a csv _drop_duplicates would keep, found from a
+        64 bit hash per row: 8 bytes per row in memory instead of the rows
+        (two different rows sharing a hash is vanishingly unlikely, not impossible)
+        """
+        hashes = [pd.util.hash_pandas_object(chunk, index=False).to_numpy() for chunk in self._read_chunks(file_path)]
+        hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+        keep = np.zeros(len(hashes), dtype=bool)
+        keep[np.unique(hashes, return_index=True)[1]] = True
+        logging.info(f"Dropping {len(keep) - int(keep.sum())} duplicate rows from {file_path}")
+        return keep
+
+    def _chunks(self, file_path: str, keep: np.ndarray) -> Iterator[Tuple[pd.DataFrame, Optional[pd.Series]]]:
+        """Inputs and target (None without target column) of the kept rows, chunk by chunk"""
+        start = 0
+        for chunk in self._read_chunks(file_path):
+            chunk, start = chunk[keep[start:start + len(chunk)]], start + len(chunk)
+            # a chunk of duplicates only has nothing left, and transform rejects 0 rows
+            if chunk.empty:
+                continue
+            if TARGET_COLUMN in chunk.columns:
+                yield chunk.drop(columns=[TARGET_COLUMN]), chunk[TARGET_COLUMN]
+            else:
+                yield chunk, None
+
+    @staticmethod
+    def _statistics_frame(template: pd.DataFrame, counts: dict) -> pd.DataFrame:
+        """
+        A few rows from which the preprocessor learns what it would from the
+        counted training rows: for a numeric column its two middle values in
+        equal numbers (same median), for a categorical one every value once and
+        the most frequent one (smallest on ties, as SimpleImputer) the rest of
+        the rows (same vocabulary and mode)
+        """
+        numeric = set(template.select_dtypes(include=np.number).columns)
+        categorical_sizes = [len(counts[column]) for column in template.columns if column not in numeric]
+        n_rows = max(categorical_sizes, default=0) + 2
+        n_rows += n_rows % 2
+
+        columns = {}
+        for column in template.columns:
+            values = sorted(counts[column])
+            if not values:
+                columns[column] = np.full(n_rows, np.nan, dtype=object)
+            elif column in numeric:
+                cumulative = np.cumsum([counts[column][value] for value in values])
+                n_values = int(cumulative[-1])
+                lower = values[int(np.searchsorted(cumulative, (n_values - 1) // 2, side='right'))]
+                upper = values[int(np.searchsorted(cumulative, n_values // 2, side='right'))]
+                columns[column] = pd.Series([lower, upper] * (n_rows // 2), dtype=template[column].dtype)
+            else:
+                top = max(counts[column].values())
+                mode = min(value for value in values if counts[column][value] == top)
+                columns[column] = pd.Series(values + [mode] * (n_rows - len(values)), dtype=object)
+        return pd.DataFrame(columns)
+
+    def _transform_in_chunks(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Out-of-core initiate_data_transformation: the csv files are read
+        chunk_size rows at a time, in passes (duplicate rows, feature engineer
+        statistics, preprocessor statistics, transformed rows written chunk
+        after chunk). Besides one chunk, memory holds a few bytes per row (row
+        hashes, kept rows mask, targets) and the value counts of the columns.
+        Returns the target file paths of the sparse output (None when dense)
+        """
+        config = self.data_transformation_config
+        train_file_path = self.data_ingestion_artifact.trained_file_path
+        test_file_path = self.data_ingestion_artifact.test_file_path
+        logging.info(f'Transforming train and test data in chunks of {config.chunk_size} rows')
+
+        if TARGET_COLUMN not in pd.read_csv(train_file_path, nrows=0).columns:
+            raise Exception(f"Target column '{TARGET_COLUMN}' not present in train data")
+        train_keep = self._first_occurrences(train_file_path)
+        test_keep = self._first_occurrences(test_file_path)
+
+        feature_engineer = FeatureEngineer()
+        for X_chunk, _ in self._chunks(train_file_path, train_keep):
+            feature_engineer.partial_fit(X_chunk)
+        logging.info('Fitted the feature engineering steps on train data')
+
+        template, counts = None, {}
+        for X_chunk, _ in self._chunks(train_file_path, train_keep):
+            X_chunk = feature_engineer.transform(X_chunk)
+            if template is None:
+                template, counts = X_chunk.iloc[:0], {column: {} for column in X_chunk.columns}
+            for column in X_chunk.columns:
+                column_counts = counts[column]
+                for value, count in X_chunk[column].value_counts().items():
+                    if count > 0:
+                        column_counts[value] = column_counts.get(value, 0) + int(count)
+        preprocessor = self.get_data_transformer_object(template)
+        preprocessor.fit(self._statistics_frame(template, counts))
+        logging.info('Fitted the preprocessor on the statistics of train data')
+
+        save_object(config.transformed_object_file_path, preprocessor)
+        save_object(config.feature_engineer_file_path, feature_engineer)
+        target_file_paths = (
+            self._save_transformed_chunks(train_file_path, train_keep, feature_engineer, preprocessor,
+                                          config.transformed_train_file_path, config.transformed_train_target_file_path),
+            self._save_transformed_chunks(test_file_path, test_keep, feature_engineer, preprocessor,
+                                          config.transformed_test_file_path, config.transformed_test_target_file_path)
+        )
+        logging.info('Data Transformation in chunks completed successfully')
+        return target_file_paths
+
+    def _save_transformed_chunks(self, file_path: str, keep: np.ndarray, feature_engineer: FeatureEngineer,
+                                 preprocessor: ColumnTransformer, features_file_path: str,
+                                 target_file_path: str) -> Optional[str]:
+        """
+        Writes the transformed kept rows of a csv in the layout of
+        initiate_data_transformation, returns the target file path of the
+        sparse output (None when dense or without target)
+        """
+        n_features = max(indices.stop for indices in preprocessor.output_indices_.values())
+        has_target = TARGET_COLUMN in pd.read_csv(file_path, nrows=0).columns
+        targets = []
+
+        def transformed_chunks():
+            for X_chunk, y_chunk in self._chunks(file_path, keep):
+                X_chunk = preprocessor.transform(feature_engineer.transform(X_chunk))
+                if self.data_transformation_config.sparse_output:
+                    if has_target:
+                        targets.append(y_chunk.to_numpy())
+                    yield sparse.csr_matrix(X_chunk)
+                else:
+                    yield np.c_[X_chunk, np.array(y_chunk)] if has_target else X_chunk
+
+        if not self.data_transformation_config.sparse_output:
+            save_numpy_array_chunks(features_file_path, transformed_chunks(),
+                                    shape=(int(keep.sum()), n_features + has_target))
+            return None
+        save_sparse_matrix_chunks(features_file_path, transformed_chunks(), n_features)
+        if not has_target:
+            return None
+        save_numpy_array(target_file_path, array=np.concatenate(targets))
+        return target_file_path
+
 
@@ -5,7 +5,7 @@ import pandas as pd
 
 from src.exception import MyException
 from src.logger import logging
-from src.utils.main_utils import read_yaml_file
+from src.utils.main_utils import read_csv, read_yaml_file
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from src.entity.config_entity import DataValidationConfig
 from src.constants import SCHEMA_FILE_PATH
@@ -65,10 +65,9 @@ class DataValidation:
         except Exception as e:
             raise MyException(e, sys) from e
     
-    @staticmethod
-    def read_data(file_path) -> pd.DataFrame:
+    def read_data(self, file_path) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return read_csv(file_path, self._schema_config)
         except Exception as e:
             raise MyException(e, sys)
     
@@ -81,8 +80,8 @@ class DataValidation:
         try:
             validation_error_msg = ''
             logging.info('Starting data validation')
-            train_df, test_df = (DataValidation.read_data(file_path=self.data_ingestion_artifact.trained_file_path),
-                                 DataValidation.read_data(file_path=self.data_ingestion_artifact.test_file_path))
+            train_df, test_df = (self.read_data(file_path=self.data_ingestion_artifact.trained_file_path),
+                                 self.read_data(file_path=self.data_ingestion_artifact.test_file_path))
 
             ## check col len of DataFrame for train/test df
             status = self.validate_numer_of_columns(dataframe=train_df)
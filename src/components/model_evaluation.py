@@ -7,7 +7,7 @@ from dataclasses import dataclass
 from src.logger import logging
 from src.exception import MyException
 from src.constants import TARGET_COLUMN
-from src.utils.main_utils import load_object, load_numpy_array_data
+from src.utils.main_utils import load_object, load_transformed_data
 from src.entity.config_entity import ModelEvaluationConfig
 from src.entity.artifact_entity import ModelTrainerArtifact, DataIngestionArtifact, ModelEvaluationArtifact, DataTransformationArtifact
 from src.entity.s3_estimator import ProjEstimator
@@ -57,12 +57,11 @@ class ModelEvaluation:
         try:
             logging.info("Starting model evaluation process...")
 
-            ## load transformed test data (.npy)
-            test_data = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path)
-            logging.info(f"Loaded transformed test array from : {self.data_transformation_artifact.transformed_test_file_path}")
-
-            # split features and target
-            X_test, y_test = test_data[:, :-1], test_data[:, -1]
+            ## load transformed test data (.npz features and .npy target, or one .npy)
+            X_test, y_test = load_transformed_data(
+                self.data_transformation_artifact.transformed_test_file_path,
+                self.data_transformation_artifact.transformed_test_target_file_path)
+            logging.info(f"Loaded transformed test data from : {self.data_transformation_artifact.transformed_test_file_path}")
 
             # load trained model
             trained_model = load_object(file_path=self.model_trainer_artifact.trained_model_file_path)
@@ -110,7 +109,8 @@ class ModelEvaluation:
                 is_model_accepted=evaluate_model_response.is_model_accepted,
                 s3_model_path=s3_model_path,
                 trained_model_path=self.model_trainer_artifact.trained_model_file_path,
-                changed_accuracy=evaluate_model_response.difference
+                changed_accuracy=evaluate_model_response.difference,
+                trained_fallback_model_path=self.model_trainer_artifact.fallback_model_file_path
             )
 
             logging.info(f"Model evaluation artifact: {model_evaluation_artifact}")
@@ -19,6 +19,8 @@ class ModelPusher:
         self.model_pusher_config = model_pusher_config
         self.proj_estimator = ProjEstimator(bucket_name=model_pusher_config.bucket_name,
                                             model_path=model_pusher_config.s3_model_key_path)
+        self.fallback_estimator = ProjEstimator(bucket_name=model_pusher_config.bucket_name,
+                                                model_path=model_pusher_config.s3_fallback_model_key_path)
     
     def initiate_model_pusher(self) -> ModelPusherArtifact:
         """
@@ -27,6 +29,10 @@ class ModelPusher:
         logging.info('Entered initiate_model_pusher method of ModelTrainer class')
         try:
             print('-----------------------------------------')
+            # the fallback goes first, so a service reloading the new model finds its fallback already there
+            if self.model_evaluation_artifact.trained_fallback_model_path:
+                logging.info("Uploading new fallback model to S3 bucket....")
+                self.fallback_estimator.save_model(from_file=self.model_evaluation_artifact.trained_fallback_model_path)
             logging.info("Uploading new model to S3 bucket....")
             self.proj_estimator.save_model(from_file=self.model_evaluation_artifact.trained_model_path)
             model_pusher_artifact = ModelPusherArtifact(bucket_name=self.model_pusher_config.bucket_name,
@@ -2,14 +2,17 @@ import sys
 import numpy as np
 from typing import Tuple
 from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
 from src.exception import MyException
 from src.logger import logging
-from src.utils.main_utils import load_object, save_object, load_numpy_array_data
+from src.utils.main_utils import load_object, save_object, load_transformed_data
 from src.entity.config_entity import ModelTrainerConfig
 from src.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact
 from src.entity.estimator import MyModel
+from src.entity.compiled_ensemble import CompiledEnsemble
+from src.entity.compiled_linear import CompiledLinear
 
 class ModelTrainer:
     def __init__(self, data_transformation_artifact: DataTransformationArtifact,
@@ -21,19 +24,16 @@ class ModelTrainer:
         self.data_transformation_artifact = data_transformation_artifact
         self.model_trainer_config = model_trainer_config
     
-    def get_model_object_and_report(self, train: np.array, test: np.array) -> Tuple[object, object]:
+    def get_model_object_and_report(self, X_train, y_train: np.array, X_test, y_test: np.array) -> Tuple[object, object]:
         """
-        Description :   This function trains a GradientBoostingClassifier with specified parameters
+        Description :   This function trains a GradientBoostingClassifier with specified parameters,
+                        on dense arrays or sparse matrices of transformed features
         
         Output      :   Returns metric artifact object and trained model object 
         """
         try:
             logging.info(f'Training GradientBoostingClassifier with speicified parameters')
 
-            # splitting the data into x, y values
-            X_train, y_train, X_test, y_test = train[:, :-1], train[:, -1], test[:, :-1], test[:, -1]
-            logging.info('train-test split done')
-
             # Initializing the Classifier model
             model = GradientBoostingClassifier(
                 n_estimators=self.model_trainer_config._n_estimators,
@@ -58,6 +58,29 @@ class ModelTrainer:
         except Exception as e:
             raise MyException(e, sys) from e
         
+    def get_fallback_model_and_report(self, X_train, y_train: np.array, X_test,
+                                      y_test: np.array) -> Tuple[LogisticRegression, ClassificationMetricArtifact]:
+        """
+        Description :   Trains a LogisticRegression on the same transformed features, the model
+                        the service answers with when it is under latency pressure: a single
+                        dot product per row instead of n_estimators trees
+
+        Output      :   Returns the fallback model and its metric artifact
+        """
+        try:
+            logging.info('Training the fallback LogisticRegression')
+            fallback = LogisticRegression(max_iter=self.model_trainer_config.fallback_max_iter)
+            fallback.fit(X_train, y_train)
+
+            y_pred = fallback.predict(X_test)
+            metric_artifact = ClassificationMetricArtifact(f1_score=f1_score(y_test, y_pred),
+                                                           precision_score=precision_score(y_test, y_pred),
+                                                           recall_score=recall_score(y_test, y_pred))
+            logging.info(f"Fallback model: {metric_artifact}")
+            return fallback, metric_artifact
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         logging.info("Entered initiate_model_trainer method of ModelTrainerClass")
         """
@@ -67,33 +90,56 @@ class ModelTrainer:
             print('-----------------------------------------')
             print("Starting MOdel Trainer COmponent")
             # Load transformed train and test data
-            train_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_file_path)
-            test_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path)
+            # sparse matrices stay sparse, both models are fitted on them as they are
+            X_train, y_train = load_transformed_data(
+                self.data_transformation_artifact.transformed_train_file_path,
+                self.data_transformation_artifact.transformed_train_target_file_path)
+            X_test, y_test = load_transformed_data(
+                self.data_transformation_artifact.transformed_test_file_path,
+                self.data_transformation_artifact.transformed_test_target_file_path)
             logging.info('train-test data loaded')
 
             # Train model and get metrics
-            trained_model, metric_artifact = self.get_model_object_and_report(train=train_arr, test=test_arr)
+            trained_model, metric_artifact = self.get_model_object_and_report(X_train, y_train, X_test, y_test)
             logging.info('Model Object and artifact loaded')
 
             # Load preprocessing object
             preprocessing_obj = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
             logging.info("Preprocessing object loaded.")
+            feature_engineer = None
+            if self.data_transformation_artifact.feature_engineer_file_path:
+                feature_engineer = load_object(file_path=self.data_transformation_artifact.feature_engineer_file_path)
+                logging.info("Feature engineer loaded.")
 
             # Check if the model's accuracy meets the expected threshold
-            if accuracy_score(train_arr[:, -1], trained_model.predict(train_arr[:, :-1])) < self.model_trainer_config.expected_accuracy:
+            if accuracy_score(y_train, trained_model.predict(X_train)) < self.model_trainer_config.expected_accuracy:
                 logging.info("No model found with score above the base score")
                 raise Exception("No model found with score above the base score")
 
             # Save the final model object that includes both preprocessing and the trained model
             logging.info("Saving new model as performace is better than previous one.")
-            my_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=trained_model)
+            compiled_model = CompiledEnsemble.from_gradient_boosting(trained_model)
+            logging.info(f"Compiled ensemble: {compiled_model.n_trees if compiled_model else 0} trees flattened")
+            my_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=trained_model,
+                               compiled_model=compiled_model, feature_engineer=feature_engineer)
             save_object(self.model_trainer_config.trained_model_file_path, my_model)
             logging.info("Saved final model object that includes both preprocessing and the trained model")
 
+            # Save the fallback model next to it, with the same preprocessing
+            fallback_model, fallback_metric_artifact = self.get_fallback_model_and_report(X_train, y_train,
+                                                                                             X_test, y_test)
+            save_object(self.model_trainer_config.fallback_model_file_path,
+                        MyModel(preprocessing_object=preprocessing_obj, trained_model_object=fallback_model,
+                                compiled_model=CompiledLinear.from_logistic_regression(fallback_model),
+                                feature_engineer=feature_engineer))
+            logging.info("Saved fallback model object")
+
             # Create and return the ModelTrainerArtifact
             model_trainer_artifact = ModelTrainerArtifact(
                 trained_model_file_path=self.model_trainer_config.trained_model_file_path,
                 metric_artifact=metric_artifact,
+                fallback_model_file_path=self.model_trainer_config.fallback_model_file_path,
+                fallback_metric_artifact=fallback_metric_artifact
             )
             logging.info(f"Model trainer artifact: {model_trainer_artifact}")
             return model_trainer_artifact
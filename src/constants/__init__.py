@@ -10,10 +10,14 @@ PIPELINE_NAME: str = ''
 ARTIFACT_DIR: str = 'artifact'
 
 MODEL_FILE_NAME = 'model.pkl'
+# logistic regression on the same features, served when latency is under pressure
+FALLBACK_MODEL_FILE_NAME = 'fallback_model.pkl'
 
 TARGET_COLUMN = 'Depression'
 CURRENT_YEAR = date.today().year
 PREPROCESSING_OBJECT_FILE_NAME = 'preprocessing.pkl'
+# fitted cleaning steps (FeatureEngineer), stored in the model next to the preprocessing object
+FEATURE_ENGINEER_OBJECT_FILE_NAME = 'feature_engineer.pkl'
 
 FILE_NAME: str = 'data.csv'
 TRAIN_FILE_NAME: str = 'train.csv'
@@ -41,6 +45,11 @@ Data Transformation related constants
 DATA_TRANSFORMATION_DIR_NAME: str = 'data_transformation'
 DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR: str = 'transformed'
 DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR: str = 'transformed_object'
+# one-hot features saved as a CSR matrix (.npz) with the target in its own .npy, instead of one dense .npy
+DATA_TRANSFORMATION_SPARSE_OUTPUT: bool = True
+DATA_TRANSFORMATION_TARGET_FILE_SUFFIX: str = '_target.npy'
+# rows per chunk of the out-of-core transformation, 0 reads the train / test csv files whole
+DATA_TRANSFORMATION_CHUNK_SIZE: int = int(os.getenv('DATA_TRANSFORMATION_CHUNK_SIZE', 0))
 
 """
 MODEL TRAINER related constants
@@ -52,6 +61,7 @@ MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
 MODEL_TRAINER_MODEL_CONFIG_FILE_PATH: str = os.path.join('config', 'model.yaml')
 MODEL_TRAINER_N_ESTIMATORS = 100
 MODEL_TRAINER_LEARNING_RATE: float = 0.1
+MODEL_TRAINER_FALLBACK_MAX_ITER: int = 1000
 
 """
 MODEL Evaluation related constants
@@ -60,6 +70,78 @@ MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.02
 MODEL_BUCKET_NAME = 'model-mindscope-mlops'
 MODEL_PUSHER_S3_KEY = 'model-registry'
 
+"""
+Prediction service related constants
+"""
+# seconds between checks of the model ETag in s3, 0 disables hot reload
+MODEL_REFRESH_INTERVAL_SECONDS: int = int(os.getenv('MODEL_REFRESH_INTERVAL_SECONDS', 60))
+
+# 's3' or 'local' (buckets are sub directories of LOCAL_STORAGE_DIR)
+MODEL_STORAGE_BACKEND: str = os.getenv('MODEL_STORAGE_BACKEND', 's3')
+LOCAL_STORAGE_DIR: str = os.getenv('LOCAL_STORAGE_DIR', 'local_storage')
+
+# local disk cache of downloaded models, empty MODEL_CACHE_DIR disables it
+MODEL_CACHE_DIR: str = os.getenv('MODEL_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'mindscope', 'models'))
+MODEL_CACHE_MAX_BYTES: int = int(os.getenv('MODEL_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+
+# time from startup to a resident, warmed up model above which a warning is logged
+STARTUP_BUDGET_SECONDS: float = float(os.getenv('STARTUP_BUDGET_SECONDS', 30))
+
+# largest number of rows accepted by one batch prediction request
+BATCH_PREDICTION_MAX_ROWS: int = int(os.getenv('BATCH_PREDICTION_MAX_ROWS', 50000))
+
+# rows parsed and scored together by the streaming endpoint (bounds its memory)
+STREAM_CHUNK_ROWS: int = int(os.getenv('STREAM_CHUNK_ROWS', 5000))
+
+# how long a stream waits for a free inference slot before it ends with an error line
+STREAM_SATURATED_WAIT_SECONDS: float = float(os.getenv('STREAM_SATURATED_WAIT_SECONDS', 30))
+
+# offline scoring (python -m src.pipeline.batch_predict): rows per chunk sent to a worker
+BATCH_PREDICT_CHUNK_ROWS: int = int(os.getenv('BATCH_PREDICT_CHUNK_ROWS', 20000))
+
+# micro-batching of concurrent /predict requests
+PREDICT_BATCHING_ENABLED: bool = os.getenv('PREDICT_BATCHING_ENABLED', 'true').lower() == 'true'
+PREDICT_BATCH_MAX_SIZE: int = int(os.getenv('PREDICT_BATCH_MAX_SIZE', 32))
+PREDICT_BATCH_MAX_WAIT_MS: float = float(os.getenv('PREDICT_BATCH_MAX_WAIT_MS', 2.0))
+
+# where scoring runs: 'thread', 'process' (model preloaded per worker) or 'inline' (on the event loop)
+INFERENCE_BACKEND: str = os.getenv('INFERENCE_BACKEND', 'thread')
+INFERENCE_WORKERS: int = int(os.getenv('INFERENCE_WORKERS', 2))
+# scoring calls allowed in flight before requests get a 503
+INFERENCE_MAX_PENDING: int = int(os.getenv('INFERENCE_MAX_PENDING', 8))
+
+# admission control of prediction requests: requests served at once (0 disables admission control),
+# requests queued for a slot beyond which they get a 429, and the time budget of a request without an
+# X-Request-Deadline-Ms header (0 for none) past which it gets a 503 instead of being scored
+ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', 64))
+ADMISSION_MAX_QUEUE: int = int(os.getenv('ADMISSION_MAX_QUEUE', 256))
+REQUEST_DEADLINE_MS: float = float(os.getenv('REQUEST_DEADLINE_MS', 5000))
+ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv('ADMISSION_RETRY_AFTER_SECONDS', 1))
+
+# the fallback model answers a call that waited FALLBACK_QUEUE_WAIT_MS since the request arrived, or has
+# less than FALLBACK_DEADLINE_BUDGET_MS left before its deadline (0 disables the condition); an empty
+# FALLBACK_MODEL_PATH disables the fallback model
+FALLBACK_MODEL_PATH: str = os.getenv('FALLBACK_MODEL_PATH', FALLBACK_MODEL_FILE_NAME)
+FALLBACK_QUEUE_WAIT_MS: float = float(os.getenv('FALLBACK_QUEUE_WAIT_MS', 250))
+FALLBACK_DEADLINE_BUDGET_MS: float = float(os.getenv('FALLBACK_DEADLINE_BUDGET_MS', 100))
+
+# cache of single-row predictions keyed by model version + transformed features, 0 entries disables it
+PREDICTION_CACHE_MAX_ENTRIES: int = int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', 10000))
+PREDICTION_CACHE_MAX_BYTES: int = int(os.getenv('PREDICTION_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+PREDICTION_CACHE_TTL_SECONDS: float = float(os.getenv('PREDICTION_CACHE_TTL_SECONDS', 3600))
+
+# on-demand profiling of prediction requests: the ones sent with the header X-Admin-Token: <PROFILE_ADMIN_TOKEN>
+# and a PROFILE_SAMPLE_RATE fraction of the others; an empty token and a 0 rate disable it
+PROFILE_ADMIN_TOKEN: str = os.getenv('PROFILE_ADMIN_TOKEN', '')
+PROFILE_SAMPLE_RATE: float = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR: str = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_MAX_FILES: int = int(os.getenv('PROFILE_MAX_FILES', 50))
+PROFILE_INTERVAL_MS: float = float(os.getenv('PROFILE_INTERVAL_MS', 2))
+PROFILE_MAX_SECONDS: float = float(os.getenv('PROFILE_MAX_SECONDS', 30))
+
 APP_HOST = '0.0.0.0'
 APP_PORT = 5000
 
+# worker processes forked by serve.py after the model is loaded once in the master
+SERVE_WORKERS: int = int(os.getenv('SERVE_WORKERS', os.cpu_count() or 1))
+
@@ -4,8 +4,9 @@ import numpy as np
 from typing import Optional
 
 from src.configuration.mongo_db_connection import MongoDBClient
-from src.constants import DATABASE_NAME
+from src.constants import DATABASE_NAME, SCHEMA_FILE_PATH
 from src.exception import MyException
+from src.utils.main_utils import apply_schema_dtypes, read_yaml_file
 
 class ProjData:
     """
@@ -32,6 +33,8 @@ class ProjData:
             ### convert collection data to dataframe and preprocess
             print(f"Fetching data from mongoDB....")
             df = pd.DataFrame(list(collection.find()))
+            # categoricals / float32 / small ints of the schema instead of Python strings and float64
+            df = apply_schema_dtypes(df, read_yaml_file(file_path=SCHEMA_FILE_PATH))
             print(f"Fetched Data with {len(df)}")
             return df
         except Exception as e:
@@ -0,0 +1,61 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+"""
+api_entity: request and response bodies of the JSON prediction API
+"""
+
+
+class MentalHealthRecord(BaseModel):
+    """
+    One raw input row, same fields as MentalHealthData
+    """
+    Name: Optional[str] = None
+    Gender: str
+    Age: float
+    City: Optional[str] = None
+    Working_Professional_or_Student: str
+    Profession: Optional[str] = None
+    Academic_Pressure: Optional[float] = None
+    Work_Pressure: Optional[float] = None
+    CGPA: Optional[float] = None
+    Study_Satisfaction: Optional[float] = None
+    Job_Satisfaction: Optional[float] = None
+    Sleep_Duration: Optional[str] = None
+    Dietary_Habits: Optional[str] = None
+    Degree: Optional[str] = None
+    Suicidal_Thoughts: str
+    Work_Study_Hours: float
+    Financial_Stress: Optional[float] = None
+    Family_History: str
+
+
+class PredictionResponse(BaseModel):
+    label: int = Field(description="1 = high risk of depression, 0 = low risk")
+    probability: float = Field(description="Probability of the high risk class (predict_proba)")
+    model_version: Optional[str] = Field(description="Version (ETag) of the model that answered, if known")
+    model_tier: str = Field(description="Model that answered: 'primary', or 'fallback' under latency pressure")
+    latency_ms: Optional[float] = Field(description="Time spent on the request by the server, until the response "
+                                                    "was built, if its arrival was recorded")
+
+
+class BatchPredictionRequest(BaseModel):
+    """
+    Either a list of records or columnar input ({field: [values, ...]})
+    """
+    records: Optional[List[MentalHealthRecord]] = None
+    columns: Optional[Dict[str, List[Any]]] = None
+
+    @model_validator(mode='after')
+    def check_one_input_format(self):
+        if (self.records is None) == (self.columns is None):
+            raise ValueError("Provide exactly one of 'records' or 'columns'")
+        return self
+
+
+class BatchPredictionResponse(BaseModel):
+    count: int
+    labels: List[int] = Field(description="1 = high risk of depression, 0 = low risk")
+    probabilities: List[float] = Field(description="Probability of the high risk class")
+    model_tier: str = Field(description="Model that answered: 'primary', or 'fallback' under latency pressure")
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 """
 artifact_entity: output results (metadata and file paths)
@@ -21,6 +22,10 @@ class DataTransformationArtifact:
     transformed_object_file_path: str
     transformed_train_file_path: str
     transformed_test_file_path: str
+    feature_engineer_file_path: Optional[str] = None
+    # set when the features are a sparse matrix saved apart from the target
+    transformed_train_target_file_path: Optional[str] = None
+    transformed_test_target_file_path: Optional[str] = None
 
 @dataclass
 class ClassificationMetricArtifact:
@@ -32,6 +37,8 @@ class ClassificationMetricArtifact:
 class ModelTrainerArtifact:
     trained_model_file_path: str
     metric_artifact: ClassificationMetricArtifact
+    fallback_model_file_path: Optional[str] = None
+    fallback_metric_artifact: Optional[ClassificationMetricArtifact] = None
 
 @dataclass
 class ModelEvaluationArtifact:
@@ -39,6 +46,7 @@ class ModelEvaluationArtifact:
     changed_accuracy:float
     s3_model_path:str 
     trained_model_path:str
+    trained_fallback_model_path: Optional[str] = None
 
 @dataclass
 class ModelPusherArtifact:
@@ -0,0 +1,283 @@
+import sys
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.exception import MyException
+from src.logger import logging
+
+
+def _perfect_tree(tree, depth: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lays a fitted sklearn tree out as a perfect binary tree of the given depth in
+    heap order (children of slot h are 2h+1 and 2h+2). Leaves above the last level
+    are padded with always-true splits whose left-most descendant holds the value.
+
+    :return: split feature and threshold per internal slot, value per leaf slot
+    """
+    n_internal = 2 ** depth - 1
+    features = np.zeros(n_internal, dtype=np.intp)
+    thresholds = np.full(n_internal, np.inf)
+    values = np.zeros(2 ** depth)
+
+    stack = [(0, 0, 0)]
+    while stack:
+        node, slot, level = stack.pop()
+        if level == depth:
+            values[slot - n_internal] = tree.value[node, 0, 0]
+        elif tree.children_left[node] == -1:
+            stack.append((node, 2 * slot + 1, level + 1))
+        else:
+            features[slot] = tree.feature[node]
+            thresholds[slot] = tree.threshold[node]
+            stack.append((tree.children_left[node], 2 * slot + 1, level + 1))
+            stack.append((tree.children_right[node], 2 * slot + 2, level + 1))
+    return features, thresholds, values
+
+
+class CompiledEnsemble:
+    """
+    Binary log-loss GradientBoostingClassifier flattened into contiguous NumPy
+    arrays covering every tree, scored for a whole batch at once.
+
+    - Shallow trees (max_depth <= 3, the GradientBoostingClassifier default) are
+      laid out as perfect trees. Every distinct (feature, threshold) split is
+      compared once for the batch, the comparison bits of each tree are packed
+      into a leaf code with a single matrix product, and a per-tree table maps
+      code -> learning_rate * leaf value.
+    - Deeper trees are walked level by level through node arrays (feature,
+      threshold, left, right, value); leaves point to themselves so every
+      (row, tree) pair can take max_depth steps.
+
+    The tree contributions are accumulated one tree after another in the same
+    order and precision as sklearn's predict_stages, so the decision scores are
+    bit-identical to GradientBoostingClassifier.decision_function.
+    """
+
+    # deepest trees scored through leaf code tables (2 ** (2 ** depth - 1) entries per tree)
+    table_max_depth = 3
+    # rows scored together, bounds the (trees x rows) intermediate arrays
+    chunk_rows = 2048
+    # below this many rows a cumsum beats a python loop over the trees
+    cumsum_max_rows = 256
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int, init_raw: float,
+                 learning_rate: float, classes: np.ndarray, n_features: int,
+                 split_feature: Optional[np.ndarray] = None, split_threshold: Optional[np.ndarray] = None,
+                 split_weights: Optional[np.ndarray] = None, leaf_table: Optional[np.ndarray] = None):
+        """
+        :param feature: Split feature per node (0 for leaves)
+        :param threshold: Split threshold per node
+        :param left: Left child per node (the node itself for leaves)
+        :param right: Right child per node (the node itself for leaves)
+        :param value: Leaf value per node
+        :param roots: Index of the root node of every tree, in boosting order
+        :param max_depth: Depth of the deepest tree
+        :param init_raw: Raw prediction of the init estimator
+        :param learning_rate: Shrinkage applied to every tree
+        :param classes: classes_ of the original classifier
+        :param n_features: Number of input features
+        :param split_feature: Feature of every distinct split (shallow trees only)
+        :param split_threshold: Threshold of every distinct split (shallow trees only)
+        :param split_weights: (splits x trees) bit weight of each split in each tree's leaf code
+        :param leaf_table: (trees x codes) learning_rate * leaf value reached for each leaf code
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.init_raw = init_raw
+        self.learning_rate = learning_rate
+        self.classes = classes
+        self.n_features = n_features
+        self.split_feature = split_feature
+        self.split_threshold = split_threshold
+        self.split_weights = split_weights
+        self.leaf_table = leaf_table
+
+    @classmethod
+    def from_gradient_boosting(cls, model) -> Optional['CompiledEnsemble']:
+        """
+        Flattens a fitted GradientBoostingClassifier, or returns None if it is not
+        a binary log-loss model with a constant init estimator
+        """
+        # sklearn is only needed here, not when importing the serving app
+        from sklearn.dummy import DummyClassifier
+        from sklearn.ensemble import GradientBoostingClassifier
+
+        try:
+            if not isinstance(model, GradientBoostingClassifier) or not hasattr(model, 'estimators_'):
+                return None
+            if model.loss != 'log_loss' or model.n_classes_ != 2:
+                return None
+
+            if isinstance(model.init_, str) and model.init_ == 'zero':
+                init_raw = 0.0
+            elif isinstance(model.init_, DummyClassifier) and model.init_.strategy == 'prior':
+                # the prior does not depend on X, any row gives the constant
+                init_raw = float(model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0, 0])
+            else:
+                return None
+
+            trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+            features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+            offset, max_depth = 0, 0
+            for tree in trees:
+                nodes = np.arange(tree.node_count)
+                is_leaf = tree.children_left == -1
+
+                features.append(np.where(is_leaf, 0, tree.feature))
+                thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+                lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+                rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+                values.append(tree.value[:, 0, 0])
+                roots.append(offset)
+
+                offset += tree.node_count
+                max_depth = max(max_depth, tree.max_depth)
+
+            learning_rate = float(model.learning_rate)
+            tables = {}
+            if max_depth <= cls.table_max_depth:
+                tables = cls._build_tables(trees, max(max_depth, 1), learning_rate)
+
+            return cls(
+                feature=np.concatenate(features).astype(np.intp),
+                threshold=np.concatenate(thresholds).astype(np.float64),
+                left=np.concatenate(lefts).astype(np.intp),
+                right=np.concatenate(rights).astype(np.intp),
+                value=np.concatenate(values).astype(np.float64),
+                roots=np.array(roots, dtype=np.intp),
+                max_depth=max_depth,
+                init_raw=init_raw,
+                learning_rate=learning_rate,
+                classes=model.classes_,
+                n_features=model.n_features_in_,
+                **tables
+            )
+        except Exception as e:
+            logging.warning(f"Could not compile the gradient boosting model, using sklearn: {e}")
+            return None
+
+    @staticmethod
+    def _build_tables(trees: list, depth: int, learning_rate: float) -> dict:
+        n_internal = 2 ** depth - 1
+        codes = np.arange(2 ** n_internal)
+
+        # leaf reached by every code: bit k of the code is the outcome of slot k
+        slot = np.zeros_like(codes)
+        for _ in range(depth):
+            go_left = (codes >> slot) & 1
+            slot = np.where(go_left == 1, 2 * slot + 1, 2 * slot + 2)
+        leaf_of_code = slot - n_internal
+
+        split_ids, split_feature, split_threshold = {}, [], []
+        weights = []
+        leaf_table = np.empty((len(trees), len(codes)))
+        for t, tree in enumerate(trees):
+            features, thresholds, values = _perfect_tree(tree, depth)
+            for k, split in enumerate(zip(features.tolist(), thresholds.tolist())):
+                if split not in split_ids:
+                    split_ids[split] = len(split_feature)
+                    split_feature.append(split[0])
+                    split_threshold.append(split[1])
+                weights.append((split_ids[split], t, 2 ** k))
+            # same float64 product sklearn computes for every prediction
+            leaf_table[t] = learning_rate * values[leaf_of_code]
+
+        split_weights = np.zeros((len(split_feature), len(trees)), dtype=np.float32)
+        for split_id, t, weight in weights:
+            # a split repeated inside one tree sets several bits of its code
+            split_weights[split_id, t] += weight
+
+        return {
+            'split_feature': np.array(split_feature, dtype=np.intp),
+            'split_threshold': np.array(split_threshold, dtype=np.float64),
+            'split_weights': split_weights,
+            'leaf_table': leaf_table
+        }
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """
+        Raw boosting scores, identical to GradientBoostingClassifier.decision_function
+        """
+        try:
+            if hasattr(X, 'toarray'):
+                X = X.toarray()
+            # sklearn evaluates the trees on float32 features against float64 thresholds
+            X = np.asarray(X, dtype=np.float32)
+            if X.ndim != 2 or X.shape[1] != self.n_features:
+                raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+            if not np.isfinite(X).all():
+                # same contract as GradientBoostingClassifier, NaN would silently go right here
+                raise ValueError("Input X contains NaN or infinity")
+
+            contributions = self._table_contributions if self.leaf_table is not None else self._walk_contributions
+            raw = np.empty(X.shape[0], dtype=np.float64)
+            for start in range(0, X.shape[0], self.chunk_rows):
+                chunk = X[start:start + self.chunk_rows]
+                raw[start:start + self.chunk_rows] = self._accumulate(contributions(chunk))
+            return raw
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _table_contributions(self, X: np.ndarray) -> np.ndarray:
+        passed = (X.take(self.split_feature, axis=1) <= self.split_threshold).astype(np.float32)
+        # leaf codes are small integers, exact in float32
+        codes = (self.split_weights.T @ passed.T).astype(np.intp)
+        codes += (np.arange(self.n_trees) * self.leaf_table.shape[1])[:, None]
+        return self.leaf_table.take(codes)
+
+    def _walk_contributions(self, X: np.ndarray) -> np.ndarray:
+        rows = np.arange(X.shape[0])
+        node = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.learning_rate * self.value[node]
+
+    def _accumulate(self, contributions: np.ndarray) -> np.ndarray:
+        """
+        init + c1 + c2 + ... summed in tree order for every row of (trees x rows)
+        contributions; np.sum would use pairwise summation and differ in the last bits
+        """
+        if contributions.shape[1] < self.cumsum_max_rows:
+            terms = np.empty((contributions.shape[0] + 1, contributions.shape[1]))
+            terms[0] = self.init_raw
+            terms[1:] = contributions
+            return np.cumsum(terms, axis=0)[-1]
+        raw = np.full(contributions.shape[1], self.init_raw)
+        for tree_contribution in contributions:
+            raw += tree_contribution
+        return raw
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self._proba(self.decision_function(X))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self._labels(self.decision_function(X))
+
+    def predict_with_proba(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        raw = self.decision_function(X)
+        return self._labels(raw), self._proba(raw)
+
+    def _labels(self, raw: np.ndarray) -> np.ndarray:
+        return self.classes[(raw >= 0).astype(int)]
+
+    @staticmethod
+    def _proba(raw: np.ndarray) -> np.ndarray:
+        # the sigmoid sklearn uses; imported here as scipy.special alone takes ~0.4s to import
+        from scipy.special import expit
+
+        proba = np.empty((raw.shape[0], 2), dtype=np.float64)
+        proba[:, 1] = expit(raw)
+        proba[:, 0] = 1 - proba[:, 1]
+        return proba
@@ -0,0 +1,86 @@
+import sys
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.exception import MyException
+from src.logger import logging
+
+
+class CompiledLinear:
+    """
+    Binary LogisticRegression reduced to its coefficients and scored with one
+    matrix-vector product, without sklearn's input validation on every call
+    (which dominates the cost of scoring a single row). Labels and
+    probabilities are those of LogisticRegression.predict / predict_proba.
+    """
+
+    def __init__(self, coef: np.ndarray, intercept: float, classes: np.ndarray, n_features: int):
+        """
+        :param coef: Coefficient of every feature
+        :param intercept: Intercept of the decision function
+        :param classes: classes_ of the original classifier
+        :param n_features: Number of input features
+        """
+        self.coef = coef
+        self.intercept = intercept
+        self.classes = classes
+        self.n_features = n_features
+
+    @classmethod
+    def from_logistic_regression(cls, model) -> Optional['CompiledLinear']:
+        """
+        Extracts a fitted binary LogisticRegression, or returns None for any other model
+        """
+        from sklearn.linear_model import LogisticRegression
+
+        try:
+            if not isinstance(model, LogisticRegression) or not hasattr(model, 'coef_'):
+                return None
+            if len(model.classes_) != 2:
+                return None
+            return cls(
+                coef=np.ascontiguousarray(model.coef_[0], dtype=np.float64),
+                intercept=float(model.intercept_[0]),
+                classes=model.classes_,
+                n_features=model.n_features_in_
+            )
+        except Exception as e:
+            logging.warning(f"Could not compile the logistic regression model, using sklearn: {e}")
+            return None
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        try:
+            if hasattr(X, 'toarray'):
+                X = X.toarray()
+            X = np.asarray(X, dtype=np.float64)
+            if X.ndim != 2 or X.shape[1] != self.n_features:
+                raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+            if not np.isfinite(X).all():
+                raise ValueError("Input X contains NaN or infinity")
+            return X @ self.coef + self.intercept
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self._labels(self.decision_function(X))
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self._proba(self.decision_function(X))
+
+    def predict_with_proba(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        raw = self.decision_function(X)
+        return self._labels(raw), self._proba(raw)
+
+    def _labels(self, raw: np.ndarray) -> np.ndarray:
+        # LinearClassifierMixin.predict: strictly positive scores are the second class
+        return self.classes[(raw > 0).astype(int)]
+
+    @staticmethod
+    def _proba(raw: np.ndarray) -> np.ndarray:
+        from scipy.special import expit
+
+        proba = np.empty((raw.shape[0], 2), dtype=np.float64)
+        proba[:, 1] = expit(raw)
+        proba[:, 0] = 1 - proba[:, 1]
+        return proba
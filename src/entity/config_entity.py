@@ -1,6 +1,7 @@
 import os
 from src.constants import *
 from dataclasses import dataclass
+from typing import Optional
 from datetime import datetime
 
 """
@@ -35,18 +36,44 @@ class DataValidationConfig:
 @dataclass
 class DataTransformationConfig:
     data_transformation_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_TRANSFORMATION_DIR_NAME)
-    transformed_train_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, 
-                                                    TRAIN_FILE_NAME.replace('csv', 'npy'))
-    transformed_test_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, 
-                                                   TEST_FILE_NAME.replace('csv', 'npy'))
+    sparse_output: bool = DATA_TRANSFORMATION_SPARSE_OUTPUT
+    chunk_size: int = DATA_TRANSFORMATION_CHUNK_SIZE
+    # default to a CSR .npz or a dense .npy after the sparse_output of the instance, see __post_init__
+    transformed_train_file_path: Optional[str] = None
+    transformed_test_file_path: Optional[str] = None
+    # only written with sparse_output, the dense arrays carry the target as their last column
+    transformed_train_target_file_path: str = os.path.join(data_transformation_dir,
+                                                           DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+                                                           TRAIN_FILE_NAME.replace('.csv',
+                                                                                   DATA_TRANSFORMATION_TARGET_FILE_SUFFIX))
+    transformed_test_target_file_path: str = os.path.join(data_transformation_dir,
+                                                          DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+                                                          TEST_FILE_NAME.replace('.csv',
+                                                                                 DATA_TRANSFORMATION_TARGET_FILE_SUFFIX))
     transformed_object_file_path: str = os.path.join(data_transformation_dir, 
                                                      DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR, 
                                                      PREPROCESSING_OBJECT_FILE_NAME)
+    feature_engineer_file_path: str = os.path.join(data_transformation_dir,
+                                                   DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
+                                                   FEATURE_ENGINEER_OBJECT_FILE_NAME)
+
+    def __post_init__(self):
+        extension = 'npz' if self.sparse_output else 'npy'
+        transformed_data_dir = os.path.join(self.data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR)
+        if self.transformed_train_file_path is None:
+            self.transformed_train_file_path = os.path.join(transformed_data_dir,
+                                                            TRAIN_FILE_NAME.replace('csv', extension))
+        if self.transformed_test_file_path is None:
+            self.transformed_test_file_path = os.path.join(transformed_data_dir,
+                                                           TEST_FILE_NAME.replace('csv', extension))
 
 @dataclass
 class ModelTrainerConfig:
     model_trainer_dir: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_TRAINER_DIR_NAME)
     trained_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_FILE_NAME)
+    fallback_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR,
+                                                 FALLBACK_MODEL_FILE_NAME)
+    fallback_max_iter: int = MODEL_TRAINER_FALLBACK_MAX_ITER
     expected_accuracy: float = MODEL_TRAINER_EXPECTED_SCORE
     model_config_file_path: str = MODEL_TRAINER_MODEL_CONFIG_FILE_PATH
     _n_estimators = MODEL_TRAINER_N_ESTIMATORS
@@ -62,8 +89,18 @@ class ModelEvaluationConfig:
 class ModelPusherConfig:
     bucket_name: str = MODEL_BUCKET_NAME
     s3_model_key_path: str = MODEL_FILE_NAME
+    s3_fallback_model_key_path: str = FALLBACK_MODEL_FILE_NAME
 
 @dataclass
 class DepressionPredictorConfig:
     model_file_path: str = MODEL_FILE_NAME
-    model_bucket_name: str = MODEL_BUCKET_NAME
\ No newline at end of file
+    model_bucket_name: str = MODEL_BUCKET_NAME
+    fallback_model_file_path: str = FALLBACK_MODEL_PATH
+    fallback_queue_wait_ms: float = FALLBACK_QUEUE_WAIT_MS
+    fallback_deadline_budget_ms: float = FALLBACK_DEADLINE_BUDGET_MS
+    model_refresh_interval: int = MODEL_REFRESH_INTERVAL_SECONDS
+    model_cache_dir: str = MODEL_CACHE_DIR
+    model_cache_max_bytes: int = MODEL_CACHE_MAX_BYTES
+    prediction_cache_max_entries: int = PREDICTION_CACHE_MAX_ENTRIES
+    prediction_cache_max_bytes: int = PREDICTION_CACHE_MAX_BYTES
+    prediction_cache_ttl: float = PREDICTION_CACHE_TTL_SECONDS
\ No newline at end of file
@@ -1,9 +1,21 @@
 import sys
+import numpy as np
 import pandas as pd
-from sklearn.pipeline import Pipeline
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
+from src.entity.compiled_ensemble import CompiledEnsemble
+from src.entity.compiled_linear import CompiledLinear
+from src.entity.fast_encoder import CompiledEncoder
+from src.entity.feature_engineer import FeatureEngineer
 from src.exception import MyException
 from src.logger import logging
+from src.metrics.stages import PREDICT, PREPROCESS, time_stage
+
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+# hot path logger, sampled (see LOG_SAMPLE_RATES)
+logger = logging.getLogger(__name__)
 
 class TargetValueMapping:
     def __init__(self):
@@ -16,13 +28,19 @@ class TargetValueMapping:
         return dict(zip(mapping_response.values(), mapping_response.keys()))
 
 class MyModel:
-    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object):
+    def __init__(self, preprocessing_object: 'Pipeline', trained_model_object: object,
+                 compiled_model: Optional[Union[CompiledEnsemble, CompiledLinear]] = None,
+                 feature_engineer: Optional[FeatureEngineer] = None):
         """
         :param preprocessing object: Input Object of preprocessor
         :param trained_model object: Input Object of trained model
+        :param compiled_model: Flattened trained model used for inference (built at training time)
+        :param feature_engineer: Cleaning steps fitted on the training data, applied to raw inputs before scoring
         """
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
+        self.compiled_model = compiled_model
+        self.feature_engineer = feature_engineer
     
     def predict(self, dataframe: pd.DataFrame) -> pd.DataFrame:
         """
@@ -30,20 +48,105 @@ class MyModel:
         using preprocessing_object, and performs prediction on transformed features.
         """
         try:
-            logging.info('Starting prediction process...')
+            logger.info('Starting prediction process...')
 
             # Step 1: Apply scaling transformations using pre-trained preprocessing object
-            transformed_feature = self.preprocessing_object.transform(dataframe)
+            with time_stage(PREPROCESS):
+                transformed_feature = self.preprocessing_object.transform(dataframe)
 
             # Step 2: Perform prediction using the trained model
-            logging.info('Using the trained model to get predictions')
-            predictions = self.trained_model_object.predict(transformed_feature)
+            logger.info('Using the trained model to get predictions')
+            with time_stage(PREDICT):
+                predictions = self.get_scorer().predict(transformed_feature)
 
             return predictions
         except Exception as e:
-            logging.error('Error occurred in predict method', exc_info=True)
+            logger.error('Error occurred in predict method', exc_info=True)
+            raise MyException(e, sys) from e
+        
+    def predict_proba(self, dataframe: pd.DataFrame) -> np.ndarray:
+        """
+        Returns the class probabilities for preprocessed inputs
+        """
+        try:
+            with time_stage(PREPROCESS):
+                transformed_feature = self.preprocessing_object.transform(dataframe)
+            with time_stage(PREDICT):
+                return self.get_scorer().predict_proba(transformed_feature)
+        except Exception as e:
+            logger.error('Error occurred in predict_proba method', exc_info=True)
+            raise MyException(e, sys) from e
+
+    def predict_with_proba(self, dataframe: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Applies the preprocessing object once and returns both the predicted
+        labels and the class probabilities
+        """
+        try:
+            with time_stage(PREPROCESS):
+                transformed_feature = self.preprocessing_object.transform(dataframe)
+            return self._predict_features_with_proba(transformed_feature)
+        except Exception as e:
+            logger.error('Error occurred in predict_with_proba method', exc_info=True)
             raise MyException(e, sys) from e
         
+    def get_scorer(self):
+        """
+        Object used to score transformed features: the compiled ensemble / linear
+        model when one exists (compiled here for models pickled before it was
+        added), else the trained model itself
+        """
+        if getattr(self, 'compiled_model', None) is None and not hasattr(self, '_compile_attempted'):
+            self._compile_attempted = True
+            self.compiled_model = (CompiledEnsemble.from_gradient_boosting(self.trained_model_object)
+                                   or CompiledLinear.from_logistic_regression(self.trained_model_object))
+        return self.compiled_model if self.compiled_model is not None else self.trained_model_object
+
+    def _predict_features_with_proba(self, transformed_feature) -> Tuple[np.ndarray, np.ndarray]:
+        scorer = self.get_scorer()
+        with time_stage(PREDICT):
+            if isinstance(scorer, (CompiledEnsemble, CompiledLinear)):
+                return scorer.predict_with_proba(transformed_feature)
+            return scorer.predict(transformed_feature), scorer.predict_proba(transformed_feature)
+
+    def get_feature_engineer(self) -> Optional[FeatureEngineer]:
+        """
+        Fitted cleaning steps of the model, None for models pickled before they were stored with it
+        """
+        return getattr(self, 'feature_engineer', None)
+
+    def get_encoder(self) -> Optional[CompiledEncoder]:
+        """
+        Compiled single-record encoder for the preprocessing object, built on first
+        use (None if the preprocessor structure is not supported)
+        """
+        if not hasattr(self, '_compiled_encoder'):
+            self._compiled_encoder = CompiledEncoder.from_preprocessor(self.preprocessing_object)
+        return self._compiled_encoder
+
+    def predict_records_with_proba(self, records: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Same as predict_with_proba for preprocessed records (dicts keyed by column
+        name), encoded without pandas when the preprocessor could be compiled
+        """
+        try:
+            encoder = self.get_encoder()
+            if encoder is None:
+                return self.predict_with_proba(pd.DataFrame(records))
+            with time_stage(PREPROCESS):
+                transformed_feature = encoder.encode(records[0]) if len(records) == 1 else encoder.encode_many(records)
+            return self._predict_features_with_proba(transformed_feature)
+        except Exception as e:
+            logger.error('Error occurred in predict_records_with_proba method', exc_info=True)
+            raise MyException(e, sys) from e
+
+    def __getstate__(self) -> dict:
+        # the compiled encoder is derived from preprocessing_object, never pickle it
+        state = self.__dict__.copy()
+        state.pop('_compiled_encoder', None)
+        state.pop('_compile_attempted', None)
+        return state
+
     def __repr__(self) -> str:
         return f"{type(self.trained_model_object).__name__}()"
     
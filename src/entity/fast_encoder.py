@@ -0,0 +1,135 @@
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.exception import MyException
+from src.logger import logging
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+class CompiledEncoder:
+    """
+    Pandas-free equivalent of a fitted preprocessing ColumnTransformer for
+    single records: the imputer statistics and a category -> output column
+    dict per one-hot feature are read once from the fitted objects, and a
+    record (dict keyed by column name) is written straight into a
+    preallocated feature vector.
+
+    Only the structures built by DataTransformation are supported (median /
+    most_frequent imputers, optionally followed by a OneHotEncoder without
+    drop or infrequent categories); from_preprocessor returns None for
+    anything else so callers keep using preprocessing_object.transform.
+    """
+
+    def __init__(self, n_features: int,
+                 numeric: List[Tuple[str, int, float]],
+                 categorical: List[Tuple[str, object, Dict[object, int], bool]]):
+        """
+        :param n_features: Width of the transformed feature matrix
+        :param numeric: (column, output index, fill value) per numeric feature
+        :param categorical: (column, fill value, category -> output index, ignore unknown) per one-hot feature
+        """
+        self.n_features = n_features
+        self.numeric = numeric
+        self.categorical = categorical
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor) -> Optional['CompiledEncoder']:
+        """
+        Compiles a fitted ColumnTransformer, or returns None if its structure is not supported
+        """
+        # sklearn is only needed here, not when importing the serving app
+        from sklearn.compose import ColumnTransformer
+        from sklearn.impute import SimpleImputer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import OneHotEncoder
+
+        try:
+            if not isinstance(preprocessor, ColumnTransformer) or not hasattr(preprocessor, 'transformers_'):
+                return None
+
+            numeric, categorical = [], []
+            for name, transformer, columns in preprocessor.transformers_:
+                if isinstance(transformer, str):
+                    if transformer == 'drop' or len(columns) == 0:
+                        continue
+                    return None
+                if not isinstance(transformer, Pipeline):
+                    return None
+                steps = [step for _, step in transformer.steps if step != 'passthrough']
+                if not steps or not isinstance(steps[0], SimpleImputer):
+                    return None
+                imputer = steps[0]
+                if imputer.add_indicator or len(imputer.statistics_) != len(columns):
+                    return None
+
+                start = preprocessor.output_indices_[name].start
+                if len(steps) == 1:
+                    if imputer.strategy not in ('median', 'mean', 'constant'):
+                        return None
+                    for offset, (column, fill) in enumerate(zip(columns, imputer.statistics_)):
+                        if _is_missing(fill):
+                            return None
+                        numeric.append((column, start + offset, float(fill)))
+                elif len(steps) == 2 and isinstance(steps[1], OneHotEncoder):
+                    encoder = steps[1]
+                    if encoder.drop_idx_ is not None or getattr(encoder, 'infrequent_categories_', None):
+                        return None
+                    if encoder.handle_unknown not in ('ignore', 'error'):
+                        return None
+                    index = start
+                    for column, fill, categories in zip(columns, imputer.statistics_, encoder.categories_):
+                        lookup = {}
+                        for category in categories:
+                            lookup[category] = index
+                            index += 1
+                        categorical.append((column, fill, lookup, encoder.handle_unknown == 'ignore'))
+                else:
+                    return None
+
+            n_features = max((s.stop for s in preprocessor.output_indices_.values()), default=0)
+            return cls(n_features, numeric, categorical)
+        except Exception as e:
+            logging.warning(f"Could not compile the preprocessor, using the pandas path: {e}")
+            return None
+
+    def _fill_row(self, record: dict, row: np.ndarray) -> None:
+        for column, index, fill in self.numeric:
+            value = record.get(column)
+            row[index] = fill if _is_missing(value) else float(value)
+        for column, fill, lookup, ignore_unknown in self.categorical:
+            value = record.get(column)
+            if _is_missing(value):
+                value = fill
+            index = lookup.get(value)
+            if index is not None:
+                row[index] = 1.0
+            elif not ignore_unknown:
+                raise ValueError(f"Found unknown category {value!r} in column {column!r}")
+
+    def encode(self, record: dict) -> np.ndarray:
+        """
+        Encodes one transformed record into a (1, n_features) matrix
+        """
+        try:
+            features = np.zeros((1, self.n_features), dtype=np.float64)
+            self._fill_row(record, features[0])
+            return features
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def encode_many(self, records: List[dict]) -> np.ndarray:
+        """
+        Encodes transformed records into a (len(records), n_features) matrix
+        """
+        try:
+            features = np.zeros((len(records), self.n_features), dtype=np.float64)
+            for record, row in zip(records, features):
+                self._fill_row(record, row)
+            return features
+        except Exception as e:
+            raise MyException(e, sys)
@@ -0,0 +1,301 @@
+import sys
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+from src.exception import MyException
+
+STATUS_COLUMN = 'Working Professional or Student'
+# filled with the training means when missing
+NUMERIC_FILL_COLUMNS = ('Financial Stress', 'Satisfaction', 'Pressure')
+_STATUS_VALUES = pd.Index(['Student', 'Working Professional'], dtype=object)
+
+DIET_MAP = {
+    'More Healthy': 'Healthy',
+    'No Healthy': 'Unhealthy',
+    'Less Healthy': 'Unhealthy',
+    'Less than Healthy': 'Unhealthy'
+}
+
+SLEEP_MAP = {
+    'Less than 5 hours': 'Very Low Sleep',
+    '7-8 hours': 'High Sleep',
+    'More than 8 hours': 'Very High Sleep',
+    '5-6 hours': 'Medium Sleep',
+    '3-4 hours': 'Very Low Sleep',
+    '6-7 hours': 'Medium Sleep',
+    '8 hours': 'High Sleep',
+    '8-9 hours': 'Very High Sleep',
+    '9-11 hours': 'Very High Sleep',
+    '10-11 hours': 'Very High Sleep',
+    '9-5 hours': 'Medium Sleep'
+}
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _mode(counts: dict):
+    # most frequent value, the smallest one on ties (as pd.Series.mode)
+    if not counts:
+        return np.nan
+    top = max(counts.values())
+    return min(value for value, count in counts.items() if count == top)
+
+
+def _add_counts(counts: dict, values: pd.Series) -> None:
+    # adds the occurrences of the values present (a categorical also counts its unused categories)
+    for value, count in values.value_counts().items():
+        if count > 0:
+            counts[value] = counts.get(value, 0) + int(count)
+
+
+def _is_categorical(values: pd.Series) -> bool:
+    return isinstance(values.dtype, pd.CategoricalDtype)
+
+
+class FeatureEngineer(BaseEstimator, TransformerMixin):
+    """
+    The cleaning steps of the project as one fitted transformer: merges the
+    Job/Study Satisfaction and Work/Academic Pressure columns, fills CGPA,
+    Profession and the numeric columns, and folds rare City / Degree /
+    Dietary Habits values. Every statistic (student CGPA mean, numeric means,
+    kept categories, modes) is learned by fit on the training rows only, so a
+    row is transformed the same way whatever else is in its batch, in
+    training and in serving.
+    """
+
+    def __init__(self, city_min_count: int = 10, degree_min_count: int = 5, diet_min_count: int = 3,
+                 rare_value: str = 'other', default_profession: str = 'Teacher', default_degree: str = 'B.Ed'):
+        """
+        :param city_min_count: Cities seen fewer times in training become rare_value
+        :param degree_min_count: Degrees seen fewer times in training become rare_value
+        :param diet_min_count: Dietary habits seen fewer times in training become the most frequent one
+        :param rare_value: Category the rare cities and degrees are folded into
+        :param default_profession: Profession of the non students without one
+        :param default_degree: Degree of the rows without one
+        """
+        self.city_min_count = city_min_count
+        self.degree_min_count = degree_min_count
+        self.diet_min_count = diet_min_count
+        self.rare_value = rare_value
+        self.default_profession = default_profession
+        self.default_degree = default_degree
+
+    @staticmethod
+    def _combine(df: pd.DataFrame) -> pd.DataFrame:
+        # first column of each pair wins, the merged column is appended at the end
+        if 'Job Satisfaction' in df.columns and 'Study Satisfaction' in df.columns:
+            df['Satisfaction'] = df['Job Satisfaction'].fillna(df['Study Satisfaction'])
+            df = df.drop(columns=['Job Satisfaction', 'Study Satisfaction'])
+        if 'Work Pressure' in df.columns and 'Academic Pressure' in df.columns:
+            df['Pressure'] = df['Work Pressure'].fillna(df['Academic Pressure'])
+            df = df.drop(columns=['Work Pressure', 'Academic Pressure'])
+        return df
+
+    def fit(self, X: pd.DataFrame, y=None) -> 'FeatureEngineer':
+        """
+        Learns the fill values and the category lookup tables from the raw training rows
+        """
+        for attribute in ('sums_', 'value_counts_'):
+            if hasattr(self, attribute):
+                delattr(self, attribute)
+        return self.partial_fit(X)
+
+    def partial_fit(self, X: pd.DataFrame, y=None) -> 'FeatureEngineer':
+        """
+        Adds the raw training rows of X to the sums and value counts learned so
+        far and recomputes the fill values and lookup tables from them, so a
+        training set read in chunks is learned as if read in one go
+        """
+        try:
+            df = self._combine(X.copy())
+            if not hasattr(self, 'sums_'):
+                # statistic -> [sum, count] of the non missing values
+                self.sums_ = {}
+                # column -> value -> occurrences
+                self.value_counts_ = {'City': {}, 'Degree': {}, 'Dietary Habits': {}, 'Sleep Duration': {}}
+                self.n_features_in_ = X.shape[1]
+                self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+
+            students = df[STATUS_COLUMN] == 'Student'
+            self._add_sum('student CGPA', df.loc[students, 'CGPA'])
+            for column in NUMERIC_FILL_COLUMNS:
+                if column in df.columns:
+                    self._add_sum(column, df[column])
+
+            _add_counts(self.value_counts_['City'], df['City'])
+            _add_counts(self.value_counts_['Degree'], df['Degree'])
+            # missing degrees count as default_degree
+            degree_counts = self.value_counts_['Degree']
+            degree_counts[self.default_degree] = (degree_counts.get(self.default_degree, 0)
+                                                  + int(df['Degree'].isna().sum()))
+            _add_counts(self.value_counts_['Dietary Habits'], df['Dietary Habits'])
+            _add_counts(self.value_counts_['Sleep Duration'], df['Sleep Duration'].map(SLEEP_MAP))
+
+            self._learn()
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _add_sum(self, name: str, values: pd.Series) -> None:
+        total = self.sums_.setdefault(name, [0.0, 0])
+        # summed in float64 whatever the column dtype, float32 sums drift with the chunking
+        total[0] += float(np.nansum(values.to_numpy(dtype=np.float64, na_value=np.nan)))
+        total[1] += int(values.count())
+
+    def _mean(self, name: str) -> float:
+        total, count = self.sums_[name]
+        return total / count if count else np.nan
+
+    def _learn(self) -> None:
+        self.student_cgpa_mean_ = self._mean('student CGPA')
+        self.numeric_means_ = {column: self._mean(column) for column in NUMERIC_FILL_COLUMNS if column in self.sums_}
+
+        counts = self.value_counts_
+        cities = [city for city, count in counts['City'].items() if count >= self.city_min_count]
+        degrees = [degree for degree, count in counts['Degree'].items() if count >= self.degree_min_count]
+        diets = [diet for diet, count in counts['Dietary Habits'].items() if count >= self.diet_min_count]
+        diet_mode = _mode(counts['Dietary Habits'])
+        sleep_mode = _mode(counts['Sleep Duration'])
+
+        # column -> (value -> cleaned value, value of missing entries, value of unknown ones)
+        self.lookup_tables_ = {
+            'City': ({city: city for city in cities}, self.rare_value, self.rare_value),
+            'Dietary Habits': ({**{diet: diet for diet in diets}, **DIET_MAP}, diet_mode, diet_mode),
+            'Degree': ({degree: degree for degree in degrees},
+                       self.default_degree if self.default_degree in degrees else self.rare_value,
+                       self.rare_value),
+            'Sleep Duration': (dict(SLEEP_MAP), sleep_mode, sleep_mode),
+        }
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns the cleaned copy of X; every column is read once, and every
+        category column is cleaned with a single hash lookup per value.
+        Categorical columns (see read_csv in main_utils) are cleaned per
+        category and stay categorical, float32 columns stay float32.
+        """
+        check_is_fitted(self, 'lookup_tables_')
+        try:
+            df = self._combine(X.drop(columns=[column for column in ('Name', 'id') if column in X.columns]))
+            students, professionals = self._status_masks(df)
+            self._fill_cgpa(df, students, professionals)
+            self._fill_numeric(df)
+            self._fill_profession(df, students)
+            for column in self.lookup_tables_:
+                self._map_column(df, column)
+            return df
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def _status_masks(df: pd.DataFrame):
+        # one pass over the column for both masks: 0 = Student, 1 = Working Professional, -1 = other / missing
+        status = df[STATUS_COLUMN]
+        if _is_categorical(status):
+            # code of each category, then of each row through the category codes (-1, missing, takes the last)
+            codes = np.append(_STATUS_VALUES.get_indexer(status.cat.categories), -1)[status.cat.codes.to_numpy()]
+        else:
+            codes = _STATUS_VALUES.get_indexer(status)
+        return codes == 0, codes == 1
+
+    def _fill_cgpa(self, df: pd.DataFrame, students: np.ndarray, professionals: np.ndarray) -> None:
+        dtype = df['CGPA'].dtype if pd.api.types.is_float_dtype(df['CGPA']) else np.float64
+        cgpa = df['CGPA'].to_numpy(dtype=dtype, copy=True)
+        missing = np.isnan(cgpa)
+        cgpa[missing & professionals] = 0
+        cgpa[missing & students] = self.student_cgpa_mean_
+        df['CGPA'] = cgpa
+
+    def _fill_numeric(self, df: pd.DataFrame) -> None:
+        for column, mean in self.numeric_means_.items():
+            if column in df.columns:
+                df[column] = df[column].fillna(mean)
+
+    def _fill_profession(self, df: pd.DataFrame, students: np.ndarray) -> None:
+        if _is_categorical(df['Profession']):
+            fills = [self.default_profession, 'Student']
+            profession = df['Profession'].cat.add_categories(
+                [value for value in dict.fromkeys(fills) if value not in df['Profession'].cat.categories])
+            categories = profession.cat.categories
+            codes = profession.cat.codes.to_numpy().copy()
+            missing = codes == -1
+            codes[missing] = categories.get_loc(self.default_profession)
+            codes[missing & students] = categories.get_loc('Student')
+            df['Profession'] = pd.Series(pd.Categorical.from_codes(codes, categories), index=df.index)
+            return
+        profession = df['Profession'].to_numpy(dtype=object, copy=True)
+        missing = pd.isna(profession)
+        profession[missing] = self.default_profession
+        profession[missing & students] = 'Student'
+        df['Profession'] = pd.Series(profession, index=df.index, dtype=object)
+
+    def _map_column(self, df: pd.DataFrame, column: str) -> None:
+        mapping, missing, unknown = self.lookup_tables_[column]
+        # position of each value among the table keys (NaN last, -1 if unknown) indexes the cleaned values
+        keys = pd.Index([*mapping, np.nan], dtype=object)
+        cleaned = np.array([*mapping.values(), missing, unknown], dtype=object)
+        values = df[column]
+        if _is_categorical(values):
+            # clean the categories, then re-code the rows: code -1 (missing) takes the appended last entry
+            cleaned_categories = np.append(cleaned[keys.get_indexer(values.cat.categories)], missing)
+            codes, categories = pd.factorize(cleaned_categories)
+            df[column] = pd.Series(pd.Categorical.from_codes(codes[values.cat.codes.to_numpy()], categories),
+                                   index=df.index)
+            return
+        # get_indexer only matches NaN to the NaN key, None (omitted request fields) is set apart
+        positions = keys.get_indexer(values)
+        positions[pd.isna(values).to_numpy()] = len(mapping)
+        # object Series: assigning the bare array would re-infer a string dtype value by value
+        df[column] = pd.Series(cleaned[positions], index=df.index, dtype=object)
+
+    def transform_record(self, record: dict) -> dict:
+        """
+        Same result as transform() for a single row given as a dict keyed by
+        dataset column names, without building a DataFrame
+        """
+        try:
+            row = {column: value for column, value in record.items() if column not in ('Name', 'id')}
+
+            if 'Job Satisfaction' in row and 'Study Satisfaction' in row:
+                job, study = row.pop('Job Satisfaction'), row.pop('Study Satisfaction')
+                row['Satisfaction'] = study if _is_missing(job) else job
+            if 'Work Pressure' in row and 'Academic Pressure' in row:
+                work, academic = row.pop('Work Pressure'), row.pop('Academic Pressure')
+                row['Pressure'] = academic if _is_missing(work) else work
+
+            status = row.get(STATUS_COLUMN)
+            if _is_missing(row.get('CGPA')):
+                if status == 'Working Professional':
+                    row['CGPA'] = 0.0
+                elif status == 'Student':
+                    row['CGPA'] = self.student_cgpa_mean_
+
+            for column, mean in self.numeric_means_.items():
+                if column in row and _is_missing(row[column]):
+                    row[column] = mean
+
+            if _is_missing(row.get('Profession')):
+                row['Profession'] = 'Student' if status == 'Student' else self.default_profession
+
+            for column, (mapping, missing, unknown) in self.lookup_tables_.items():
+                value = row.get(column)
+                row[column] = missing if _is_missing(value) else mapping.get(value, unknown)
+            return row
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_feature_names_out(self, input_features: Optional[list] = None) -> np.ndarray:
+        check_is_fitted(self, 'lookup_tables_')
+        columns = list(input_features if input_features is not None else self.feature_names_in_)
+        names = [column for column in columns if column not in ('Name', 'id')]
+        for merged, pair in (('Satisfaction', ('Job Satisfaction', 'Study Satisfaction')),
+                             ('Pressure', ('Work Pressure', 'Academic Pressure'))):
+            if all(column in names for column in pair):
+                names = [column for column in names if column not in pair] + [merged]
+        return np.asarray(names, dtype=object)
@@ -0,0 +1,175 @@
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from src.cloud_storage.model_disk_cache import ModelDiskCache
+from src.entity.estimator import MyModel
+from src.entity.s3_estimator import ProjEstimator
+from src.exception import MyException
+from src.logger import logging
+from src.metrics import REGISTRY
+from src.metrics.stages import MODEL_LOAD, time_stage
+
+MODEL_CACHE_HITS = REGISTRY.counter('model_cache_hits_total',
+                                    'Predictions served by the resident model without loading it')
+MODEL_CACHE_MISSES = REGISTRY.counter('model_cache_misses_total',
+                                      'Model lookups that had to load the model from storage')
+MODEL_LOADS = REGISTRY.counter('model_loads_total', 'Number of times the model was loaded from storage')
+MODEL_LOAD_SECONDS = REGISTRY.histogram('model_load_seconds', 'Time spent loading the model from storage',
+                                        buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+MODEL_SWAPS = REGISTRY.counter('model_swaps_total', 'Number of times a new model version was made live')
+
+
+class ModelHolder:
+    """
+    Process-wide holder of the production model.
+    The model is loaded from s3 once (at startup or on first use) and the same
+    MyModel instance is handed to every request afterwards.
+    """
+    _instances: Dict[Tuple[str, str], "ModelHolder"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, bucket_name: str, model_path: str, model_cache: Optional[ModelDiskCache] = None):
+        """
+        :param bucket_name: Name of the model bucket
+        :param model_path: Location of the model in bucket
+        :param model_cache: Optional local disk cache used when loading the model
+        """
+        self.bucket_name = bucket_name
+        self.model_path = model_path
+        self.model_cache = model_cache
+        # (model, version) swapped as one reference so readers never see a mix
+        self._live: Optional[Tuple[MyModel, Optional[str]]] = None
+        self._estimator: Optional[ProjEstimator] = None
+        self._load_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, bucket_name: str, model_path: str,
+                     model_cache: Optional[ModelDiskCache] = None) -> "ModelHolder":
+        """
+        Returns the shared holder for bucket/model_path, so every predictor of
+        the process uses the same resident model. model_cache is only used
+        when the holder is created.
+        """
+        key = (bucket_name, model_path)
+        holder = cls._instances.get(key)
+        if holder is None:
+            with cls._instances_lock:
+                holder = cls._instances.get(key)
+                if holder is None:
+                    holder = cls(bucket_name=bucket_name, model_path=model_path, model_cache=model_cache)
+                    cls._instances[key] = holder
+        return holder
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._live is not None
+
+    @property
+    def version(self) -> Optional[str]:
+        """
+        ETag of the resident model (None if unknown)
+        """
+        live = self._live
+        return live[1] if live is not None else None
+
+    @property
+    def estimator(self) -> ProjEstimator:
+        if self._estimator is None:
+            self._estimator = ProjEstimator(bucket_name=self.bucket_name, model_path=self.model_path,
+                                            model_cache=self.model_cache)
+        return self._estimator
+
+    def get_remote_version(self) -> Optional[str]:
+        return self.estimator.get_model_version()
+
+    def _load_from_storage(self) -> Tuple[MyModel, Optional[str]]:
+        start = time.perf_counter()
+        # read the version first: if a push lands in between we load the newer
+        # model and the next refresh check simply loads it once more
+        with time_stage(MODEL_LOAD):
+            version = self.get_remote_version()
+            model = self.estimator.load_model(version=version)
+        elapsed = time.perf_counter() - start
+        MODEL_LOADS.inc()
+        MODEL_LOAD_SECONDS.observe(elapsed)
+        logging.info(f"Loaded model {model} (version {version}) from "
+                     f"s3://{self.bucket_name}/{self.model_path} in {elapsed:.3f}s")
+        return model, version
+
+    def swap(self, model: MyModel, version: Optional[str]) -> None:
+        """
+        Atomically make a new model live. Requests that already hold a reference
+        to the previous model finish with it.
+        """
+        # compile the single-record encoder (and the ensemble of models pickled
+        # without one) before the model serves traffic
+        model.get_encoder()
+        model.get_scorer()
+        self._live = (model, version)
+        MODEL_SWAPS.inc()
+        logging.info(f"Model version {version} is now live")
+
+    def load(self, force: bool = False) -> MyModel:
+        """
+        Load the model into memory. Without force, an already resident model is kept.
+        """
+        try:
+            with self._load_lock:
+                if self._live is None or force:
+                    model, version = self._load_from_storage()
+                    self.swap(model, version)
+                return self._live[0]
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def reload_if_changed(self) -> bool:
+        """
+        Compare the remote ETag with the resident version and load the new model
+        only when it changed. The download and unpickling happen on the caller's
+        thread; the swap itself is a single reference assignment.
+
+        :return: True if a new model was made live
+        """
+        try:
+            remote_version = self.get_remote_version()
+            if remote_version is None or (self.is_loaded and remote_version == self.version):
+                return False
+
+            with self._load_lock:
+                if self.is_loaded and remote_version == self.version:
+                    return False
+                model, version = self._load_from_storage()
+                self.swap(model, version)
+            return True
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_live(self) -> Tuple[MyModel, Optional[str]]:
+        """
+        Returns the resident (model, version) pair, loading the model only if
+        nothing was loaded yet
+        """
+        live = self._live
+        if live is not None:
+            MODEL_CACHE_HITS.inc()
+            return live
+
+        MODEL_CACHE_MISSES.inc()
+        logging.warning('Model requested before it was resident; loading it on the request path')
+        self.load()
+        return self._live
+
+    def get_model(self) -> MyModel:
+        return self.get_live()[0]
+
+    def stats(self) -> dict:
+        return {
+            'loaded': self.is_loaded,
+            'version': self.version,
+            'hits': MODEL_CACHE_HITS.value,
+            'misses': MODEL_CACHE_MISSES.value,
+            'loads': MODEL_LOADS.value,
+            'load_seconds_total': MODEL_LOAD_SECONDS.sum,
+        }
@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Optional
+
+from src.entity.model_holder import ModelHolder
+from src.logger import logging
+from src.metrics import REGISTRY
+
+MODEL_REFRESH_CHECKS = REGISTRY.counter('model_refresh_checks_total', 'ETag checks done by the model refresher')
+MODEL_RELOADS = REGISTRY.counter('model_reloads_total', 'New model versions loaded by the refresher')
+MODEL_RELOAD_FAILURES = REGISTRY.counter('model_reload_failures_total',
+                                         'Failed ETag checks or reloads in the model refresher')
+MODEL_RELOAD_SECONDS = REGISTRY.histogram('model_reload_seconds',
+                                          'Time from detecting a new ETag to the new model being live',
+                                          buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+
+
+class ModelRefresher:
+    """
+    Background thread that polls the ETag of the model object and hot-swaps the
+    model in the ModelHolder when a new one has been pushed.
+    """
+    def __init__(self, model_holder: ModelHolder, interval: float):
+        """
+        :param model_holder: Holder of the live model
+        :param interval: Seconds between two ETag checks
+        """
+        self.model_holder = model_holder
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def check_once(self) -> bool:
+        """
+        Runs one ETag check (and reload if needed).
+
+        :return: True if a new model was made live
+        """
+        MODEL_REFRESH_CHECKS.inc()
+        start = time.perf_counter()
+        try:
+            reloaded = self.model_holder.reload_if_changed()
+        except Exception as e:
+            MODEL_RELOAD_FAILURES.inc()
+            logging.error(f"Model refresh failed, keeping version {self.model_holder.version}: {e}")
+            return False
+
+        if reloaded:
+            MODEL_RELOADS.inc()
+            MODEL_RELOAD_SECONDS.observe(time.perf_counter() - start)
+        return reloaded
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.check_once()
+
+    def start(self) -> None:
+        if self.interval <= 0 or self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='model-refresher', daemon=True)
+        self._thread.start()
+        logging.info(f"Model refresher started, checking every {self.interval}s")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -1,7 +1,11 @@
-from src.cloud_storage.aws_storage import SimpleStorageService
+from src.cloud_storage.storage_factory import get_storage_service
+from src.cloud_storage.model_disk_cache import ModelDiskCache
 from src.exception import MyException
 from src.entity.estimator import MyModel
+from src.logger import logging
+from typing import Optional
 import sys
+import pickle
 import pandas as pd
 
 class ProjEstimator:
@@ -9,14 +13,17 @@ class ProjEstimator:
     This class is used to save and retrieve our model from s3 bucket and to do prediction
     """
 
-    def __init__(self, bucket_name, model_path):
+    def __init__(self, bucket_name, model_path, storage=None, model_cache: Optional[ModelDiskCache] = None):
         """
         :param bucket_name: Name of the model bucket
         :param model_path: Location of the model in bucket
+        :param storage: Storage service, by default the one selected by MODEL_STORAGE_BACKEND
+        :param model_cache: Optional local disk cache of downloaded models
         """
         self.bucket_name = bucket_name
-        self.s3 = SimpleStorageService()
+        self.s3 = storage if storage is not None else get_storage_service()
         self.model_path = model_path
+        self.model_cache = model_cache
         self.loaded_model: MyModel = None
     
     def is_model_present(self, model_path):
@@ -26,11 +33,38 @@ class ProjEstimator:
             print(e)
             return False
     
-    def load_model(self, ):
+    def get_model_version(self):
         """
-        Load the model from the model_path
+        Returns the ETag of the model object, used to detect a newly pushed model
         """
-        return self.s3.load_model(self.model_path, bucket_name=self.bucket_name)
+        return self.s3.get_object_etag(bucket_name=self.bucket_name, s3_key=self.model_path)
+
+    def load_model(self, version: Optional[str] = None):
+        """
+        Load the model from the model_path.
+        With a model cache, the model is read from local disk when the cached
+        copy has the same ETag as the remote object and downloaded only on a miss.
+        :param version: ETag of the remote object if the caller already fetched it
+        """
+        try:
+            if self.model_cache is None:
+                return self.s3.load_model(self.model_path, bucket_name=self.bucket_name)
+
+            if version is None:
+                version = self.get_model_version()
+            if version is None:
+                raise Exception(f"Model {self.model_path} not found in bucket {self.bucket_name}")
+
+            model_bytes = self.model_cache.get(self.bucket_name, self.model_path, version)
+            if model_bytes is None:
+                logging.info(f"Model version {version} not in local cache, downloading it")
+                model_bytes = self.s3.get_object_bytes(bucket_name=self.bucket_name, s3_key=self.model_path)
+                self.model_cache.put(self.bucket_name, self.model_path, version, model_bytes)
+            else:
+                logging.info(f"Model version {version} loaded from local cache")
+            return pickle.loads(model_bytes)
+        except Exception as e:
+            raise MyException(e, sys) from e
     
     def save_model(self, from_file, remove: bool = False) -> None:
         """
@@ -1,6 +1,11 @@
+import atexit
+import itertools
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, TextIO
 from from_root import from_root
 from datetime import datetime
 
@@ -10,35 +15,165 @@ LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 MAX_LOG_SIZE = 5 * 1024 * 1024  # 5 MB
 BACKUP_COUNT = 3  # Number of backup log files to keep
 
+# Levels of the log file and of the console
+DEFAULT_LOG_LEVEL = 'DEBUG'
+DEFAULT_LOG_CONSOLE_LEVEL = 'INFO'
+LOG_LEVEL = os.getenv('LOG_LEVEL', DEFAULT_LOG_LEVEL).upper()
+LOG_CONSOLE_LEVEL = os.getenv('LOG_CONSOLE_LEVEL', DEFAULT_LOG_CONSOLE_LEVEL).upper()
+# Per logger levels, e.g. "src.entity.estimator=WARNING,botocore=INFO"
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+# Per logger sampling of records below WARNING (rate 0.01 keeps one record in 100),
+# by default for the loggers of the prediction hot path
+DEFAULT_LOG_SAMPLE_RATES = ('src.pipeline.prediction_pipeline=0.01,'
+                            'src.pipeline.prediction_transformer=0.01,'
+                            'src.entity.estimator=0.01')
+LOG_SAMPLE_RATES = os.getenv('LOG_SAMPLE_RATES', DEFAULT_LOG_SAMPLE_RATES)
+
 # Construct log file path
 log_dir_path = os.path.join(from_root(), LOG_DIR)
 os.makedirs(log_dir_path, exist_ok=True)
 log_file_path = os.path.join(log_dir_path, LOG_FILE)
 
-def configure_logger():
+# Writer thread draining the queue into the file and console handlers
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_sampled_loggers: List[logging.Logger] = []
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every round(1 / rate) records below WARNING (none if rate is 0);
+    warnings and errors always pass
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.every == 0:
+            return False
+        return next(self._counter) % self.every == 0
+
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    # "a=1,b=2" -> {'a': '1', 'b': '2'}
+    pairs = (item.split('=', 1) for item in value.split(',') if '=' in item)
+    return {name.strip(): setting.strip() for name, setting in pairs}
+
+
+def _level(value: str, default: str, problems: List[str]) -> int:
+    # getLevelName returns the string "Level X" for an unknown name
+    level = logging.getLevelName(value.upper())
+    if isinstance(level, int):
+        return level
+    problems.append(f"Unknown log level {value!r}, using {default}")
+    return logging.getLevelName(default)
+
+
+def _sample_rate(name: str, value: str, problems: List[str]) -> Optional[float]:
+    # a malformed rate falls back to the default one of the logger (no sampling without one)
+    try:
+        rate = float(value)
+        if 0 <= rate <= 1:
+            return rate
+    except ValueError:
+        pass
+    default = _parse_pairs(DEFAULT_LOG_SAMPLE_RATES).get(name)
+    problems.append(f"Invalid log sample rate {value!r} for {name}, using {default or 'no sampling'}")
+    return float(default) if default is not None else None
+
+
+def _start_listener(handlers: List[logging.Handler]) -> None:
+    global _listener
+    _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    """
+    Write out the queued records and stop the writer thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_listener_after_fork() -> None:
+    # the writer thread does not survive a fork; the child gets a fresh queue and thread
+    if _listener is not None:
+        handlers = list(_listener.handlers)
+        _queue_handler.queue = queue.SimpleQueue()
+        _start_listener(handlers)
+
+
+def configure_logger(file_path: str = log_file_path, stream: Optional[TextIO] = None):
     """
     Configures logging with a rotating file handler and a console handler.
+    Loggers only put records on a queue; a QueueListener thread formats and
+    writes them, so no file or console write happens on the caller's thread.
     """
+    global _queue_handler
     # Create a custom logger
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
-    
+
+    # Calling again (e.g. from a benchmark) replaces the previous configuration
+    _stop_listener()
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+    for sampled in _sampled_loggers:
+        for existing in [f for f in sampled.filters if isinstance(f, SamplingFilter)]:
+            sampled.removeFilter(existing)
+    _sampled_loggers.clear()
+
+    # settings that can't be used, logged once the handlers are in place
+    problems: List[str] = []
+    file_level = _level(LOG_LEVEL, DEFAULT_LOG_LEVEL, problems)
+    console_level = _level(LOG_CONSOLE_LEVEL, DEFAULT_LOG_CONSOLE_LEVEL, problems)
+    # records no handler would write are not even created
+    logger.setLevel(min(file_level, console_level))
+
     # Define formatter
     formatter = logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
 
     # File handler with rotation
-    file_handler = RotatingFileHandler(log_file_path, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
+    # delay: the file is only created by the first record, not by importing the logger
+    file_handler = RotatingFileHandler(file_path, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT, delay=True)
     file_handler.setFormatter(formatter)
-    file_handler.setLevel(logging.DEBUG)
-    
+    file_handler.setLevel(file_level)
+
     # Console handler
-    console_handler = logging.StreamHandler()
+    console_handler = logging.StreamHandler(stream or sys.stderr)
     console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.INFO)
-    
+    console_handler.setLevel(console_level)
+
+    # Per logger levels and sampling
+    for name, level in _parse_pairs(LOG_LEVELS).items():
+        if isinstance(logging.getLevelName(level.upper()), int):
+            logging.getLogger(name).setLevel(level.upper())
+        else:
+            problems.append(f"Unknown log level {level!r} for {name}, leaving it unset")
+    for name, value in _parse_pairs(LOG_SAMPLE_RATES).items():
+        rate = _sample_rate(name, value, problems)
+        if rate is None:
+            continue
+        sampled = logging.getLogger(name)
+        sampled.addFilter(SamplingFilter(rate))
+        _sampled_loggers.append(sampled)
+
     # Add handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    _queue_handler = QueueHandler(queue.SimpleQueue())
+    logger.addHandler(_queue_handler)
+    _start_listener([file_handler, console_handler])
+    for problem in problems:
+        logger.warning(problem)
+
 
 # Configure the logger
-configure_logger()
\ No newline at end of file
+configure_logger()
+atexit.register(_stop_listener)
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
@@ -0,0 +1,283 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds (1ms .. 10s)
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label_value(value)}"' for key, value in labels.items()) + '}'
+
+
+class Timer:
+    """
+    Context manager observing the elapsed time of its block into a histogram,
+    and counting the block as an error if it raised
+    """
+    __slots__ = ('histogram', 'errors', '_start')
+
+    def __init__(self, histogram: 'Histogram', errors: Optional['Counter'] = None):
+        self.histogram = histogram
+        self.errors = errors
+        self._start = 0.0
+
+    def __enter__(self) -> 'Timer':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.histogram.observe(time.perf_counter() - self._start)
+        if exc_type is not None and self.errors is not None:
+            self.errors.inc()
+
+
+class Counter:
+    """
+    Monotonically increasing counter
+    """
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> dict:
+        return {'type': 'counter', 'value': self._value}
+
+    def render(self, name: str, labels: Dict[str, str]) -> List[str]:
+        return [f"{name}{_format_labels(labels)} {_format_value(self._value)}"]
+
+
+class Gauge:
+    """
+    Value that can go up and down (queue depth, entries in a cache, ...)
+    """
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> dict:
+        return {'type': 'gauge', 'value': self._value}
+
+    def render(self, name: str, labels: Dict[str, str]) -> List[str]:
+        return [f"{name}{_format_labels(labels)} {_format_value(self._value)}"]
+
+
+class Histogram:
+    """
+    Cumulative bucket histogram (prometheus style)
+    """
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._counts: List[int] = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def time(self, errors: Optional[Counter] = None) -> Timer:
+        """
+        with histogram.time(): ... observes the duration of the block
+        """
+        return Timer(self, errors)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative[bound] = running
+        cumulative['+Inf'] = count
+        return {'type': 'histogram', 'buckets': cumulative, 'sum': total, 'count': count}
+
+    def render(self, name: str, labels: Dict[str, str]) -> List[str]:
+        snapshot = self.snapshot()
+        lines = []
+        for bound, count in snapshot['buckets'].items():
+            le = bound if bound == '+Inf' else _format_value(bound)
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+        lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+        return lines
+
+
+class MetricFamily:
+    """
+    Metric with label dimensions: one child metric (Counter, Gauge or Histogram)
+    per combination of label values, created on first use
+    """
+    def __init__(self, metric_cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        self.metric_cls = metric_cls
+        self.type_name = metric_cls.type_name
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._kwargs = kwargs
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **labels):
+        """
+        Child metric for the given label values (positional in labelnames order, or by name)
+        """
+        if labels:
+            values = tuple(labels[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}, got {key}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self.metric_cls(self.name, self.documentation, **self._kwargs)
+                    self._children[key] = child
+        return child
+
+    def _items(self) -> List[Tuple[Dict[str, str], object]]:
+        with self._lock:
+            children = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in children]
+
+    def snapshot(self) -> dict:
+        return {
+            'type': self.type_name,
+            'labels': list(self.labelnames),
+            'children': [{'labels': labels, **child.snapshot()} for labels, child in self._items()]
+        }
+
+    def render(self, name: str, labels: Dict[str, str]) -> List[str]:
+        lines = []
+        for child_labels, child in self._items():
+            lines.extend(child.render(name, {**labels, **child_labels}))
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Keeps every metric of the process so it can be exported from one place
+    """
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                if labelnames:
+                    metric = MetricFamily(cls, name, documentation, labelnames, **kwargs)
+                else:
+                    metric = cls(name, documentation, **kwargs)
+                self._metrics[name] = metric
+            elif metric.type_name != cls.type_name or tuple(labelnames) != getattr(metric, 'labelnames', ()):
+                raise ValueError(f"Metric '{name}' already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str,
+                  buckets: Optional[Sequence[float]] = None, labelnames: Sequence[str] = ()) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames,
+                                   buckets=buckets or DEFAULT_LATENCY_BUCKETS)
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def render_text(self) -> str:
+        """
+        Every metric in the prometheus text exposition format (version 0.0.4)
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            documentation = metric.documentation.replace('\\', '\\\\').replace('\n', '\\n')
+            lines.append(f"# HELP {metric.name} {documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render(metric.name, {}))
+        return '\n'.join(lines) + '\n'
+
+
+# content type of render_text()
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Process wide registry
+REGISTRY = MetricsRegistry()
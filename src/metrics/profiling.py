@@ -0,0 +1,260 @@
+import hmac
+import itertools
+import os
+import random
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from src.logger import logging
+from src.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# header carrying the admin token: profiles the request it is sent with, and authorizes /admin/profiles
+ADMIN_TOKEN_HEADER = 'x-admin-token'
+# response header with the name of the profile taken of the request
+PROFILE_ID_HEADER = 'x-profile-id'
+PROFILE_SUFFIX = '.folded'
+
+_PROFILE_NAME = re.compile(r'^[\w.-]+\.folded$')
+_STDLIB = sysconfig.get_paths()['stdlib'] + os.sep
+
+PROFILES_TOTAL = REGISTRY.counter('request_profiles_total', 'Requests profiled, by what asked for the profile',
+                                  labelnames=('trigger',))
+PROFILES_SKIPPED = REGISTRY.counter('request_profiles_skipped_total',
+                                    'Profiles not taken because another request was being profiled')
+
+
+def _short_path(filename: str) -> str:
+    # site-packages/pandas/core/frame.py -> pandas/core/frame.py, .../lib/python3.11/queue.py -> queue.py,
+    # repo files relative to the repo
+    for marker in ('site-packages' + os.sep, 'dist-packages' + os.sep):
+        if marker in filename:
+            return filename.rsplit(marker, 1)[1]
+    if filename.startswith(_STDLIB):
+        return filename[len(_STDLIB):]
+    cwd = os.getcwd() + os.sep
+    return filename[len(cwd):] if filename.startswith(cwd) else filename
+
+
+class StackSampler:
+    """
+    Background thread recording the call stack of every other thread of the
+    process at a fixed interval. Scoring runs on executor threads and model
+    downloads on the refresher thread, so sampling all threads shows where a
+    request spent its time whichever thread did the work.
+    """
+
+    def __init__(self, interval: float, max_seconds: float):
+        """
+        :param interval: Seconds between two samples
+        :param max_seconds: Sampling stops after this long even if not stopped
+        """
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f'thread-{ident}'))
+            # collapsed stack format: root first, frames separated by ';'
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self, on_done=None) -> None:
+        self.started = time.perf_counter()
+        deadline = self.started + self.max_seconds
+        while True:
+            self.sample()
+            if self._stop.wait(self.interval) or time.perf_counter() >= deadline:
+                break
+        self.elapsed = time.perf_counter() - self.started
+        if on_done is not None:
+            on_done(self)
+
+    def start(self, on_done=None) -> None:
+        self._thread = threading.Thread(target=self.run, args=(on_done,), name='request-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Ask the sampling thread to finish; does not wait for it
+        """
+        self._stop.set()
+
+
+class RequestProfiler:
+    """
+    Profiles prediction requests on demand: the ones sent with the admin token
+    header, and a random `sample_rate` fraction of the others. One request is
+    profiled at a time (its profile also contains whatever the other requests
+    did meanwhile); the profiles are kept in `directory` as collapsed stacks
+    (flamegraph.pl / speedscope format), the oldest removed beyond `max_files`.
+    """
+
+    def __init__(self, directory: str, max_files: int, interval_ms: float, max_seconds: float,
+                 sample_rate: float = 0.0, admin_token: str = ''):
+        """
+        :param directory: Directory of the profile files
+        :param max_files: Number of profiles kept
+        :param interval_ms: Milliseconds between two stack samples
+        :param max_seconds: Longest time a request is sampled
+        :param sample_rate: Fraction of the requests profiled without being asked
+        :param admin_token: Token of the admin header, empty disables the header and the admin endpoints
+        """
+        self.directory = directory
+        self.max_files = max_files
+        self.interval = interval_ms / 1000
+        self.max_seconds = max_seconds
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token
+        self._busy = threading.Lock()
+        self._sequence = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or bool(self.admin_token)
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        if not self.admin_token or token is None:
+            return False
+        # compare_digest only takes ASCII str; header values are latin-1 decoded bytes
+        try:
+            sent = token.encode('latin-1')
+        except UnicodeEncodeError:
+            return False
+        return hmac.compare_digest(sent, self.admin_token.encode('utf-8'))
+
+    def trigger(self, headers: List[Tuple[bytes, bytes]]) -> Optional[str]:
+        """
+        Why the request with these (ASGI) headers should be profiled, None if it should not
+        """
+        if self.admin_token:
+            for name, value in headers:
+                if name == ADMIN_TOKEN_HEADER.encode() and self.is_admin(value.decode('latin-1')):
+                    return 'admin'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def begin(self, route: str, trigger: str) -> Optional[Tuple[str, StackSampler]]:
+        """
+        Start sampling for a request, returns the profile name and the sampler
+        to stop when the request is done, or None if a profile is already running
+        """
+        if not self._busy.acquire(blocking=False):
+            PROFILES_SKIPPED.inc()
+            return None
+        PROFILES_TOTAL.labels(trigger=trigger).inc()
+        slug = re.sub(r'\W+', '_', route).strip('_') or 'root'
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(self._sequence)}-{slug}{PROFILE_SUFFIX}"
+        sampler = StackSampler(self.interval, self.max_seconds)
+        sampler.start(on_done=lambda done: self._save(name, route, done))
+        return name, sampler
+
+    def _save(self, name: str, route: str, sampler: StackSampler) -> None:
+        # on the sampling thread, so the request never waits for the disk
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), 'w') as profile:
+                for stack, count in sampler.stacks.most_common():
+                    profile.write(f"{stack} {count}\n")
+            self._prune()
+            logger.info(f"Profiled {route} for {sampler.elapsed * 1000:.1f}ms "
+                        f"({sampler.samples} samples) into {name}")
+        except Exception as e:
+            logger.warning(f"Could not save the profile {name}: {e}")
+        finally:
+            self._busy.release()
+
+    def _prune(self) -> None:
+        profiles = self.list_profiles()
+        for profile in profiles[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, profile['name']))
+            except FileNotFoundError:
+                pass
+
+    def list_profiles(self) -> List[dict]:
+        """
+        Saved profiles, newest first
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.is_file() and entry.name.endswith(PROFILE_SUFFIX)]
+        except FileNotFoundError:
+            return []
+        profiles = [{'name': entry.name, 'bytes': entry.stat().st_size, 'modified': entry.stat().st_mtime}
+                    for entry in entries]
+        return sorted(profiles, key=lambda profile: profile['modified'], reverse=True)
+
+    def read_profile(self, name: str) -> Optional[str]:
+        if not _PROFILE_NAME.match(name):
+            return None
+        try:
+            with open(os.path.join(self.directory, name)) as profile:
+                return profile.read()
+        except FileNotFoundError:
+            return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling the requests to the `paths` prefixes that the
+    profiler picks, from the start of the request to the end of its response
+    body, and naming the profile in the X-Profile-Id response header.
+    Only added to the app when profiling is enabled.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, paths: Tuple[str, ...]):
+        self.app = app
+        self.profiler = profiler
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        trigger = self.profiler.trigger(scope['headers'])
+        session = self.profiler.begin(scope['path'], trigger) if trigger else None
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        name, sampler = session
+
+        async def send_with_profile_id(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = [*message.get('headers', []), (PROFILE_ID_HEADER.encode(), name.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
@@ -0,0 +1,53 @@
+import time
+from typing import Dict
+
+from src.metrics import REGISTRY, Timer
+
+# finer than DEFAULT_LATENCY_BUCKETS: most stages of a single prediction take well under a millisecond
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                 1.0, 2.5, 5.0, 10.0)
+
+# stages of the serving path
+PARSE = 'parse'
+DATAFRAME_BUILD = 'dataframe_build'
+CUSTOM_TRANSFORM = 'custom_transform'
+PREPROCESS = 'preprocess'
+PREDICT = 'predict'
+RENDER = 'render'
+MODEL_LOAD = 'model_load'
+STAGES = (PARSE, DATAFRAME_BUILD, CUSTOM_TRANSFORM, PREPROCESS, PREDICT, RENDER, MODEL_LOAD)
+
+STAGE_SECONDS = REGISTRY.histogram('serving_stage_seconds', 'Time spent in each stage of the serving path',
+                                   buckets=STAGE_BUCKETS, labelnames=('stage',))
+STAGE_ERRORS = REGISTRY.counter('serving_stage_errors_total', 'Exceptions raised by each stage of the serving path',
+                                labelnames=('stage',))
+
+# children resolved once so timing a stage is a dict lookup, not a label lookup
+_HISTOGRAMS: Dict[str, object] = {stage: STAGE_SECONDS.labels(stage) for stage in STAGES}
+_ERRORS: Dict[str, object] = {stage: STAGE_ERRORS.labels(stage) for stage in STAGES}
+
+
+def time_stage(stage: str) -> Timer:
+    """
+    with time_stage(PREPROCESS): ... records the duration of the block (and an error if it raises)
+    """
+    return Timer(_HISTOGRAMS[stage], _ERRORS[stage])
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    _HISTOGRAMS[stage].observe(seconds)
+
+
+class RequestStartMiddleware:
+    """
+    ASGI middleware storing when a request was received in request.state.received_at,
+    so handlers can observe the parse stage (body read + validation) once they start
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            scope.setdefault('state', {})['received_at'] = time.perf_counter()
+        await self.app(scope, receive, send)
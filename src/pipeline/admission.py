@@ -0,0 +1,194 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from src.logger import logging
+from src.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# request header with the client's time budget, e.g. X-Request-Deadline-Ms: 250
+DEADLINE_HEADER = 'x-request-deadline-ms'
+
+ADMISSION_IN_FLIGHT = REGISTRY.gauge('admission_in_flight', 'Prediction requests admitted and not finished')
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge('admission_queue_depth', 'Prediction requests waiting to be admitted')
+ADMISSION_REJECTED = REGISTRY.counter('admission_rejected_total',
+                                      'Prediction requests turned away by admission control, by reason',
+                                      labelnames=('reason',))
+REQUESTS_EXPIRED = REGISTRY.counter('requests_expired_total',
+                                    'Prediction work dropped because its deadline had passed, by where it was',
+                                    labelnames=('stage',))
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram('admission_wait_seconds', 'Time a request waited to be admitted',
+                                            buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                                                     0.5, 1.0, 2.5, 5.0))
+
+
+class DeadlineExceededError(Exception):
+    """
+    Raised instead of scoring work whose deadline has passed; mapped to a 503
+    """
+
+
+def check_deadline(deadline: Optional[float], stage: str) -> None:
+    """
+    Raise DeadlineExceededError if the time.monotonic() deadline has passed
+    """
+    if deadline is not None and time.monotonic() >= deadline:
+        REQUESTS_EXPIRED.labels(stage=stage).inc()
+        raise DeadlineExceededError(f"Deadline passed before {stage}")
+
+
+class AdmissionController:
+    """
+    Bounds the prediction requests being served: at most max_in_flight at a
+    time, at most max_queue more waiting for a slot (in arrival order); a
+    request arriving to a full queue is rejected at once, and one still queued
+    at its deadline is dropped. Only used from the event loop thread.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, default_deadline_ms: float = 0.0):
+        """
+        :param max_in_flight: Requests served concurrently
+        :param max_queue: Requests waiting for a slot, beyond them requests are rejected
+        :param default_deadline_ms: Time budget of requests without a deadline header, 0 for none
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.default_deadline_ms = default_deadline_ms
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def deadline(self, header_value: Optional[str]) -> Optional[float]:
+        """
+        time.monotonic() deadline of a request from its deadline header, else the default budget
+        """
+        budget_ms = self.default_deadline_ms
+        if header_value is not None:
+            try:
+                budget_ms = float(header_value)
+            except ValueError:
+                pass
+        return time.monotonic() + budget_ms / 1000 if budget_ms > 0 else None
+
+    async def acquire(self, deadline: Optional[float]) -> Optional[str]:
+        """
+        Wait for a slot; returns None once admitted (release() must follow),
+        else why the request was turned away: 'queue_full' or 'deadline_expired'
+        """
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._admitted()
+            return None
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION_REJECTED.labels(reason='queue_full').inc()
+            return 'queue_full'
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+        queued_at = time.perf_counter()
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # the client went away; hand the slot on if it was granted meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - queued_at)
+
+        if waiter.cancelled():
+            ADMISSION_REJECTED.labels(reason='deadline_expired').inc()
+            REQUESTS_EXPIRED.labels(stage='admission_queue').inc()
+            return 'deadline_expired'
+        # release() already counted this request in _in_flight
+        return None
+
+    def _admitted(self) -> None:
+        self._in_flight += 1
+        ADMISSION_IN_FLIGHT.set(self._in_flight)
+
+    def release(self) -> None:
+        # hand the slot straight to the oldest waiter still waiting
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+                return
+        self._in_flight -= 1
+        ADMISSION_IN_FLIGHT.set(self._in_flight)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware admitting the requests to the `paths` prefixes through an
+    AdmissionController before their body is read. A full queue gets a 429,
+    a deadline passed while queued a 503, both with Retry-After. Admitted
+    requests find their deadline in request.state.deadline and when they
+    arrived (time.monotonic(), before queueing) in request.state.arrived_at.
+    """
+
+    def __init__(self, app, controller: AdmissionController, paths: Tuple[str, ...], retry_after_seconds: int = 1):
+        self.app = app
+        self.controller = controller
+        self.paths = paths
+        self.retry_after = str(retry_after_seconds).encode()
+
+    async def _reject(self, send, status: int, detail: str) -> None:
+        body = json.dumps({'detail': detail}).encode()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(body)).encode()),
+                                (b'retry-after', self.retry_after)]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        arrived_at = time.monotonic()
+        header_value = None
+        for name, value in scope['headers']:
+            if name == DEADLINE_HEADER.encode():
+                header_value = value.decode('latin-1')
+                break
+        deadline = self.controller.deadline(header_value)
+
+        rejected = await self.controller.acquire(deadline)
+        if rejected == 'queue_full':
+            await self._reject(send, 429, "Too many prediction requests queued, retry shortly")
+            return
+        if rejected == 'deadline_expired':
+            await self._reject(send, 503, "Request deadline passed while queued, retry shortly")
+            return
+
+        state = scope.setdefault('state', {})
+        state['deadline'] = deadline
+        state['arrived_at'] = arrived_at
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
@@ -0,0 +1,196 @@
+"""
+Offline scoring of a CSV or Parquet file, outside the web app.
+
+    python -m src.pipeline.batch_predict input.csv predictions.csv --workers 4
+    python -m src.pipeline.batch_predict input.parquet predictions.parquet --model artifact/.../model.pkl
+
+The input has the columns of the original dataset (an 'id' column is copied to
+the output). It is read chunk by chunk and the chunks are scored by a process
+pool whose workers load the model once; results are written in input order.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+import pandas as pd
+
+from src.constants import BATCH_PREDICT_CHUNK_ROWS
+from src.entity.config_entity import DepressionPredictorConfig
+from src.entity.estimator import MyModel
+from src.exception import MyException
+from src.logger import logging
+from src.pipeline.prediction_pipeline import INPUT_COLUMNS, MentalHealthPredictor
+from src.pipeline.prediction_transformer import PredictionTransformer
+from src.utils.main_utils import load_object
+
+# model and transformer of a pool worker, set by _init_worker
+_worker_model: Optional[MyModel] = None
+_worker_transformer: Optional[PredictionTransformer] = None
+
+
+def _load_model(model_path: Optional[str]) -> MyModel:
+    """
+    The model.pkl at model_path, or the production model of the configured bucket
+    """
+    if model_path:
+        return load_object(file_path=model_path)
+    predictor = MentalHealthPredictor(DepressionPredictorConfig(model_refresh_interval=0))
+    predictor.load_model()
+    return predictor.model_holder.get_model()
+
+
+def _init_worker(model_path: Optional[str]) -> None:
+    """
+    Process pool initializer: every worker loads the model once
+    """
+    global _worker_model, _worker_transformer
+    _worker_model = _load_model(model_path)
+    _worker_transformer = PredictionTransformer()
+
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    ids = chunk['id'] if 'id' in chunk.columns else None
+    features = chunk.reindex(columns=list(INPUT_COLUMNS.values()))
+    processed = _worker_transformer.transform(features, _worker_model.get_feature_engineer())
+    labels, probabilities = _worker_model.predict_with_proba(dataframe=processed)
+
+    result = pd.DataFrame({'prediction': labels.astype(int), 'probability': probabilities[:, 1]})
+    if ids is not None:
+        result.insert(0, 'id', ids.to_numpy())
+    return result
+
+
+def _file_format(path: str) -> str:
+    return 'parquet' if os.path.splitext(path)[1].lower() in ('.parquet', '.pq') else 'csv'
+
+
+def _import_parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Reading or writing Parquet requires pyarrow (pip install pyarrow)") from e
+    return pyarrow, pyarrow.parquet
+
+
+def read_chunks(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Yields the input file chunk_rows rows at a time
+    """
+    if _file_format(path) == 'parquet':
+        _, parquet = _import_parquet()
+        for batch in parquet.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+class ChunkWriter:
+    """
+    Appends result chunks to a CSV or Parquet file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = _file_format(path)
+        self._parquet_writer = None
+        self._header_written = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self.format == 'csv':
+            chunk.to_csv(self.path, mode='a' if self._header_written else 'w',
+                         header=not self._header_written, index=False)
+            self._header_written = True
+            return
+        pyarrow, parquet = _import_parquet()
+        table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = parquet.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table)
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        elif self.format == 'csv' and not self._header_written:
+            # empty input, still leave a valid (header only) file
+            pd.DataFrame(columns=['prediction', 'probability']).to_csv(self.path, index=False)
+
+
+def score_chunks(chunks: Iterator[pd.DataFrame], workers: int, model_path: Optional[str] = None,
+                 max_pending: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Scores the chunks on a pool of workers and yields the results in input order.
+    At most max_pending chunks (2 per worker by default) are read ahead, so
+    memory does not grow with the input size.
+
+    :param chunks: Raw input chunks
+    :param workers: Number of worker processes
+    :param model_path: Local model.pkl, the production model is loaded if None
+    :param max_pending: Chunks submitted and not yet yielded
+    """
+    max_pending = max_pending or 2 * workers
+    pending: "deque[Future]" = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(_score_chunk, chunk))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def batch_predict(input_path: str, output_path: str, workers: int = 1, chunk_rows: int = BATCH_PREDICT_CHUNK_ROWS,
+                  model_path: Optional[str] = None) -> Tuple[int, float]:
+    """
+    Scores input_path into output_path
+
+    :return: number of rows scored and elapsed seconds
+    """
+    try:
+        logging.info(f"Batch scoring {input_path} -> {output_path} with {workers} workers, "
+                     f"{chunk_rows} rows per chunk")
+        started = time.perf_counter()
+        writer = ChunkWriter(output_path)
+        n_rows = 0
+        try:
+            for result in score_chunks(read_chunks(input_path, chunk_rows), workers, model_path):
+                writer.write(result)
+                n_rows += len(result)
+        finally:
+            writer.close()
+        elapsed = time.perf_counter() - started
+        logging.info(f"Scored {n_rows} rows in {elapsed:.2f}s ({n_rows / elapsed if elapsed else 0:.0f} rows/s)")
+        return n_rows, elapsed
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV or Parquet file with the dataset columns')
+    parser.add_argument('output', help='CSV or Parquet file written with [id,] prediction, probability')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--chunk-rows', type=int, default=BATCH_PREDICT_CHUNK_ROWS, help='rows per chunk')
+    parser.add_argument('--model', default=None,
+                        help='local model.pkl (default: the production model of the model bucket)')
+    args = parser.parse_args(argv)
+
+    n_rows, elapsed = batch_predict(args.input, args.output, workers=args.workers,
+                                    chunk_rows=args.chunk_rows, model_path=args.model)
+    print(f"{n_rows} rows scored in {elapsed:.2f}s ({n_rows / elapsed if elapsed else 0:.0f} rows/s) "
+          f"-> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
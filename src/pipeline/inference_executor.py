@@ -0,0 +1,193 @@
+import asyncio
+import multiprocessing
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.entity.config_entity import DepressionPredictorConfig
+from src.exception import MyException
+from src.logger import logging
+from src.metrics import REGISTRY
+from src.pipeline.admission import REQUESTS_EXPIRED, DeadlineExceededError, check_deadline
+from src.pipeline.prediction_pipeline import MentalHealthPredictor
+
+INFERENCE_IN_FLIGHT = REGISTRY.gauge('inference_in_flight', 'Scoring calls submitted to the inference backend')
+INFERENCE_REJECTED = REGISTRY.counter('inference_rejected_total',
+                                      'Scoring calls rejected because the inference backend was saturated')
+
+# predictor of a process pool worker, created by _init_process_worker
+_worker_predictor: Optional[MentalHealthPredictor] = None
+
+
+def _init_process_worker(config: DepressionPredictorConfig) -> None:
+    """
+    Process pool initializer: every worker loads the model once and keeps it resident
+    """
+    global _worker_predictor
+    _worker_predictor = MentalHealthPredictor(config)
+    _worker_predictor.load_model()
+    _worker_predictor.warm_up()
+    _worker_predictor.start_model_refresh()
+
+
+def _score(predictor: MentalHealthPredictor, method: str, payload, deadline: Optional[float],
+           enqueued_at: Optional[float]) -> Tuple[np.ndarray, np.ndarray, str, Optional[str]]:
+    # runs on the worker: a call that waited for a free worker past its deadline is not scored
+    # (time.monotonic() is the same clock in every process), the others pick their model tier now
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceededError("Deadline passed while waiting for an inference worker")
+    tier = predictor.select_tier(deadline, enqueued_at)
+    labels, probabilities, version = getattr(predictor, method)(payload, tier=tier)
+    return labels, probabilities, tier, version
+
+
+def _score_in_worker(method: str, payload, deadline: Optional[float],
+                     enqueued_at: Optional[float]) -> Tuple[np.ndarray, np.ndarray, str, Optional[str]]:
+    return _score(_worker_predictor, method, payload, deadline, enqueued_at)
+
+
+class InferenceSaturatedError(Exception):
+    """
+    Raised when the inference backend already has max_pending calls; mapped to a 503
+    """
+
+
+class InferenceExecutor:
+    """
+    Runs CPU bound scoring outside the event loop.
+
+    backends:
+    - thread:  thread pool sharing the process' resident model
+    - process: process pool, the model is preloaded in every worker by the initializer
+    - inline:  score on the event loop thread (previous behaviour, for comparison)
+
+    At most max_pending calls are in flight; further calls fail fast with
+    InferenceSaturatedError instead of queueing behind them. A call given a
+    deadline raises DeadlineExceededError instead of scoring if the deadline
+    passed before a worker picked it up. The predictor picks the model tier
+    (primary or fallback) of every call when a worker starts it.
+    """
+
+    def __init__(self, predictor: MentalHealthPredictor, backend: str = 'thread',
+                 max_workers: int = 2, max_pending: int = 8):
+        """
+        :param predictor: Predictor used by the thread and inline backends (and whose config the workers use)
+        :param backend: 'thread', 'process' or 'inline'
+        :param max_workers: Number of threads / processes
+        :param max_pending: Maximum number of scoring calls running or waiting for a worker
+        """
+        if backend not in ('thread', 'process', 'inline'):
+            raise ValueError(f"Unknown inference backend '{backend}'")
+        self.predictor = predictor
+        self.backend = backend
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def is_saturated(self) -> bool:
+        return self._in_flight >= self.max_pending
+
+    def start(self) -> None:
+        """
+        Create the worker pool; the model is made resident by preload()
+        """
+        try:
+            if self.backend == 'process':
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_process_worker,
+                    initargs=(self.predictor.prediction_pipeline_config,)
+                )
+            elif self.backend == 'thread':
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='inference')
+            logging.info(f"Inference backend '{self.backend}' started with {self.max_workers} workers, "
+                         f"max {self.max_pending} pending calls")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def preload(self) -> None:
+        """
+        Make the model resident where it will be used and run a warm-up prediction
+        (blocking, called off the event loop at startup)
+        """
+        try:
+            if self.backend == 'process':
+                # start every worker now, the initializer loads the model and warms it up
+                for future in [self._pool.submit(pow, 1, 1) for _ in range(self.max_workers)]:
+                    future.result()
+            else:
+                self.predictor.load_model()
+                self.predictor.warm_up()
+            logging.info(f"Model resident and warmed up on the '{self.backend}' backend")
+        except Exception as e:
+            if self.backend == 'process':
+                # a failed initializer breaks the pool, a retry needs a new one
+                self.shutdown()
+                self.start()
+            raise MyException(e, sys) from e
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _submit(self, method: str, payload, deadline: Optional[float] = None,
+                      enqueued_at: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, str, Optional[str]]:
+        check_deadline(deadline, 'inference_submit')
+        if self.is_saturated:
+            INFERENCE_REJECTED.inc()
+            raise InferenceSaturatedError(f"{self._in_flight} scoring calls already in flight")
+
+        # only touched from the event loop thread, no lock needed
+        self._in_flight += 1
+        INFERENCE_IN_FLIGHT.set(self._in_flight)
+        try:
+            if self.backend == 'inline' or self._pool is None:
+                return _score(self.predictor, method, payload, deadline, enqueued_at)
+            loop = asyncio.get_running_loop()
+            if self.backend == 'process':
+                return await loop.run_in_executor(self._pool, _score_in_worker, method, payload, deadline,
+                                                  enqueued_at)
+            return await loop.run_in_executor(self._pool, _score, self.predictor, method, payload, deadline,
+                                              enqueued_at)
+        except DeadlineExceededError:
+            REQUESTS_EXPIRED.labels(stage='inference_queue').inc()
+            raise
+        finally:
+            self._in_flight -= 1
+            INFERENCE_IN_FLIGHT.set(self._in_flight)
+
+    async def predict_batch(self, dataframe: pd.DataFrame, deadline: Optional[float] = None,
+                            enqueued_at: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, str, Optional[str]]:
+        """
+        Score a DataFrame of raw rows on the configured backend, unless the
+        time.monotonic() deadline passes first
+
+        :param enqueued_at: time.monotonic() arrival of the request, for the choice of model tier
+        :return: predicted labels, probability of the positive class, the model tier that scored them
+            and the version (ETag) of its model
+        """
+        return await self._submit('predict_batch', dataframe, deadline, enqueued_at)
+
+    async def predict_records(self, records: List[dict], deadline: Optional[float] = None,
+                              enqueued_at: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, str, Optional[str]]:
+        """
+        Score raw records (keyed by dataset column names) on the configured backend
+        through the pandas-free path, unless the time.monotonic() deadline passes first
+
+        :param enqueued_at: time.monotonic() arrival of the request, for the choice of model tier
+        :return: predicted labels, probability of the positive class, the model tier that scored them
+            and the version (ETag) of its model
+        """
+        return await self._submit('predict_records', records, deadline, enqueued_at)
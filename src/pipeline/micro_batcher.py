@@ -0,0 +1,191 @@
+import asyncio
+import sys
+import time
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.exception import MyException
+from src.logger import logging
+from src.metrics import REGISTRY
+from src.pipeline.admission import REQUESTS_EXPIRED, DeadlineExceededError
+
+BATCH_QUEUE_DEPTH = REGISTRY.gauge('predict_batch_queue_depth', 'Rows waiting to be scored by the micro-batcher')
+BATCH_SIZE = REGISTRY.histogram('predict_batch_size', 'Number of rows scored together by the micro-batcher',
+                                buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+BATCH_WAIT_SECONDS = REGISTRY.histogram('predict_batch_wait_seconds',
+                                        'Time a row waited in the micro-batcher queue before being scored',
+                                        buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25))
+BATCH_SCORE_SECONDS = REGISTRY.histogram('predict_batch_score_seconds', 'Time spent scoring one micro-batch')
+
+# Async scoring function: (raw records, deadline, arrival) -> (labels, positive class probabilities, model tier)
+ScoreFunction = Callable[[List[dict], Optional[float], Optional[float]],
+                         Awaitable[Tuple[np.ndarray, np.ndarray, str]]]
+
+
+class _PendingRow:
+    __slots__ = ('record', 'future', 'enqueued_at', 'deadline', 'arrived_at')
+
+    def __init__(self, record: dict, future: asyncio.Future, deadline: Optional[float],
+                 arrived_at: Optional[float]):
+        self.record = record
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+        self.deadline = deadline
+        self.arrived_at = arrived_at
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent single-row predictions into one vectorized call.
+    Requests enqueue their row and await a future; a worker task drains the
+    queue until max_batch_size rows are collected or max_wait_ms elapsed since
+    the first row, scores them together and resolves every future.
+    """
+
+    def __init__(self, score_batch: ScoreFunction, max_batch_size: int = 32, max_wait_ms: float = 2.0,
+                 max_concurrent_batches: int = 1):
+        """
+        :param score_batch: Coroutine scoring a list of raw records, e.g. InferenceExecutor.predict_records
+        :param max_batch_size: Maximum number of rows scored together
+        :param max_wait_ms: Maximum time the first row of a batch waits for more rows
+        :param max_concurrent_batches: Batches scored at the same time (one per inference worker)
+        """
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrent_batches = max_concurrent_batches
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._scoring: Set[asyncio.Task] = set()
+
+    @property
+    def is_running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._worker = asyncio.create_task(self._run(), name='prediction-batcher')
+        logging.info(f"Prediction batcher started (max_batch_size={self.max_batch_size}, "
+                     f"max_wait={self.max_wait * 1000:.1f}ms)")
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        for task in list(self._scoring):
+            task.cancel()
+
+        # fail whatever is still queued instead of leaving requests hanging
+        while not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError('Prediction batcher stopped'))
+        BATCH_QUEUE_DEPTH.set(0)
+
+    async def submit(self, record: dict, deadline: Optional[float] = None,
+                     arrived_at: Optional[float] = None) -> Tuple[int, float, str, Optional[str]]:
+        """
+        Queue one raw row (keyed by dataset column names) and wait for its score;
+        a row still queued at its time.monotonic() deadline fails with DeadlineExceededError
+
+        :param arrived_at: time.monotonic() arrival of the request, for the choice of model tier
+        :return: predicted label, probability of the positive class, the model tier that scored it
+            and the version (ETag) of its model
+        """
+        if not self.is_running:
+            raise MyException(RuntimeError('Prediction batcher is not running'), sys)
+        pending = _PendingRow(record, asyncio.get_running_loop().create_future(), deadline, arrived_at)
+        self._queue.put_nowait(pending)
+        BATCH_QUEUE_DEPTH.set(self._queue.qsize())
+        return await pending.future
+
+    async def _collect(self) -> List[_PendingRow]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        BATCH_QUEUE_DEPTH.set(self._queue.qsize())
+        return batch
+
+    async def _score(self, batch: List[_PendingRow]) -> None:
+        # rows whose caller already went away are not scored
+        batch = [pending for pending in batch if not pending.future.done()]
+        # nor the ones past their deadline
+        now = time.monotonic()
+        for pending in batch:
+            if pending.deadline is not None and now >= pending.deadline:
+                REQUESTS_EXPIRED.labels(stage='batcher').inc()
+                pending.future.set_exception(DeadlineExceededError("Deadline passed in the prediction batcher"))
+        batch = [pending for pending in batch if not pending.future.done()]
+        if not batch:
+            return
+        # the batch is worth scoring while any of its rows can still use the result
+        deadlines = [pending.deadline for pending in batch]
+        deadline = None if None in deadlines else max(deadlines)
+        # and its model tier is chosen by the row that has waited longest
+        arrivals = [pending.arrived_at for pending in batch if pending.arrived_at is not None]
+        enqueued_at = min(arrivals) if arrivals else None
+
+        started = time.perf_counter()
+        for pending in batch:
+            BATCH_WAIT_SECONDS.observe(started - pending.enqueued_at)
+        BATCH_SIZE.observe(len(batch))
+
+        try:
+            labels, probabilities, tier, version = await self.score_batch([pending.record for pending in batch],
+                                                                          deadline, enqueued_at)
+        except asyncio.CancelledError:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(RuntimeError('Prediction batcher stopped'))
+            raise
+        except Exception as e:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        finally:
+            BATCH_SCORE_SECONDS.observe(time.perf_counter() - started)
+
+        for pending, label, probability in zip(batch, labels, probabilities):
+            if not pending.future.done():
+                pending.future.set_result((int(label), float(probability), tier, version))
+
+    async def _score_and_release(self, batch: List[_PendingRow]) -> None:
+        try:
+            await self._score(batch)
+        except Exception as e:
+            logging.error(f"Prediction batcher failed to score a batch: {e}")
+        finally:
+            self._slots.release()
+
+    async def _run(self) -> None:
+        while True:
+            # while every slot is busy rows keep queueing up, so the next batch is bigger
+            await self._slots.acquire()
+            batch = await self._collect()
+            task = asyncio.create_task(self._score_and_release(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scoring.discard)
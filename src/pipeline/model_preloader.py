@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from src.logger import logging
+from src.metrics import REGISTRY
+
+SERVICE_READY = REGISTRY.gauge('service_ready', '1 once the model is resident and warmed up, else 0')
+STARTUP_PRELOAD_SECONDS = REGISTRY.gauge('startup_preload_seconds',
+                                         'Time from application startup to the model being ready')
+PRELOAD_FAILURES = REGISTRY.counter('model_preload_failures_total', 'Failed attempts to preload the model')
+
+
+class ModelPreloader:
+    """
+    Runs the blocking model preload + warm-up in the background at application
+    startup, so the server answers liveness probes while the model loads, and
+    tracks readiness for the /readyz probe. A failed preload is retried with
+    exponential backoff (requests can still load the model lazily meanwhile).
+    """
+
+    def __init__(self, preload: Callable[[], None], budget_seconds: float = 30.0,
+                 retry_max_seconds: float = 30.0):
+        """
+        :param preload: Blocking function making the model resident and warm, run in a worker thread
+        :param budget_seconds: Startup time above which a warning is logged
+        :param retry_max_seconds: Longest wait between two preload attempts
+        """
+        self.preload = preload
+        self.budget_seconds = budget_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.ready = False
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self._started_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        SERVICE_READY.set(0)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        delay = 0.5
+        while True:
+            self.attempts += 1
+            try:
+                await run_in_threadpool(self.preload)
+                break
+            except Exception as e:
+                PRELOAD_FAILURES.inc()
+                self.last_error = str(e)
+                logging.error(f"Model preload attempt {self.attempts} failed, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max_seconds)
+
+        self.seconds = time.perf_counter() - self._started_at
+        self.last_error = None
+        self.ready = True
+        SERVICE_READY.set(1)
+        STARTUP_PRELOAD_SECONDS.set(self.seconds)
+        if self.seconds > self.budget_seconds:
+            logging.warning(f"Service ready in {self.seconds:.2f}s, over the startup budget "
+                            f"of {self.budget_seconds:.0f}s")
+        else:
+            logging.info(f"Service ready in {self.seconds:.2f}s")
+
+    def status(self) -> dict:
+        return {
+            'status': 'ready' if self.ready else 'starting',
+            'preload_seconds': None if self.seconds is None else round(self.seconds, 3),
+            'attempts': self.attempts,
+            'last_error': self.last_error
+        }
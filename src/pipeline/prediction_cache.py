@@ -0,0 +1,146 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from src.logger import logging
+from src.metrics import REGISTRY
+
+PREDICTION_CACHE_HITS = REGISTRY.counter('prediction_cache_hits_total', 'Predictions served from the prediction cache')
+PREDICTION_CACHE_MISSES = REGISTRY.counter('prediction_cache_misses_total',
+                                           'Predictions that had to be scored by the model')
+PREDICTION_CACHE_EVICTIONS = REGISTRY.counter('prediction_cache_evictions_total',
+                                              'Cached predictions dropped by the entry / size limits or their TTL')
+PREDICTION_CACHE_HIT_RATIO = REGISTRY.gauge('prediction_cache_hit_ratio', 'Hits / lookups of the prediction cache')
+PREDICTION_CACHE_ENTRIES = REGISTRY.gauge('prediction_cache_entries', 'Predictions held by the prediction cache')
+PREDICTION_CACHE_BYTES = REGISTRY.gauge('prediction_cache_bytes', 'Approximate memory used by the prediction cache')
+
+
+def _missing_to_none(value):
+    # NaN != NaN, missing values must compare equal to be used in a key
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _approx_size(obj) -> int:
+    size = sys.getsizeof(obj)
+    if isinstance(obj, tuple):
+        size += sum(_approx_size(item) for item in obj)
+    return size
+
+
+class PredictionCache:
+    """
+    Bounded LRU + TTL cache of single-row predictions.
+
+    Keys are the transformed record (what the model actually sees, so the
+    free text Name is not part of it) and values are (label, probability).
+    The cache is scoped to one model version: the first lookup with a new
+    version drops every entry, so a hot reload can never serve a prediction
+    of the previous model.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        """
+        :param max_entries: Maximum number of cached predictions
+        :param max_bytes: Approximate memory above which least recently used entries are evicted
+        :param ttl_seconds: Lifetime of an entry, 0 keeps entries until they are evicted
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, float], float, int]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._bytes = 0
+        self._hits = 0
+        self._lookups = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(record: dict) -> Tuple:
+        """
+        Normalized, hashable key of a transformed record (values in column name order,
+        every record comes out of the same transform so the columns are the same)
+        """
+        return tuple(_missing_to_none(record[column]) for column in sorted(record))
+
+    def _clear_locked(self) -> None:
+        PREDICTION_CACHE_EVICTIONS.inc(len(self._entries))
+        self._entries.clear()
+        self._bytes = 0
+
+    def _scope_locked(self, version: Optional[str]) -> None:
+        if version != self._version:
+            if self._entries:
+                logging.info(f"Model version changed ({self._version} -> {version}), "
+                             f"dropping {len(self._entries)} cached predictions")
+            self._clear_locked()
+            self._version = version
+
+    def _update_gauges_locked(self) -> None:
+        PREDICTION_CACHE_ENTRIES.set(len(self._entries))
+        PREDICTION_CACHE_BYTES.set(self._bytes)
+        PREDICTION_CACHE_HIT_RATIO.set(self._hits / self._lookups if self._lookups else 0.0)
+
+    def get(self, version: Optional[str], key: Tuple) -> Optional[Tuple[int, float]]:
+        """
+        :return: cached (label, probability) for the key under this model version, or None
+        """
+        with self._lock:
+            self._scope_locked(version)
+            self._lookups += 1
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl > 0 and entry[1] < time.monotonic():
+                del self._entries[key]
+                self._bytes -= entry[2]
+                PREDICTION_CACHE_EVICTIONS.inc()
+                entry = None
+
+            if entry is None:
+                PREDICTION_CACHE_MISSES.inc()
+                self._update_gauges_locked()
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            PREDICTION_CACHE_HITS.inc()
+            self._update_gauges_locked()
+            return entry[0]
+
+    def put(self, version: Optional[str], key: Tuple, value: Tuple[int, float]) -> None:
+        with self._lock:
+            self._scope_locked(version)
+            size = _approx_size(key) + _approx_size(value)
+            if size > self.max_bytes:
+                return
+
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            expires_at = time.monotonic() + self.ttl if self.ttl > 0 else float('inf')
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                PREDICTION_CACHE_EVICTIONS.inc()
+            self._update_gauges_locked()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear_locked()
+            self._update_gauges_locked()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'version': self._version,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self._hits,
+                'lookups': self._lookups,
+                'hit_ratio': self._hits / self._lookups if self._lookups else 0.0
+            }
@@ -1,10 +1,74 @@
 import sys
+import time
 from src.entity.config_entity import DepressionPredictorConfig
 from src.pipeline.prediction_transformer import PredictionTransformer
-from src.entity.s3_estimator import ProjEstimator
+from src.cloud_storage.model_disk_cache import ModelDiskCache
+from src.entity.estimator import MyModel
+from src.entity.model_holder import ModelHolder
+from src.entity.model_refresher import ModelRefresher
+from src.pipeline.prediction_cache import PredictionCache
 from src.exception import MyException
 from src.logger import logging
+from src.metrics import REGISTRY
+from src.metrics.stages import CUSTOM_TRANSFORM, DATAFRAME_BUILD, time_stage
+import numpy as np
 import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+# hot path logger, sampled (see LOG_SAMPLE_RATES)
+logger = logging.getLogger(__name__)
+
+# model tiers: the production model, and the LogisticRegression trained next to it, served under latency pressure
+PRIMARY_TIER = 'primary'
+FALLBACK_TIER = 'fallback'
+
+TIER_CALLS = REGISTRY.counter('prediction_tier_calls_total', 'Scoring calls answered by each model tier',
+                              labelnames=('tier',))
+_TIER_CALLS = {tier: TIER_CALLS.labels(tier) for tier in (PRIMARY_TIER, FALLBACK_TIER)}
+
+# MentalHealthData field -> column name of the original dataset
+INPUT_COLUMNS: Dict[str, str] = {
+    "Name": "Name",
+    "Gender": "Gender",
+    "Age": "Age",
+    "City": "City",
+    "Working_Professional_or_Student": "Working Professional or Student",
+    "Profession": "Profession",
+    "Academic_Pressure": "Academic Pressure",
+    "Work_Pressure": "Work Pressure",
+    "CGPA": "CGPA",
+    "Study_Satisfaction": "Study Satisfaction",
+    "Job_Satisfaction": "Job Satisfaction",
+    "Sleep_Duration": "Sleep Duration",
+    "Dietary_Habits": "Dietary Habits",
+    "Degree": "Degree",
+    "Suicidal_Thoughts": "Have you ever had suicidal thoughts ?",
+    "Work_Study_Hours": "Work/Study Hours",
+    "Financial_Stress": "Financial Stress",
+    "Family_History": "Family History of Mental Illness",
+}
+
+# Representative input scored once at startup, keyed by dataset column names
+WARMUP_RECORD: Dict[str, object] = {
+    "Name": "Warm Up",
+    "Gender": "Male",
+    "Age": 23,
+    "City": "Delhi",
+    "Working Professional or Student": "Student",
+    "Profession": None,
+    "Academic Pressure": 4.5,
+    "Work Pressure": None,
+    "CGPA": 8.2,
+    "Study Satisfaction": 3.5,
+    "Job Satisfaction": None,
+    "Sleep Duration": "6-7 hours",
+    "Dietary Habits": "More Healthy",
+    "Degree": "B.Tech",
+    "Have you ever had suicidal thoughts ?": "No",
+    "Work/Study Hours": 6.0,
+    "Financial Stress": 2.5,
+    "Family History of Mental Illness": "No",
+}
 
 class MentalHealthData:
     """
@@ -59,35 +123,46 @@ class MentalHealthData:
         """Convert input to DataFrame"""
 
         try:
-            data = {
-                "Name": [self.Name],
-                "Gender": [self.Gender],
-                "Age": [self.Age],
-                "City": [self.City],
-                "Working Professional or Student": [self.Working_Professional_or_Student],
-                "Profession": [self.Profession],
-                "Academic Pressure": [self.Academic_Pressure],
-                "Work Pressure": [self.Work_Pressure],
-                "CGPA": [self.CGPA],
-                "Study Satisfaction": [self.Study_Satisfaction],
-                "Job Satisfaction": [self.Job_Satisfaction],
-                "Sleep Duration": [self.Sleep_Duration],
-                "Dietary Habits": [self.Dietary_Habits],
-                "Degree": [self.Degree],
-                "Have you ever had suicidal thoughts ?": [self.Suicidal_Thoughts],
-                "Work/Study Hours": [self.Work_Study_Hours],
-                "Financial Stress": [self.Financial_Stress],
-                "Family History of Mental Illness": [self.Family_History]
-            }
-
-            df = pd.DataFrame(data)
-
-            logging.info("Created user input DataFrame")
+            with time_stage(DATAFRAME_BUILD):
+                data = {column: [getattr(self, field)] for field, column in INPUT_COLUMNS.items()}
+
+                df = pd.DataFrame(data)
+
+            logger.info("Created user input DataFrame")
 
             return df
 
         except Exception as e:
-            raise MyException(e, sys)        
+            raise MyException(e, sys)
+
+    def get_input_record(self) -> dict:
+        """Return the input as one row keyed by dataset column names"""
+        return {column: getattr(self, field) for field, column in INPUT_COLUMNS.items()}
+
+    @staticmethod
+    def records_to_dataframe(records: List[dict]) -> pd.DataFrame:
+        """Convert a list of records keyed by MentalHealthData fields to one DataFrame"""
+        try:
+            with time_stage(DATAFRAME_BUILD):
+                columns = {column: [record.get(field) for record in records]
+                           for field, column in INPUT_COLUMNS.items()}
+                return pd.DataFrame(columns)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def columns_to_dataframe(columns: Dict[str, list]) -> pd.DataFrame:
+        """Convert columnar input keyed by MentalHealthData fields to one DataFrame"""
+        try:
+            lengths = {len(values) for values in columns.values()}
+            if len(lengths) > 1:
+                raise ValueError("All columns must have the same number of values")
+            n_rows = lengths.pop() if lengths else 0
+            with time_stage(DATAFRAME_BUILD):
+                data = {column: columns.get(field, [None] * n_rows) for field, column in INPUT_COLUMNS.items()}
+                return pd.DataFrame(data)
+        except Exception as e:
+            raise MyException(e, sys)
 
 class MentalHealthPredictor:
     def __init__(self, prediction_pipeline_config: DepressionPredictorConfig = DepressionPredictorConfig()) -> None:
@@ -97,8 +172,134 @@ class MentalHealthPredictor:
         try:
             self.prediction_pipeline_config = prediction_pipeline_config
             self.transformer = PredictionTransformer()
+            model_cache = None
+            if self.prediction_pipeline_config.model_cache_dir:
+                model_cache = ModelDiskCache(
+                    cache_dir=self.prediction_pipeline_config.model_cache_dir,
+                    max_bytes=self.prediction_pipeline_config.model_cache_max_bytes
+                )
+            self.model_holder = ModelHolder.get_instance(
+                bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                model_path=self.prediction_pipeline_config.model_file_path,
+                model_cache=model_cache
+            )
+            self.model_refresher = ModelRefresher(
+                model_holder=self.model_holder,
+                interval=self.prediction_pipeline_config.model_refresh_interval
+            )
+            self.fallback_holder: Optional[ModelHolder] = None
+            self.fallback_refresher: Optional[ModelRefresher] = None
+            if self.prediction_pipeline_config.fallback_model_file_path:
+                self.fallback_holder = ModelHolder.get_instance(
+                    bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                    model_path=self.prediction_pipeline_config.fallback_model_file_path,
+                    model_cache=model_cache
+                )
+                self.fallback_refresher = ModelRefresher(
+                    model_holder=self.fallback_holder,
+                    interval=self.prediction_pipeline_config.model_refresh_interval
+                )
+            self.prediction_cache = None
+            if self.prediction_pipeline_config.prediction_cache_max_entries > 0:
+                self.prediction_cache = PredictionCache(
+                    max_entries=self.prediction_pipeline_config.prediction_cache_max_entries,
+                    max_bytes=self.prediction_pipeline_config.prediction_cache_max_bytes,
+                    ttl_seconds=self.prediction_pipeline_config.prediction_cache_ttl
+                )
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def load_model(self) -> None:
+        """
+        Make the production model resident so no request has to load it from s3,
+        and the fallback model if the bucket has one
+        """
+        try:
+            self.model_holder.load()
+        except Exception as e:
+            raise MyException(e, sys)
+        if self.fallback_holder is not None:
+            try:
+                self.fallback_holder.load()
+            except Exception as e:
+                # models pushed before the fallback existed: serve the primary model only
+                logger.warning(f"No fallback model loaded, every call uses the primary model: {e}")
+
+    def warm_up(self) -> None:
+        """
+        Score WARMUP_RECORD through the single-record and the DataFrame paths, so
+        the first real request does not pay for lazy imports, the compiled
+        encoder / scorer and first-call allocations. Bypasses the prediction cache.
+        """
+        try:
+            models = [self.model_holder.get_model()]
+            if self.has_fallback:
+                models.append(self.fallback_holder.get_model())
+            for model in models:
+                feature_engineer = model.get_feature_engineer()
+                model.predict_records_with_proba([self.transformer.transform_record(WARMUP_RECORD, feature_engineer)])
+                model.predict_with_proba(dataframe=self.transformer.transform(pd.DataFrame([WARMUP_RECORD]),
+                                                                              feature_engineer))
+            logger.info("Warm-up prediction done")
         except Exception as e:
             raise MyException(e, sys)
+
+    def start_model_refresh(self) -> None:
+        """
+        Start polling s3 for a newly pushed model (no-op if the interval is 0).
+        The fallback model is only polled when one was loaded: models pushed
+        before it existed would have its missing key checked at every interval
+        """
+        self.model_refresher.start()
+        if self.fallback_refresher is None:
+            return
+        if self.has_fallback:
+            self.fallback_refresher.start()
+        else:
+            logger.warning("No fallback model loaded, not polling for one; restart to pick up a pushed fallback")
+
+    def stop_model_refresh(self) -> None:
+        self.model_refresher.stop()
+        if self.fallback_refresher is not None:
+            self.fallback_refresher.stop()
+
+    @property
+    def is_model_loaded(self) -> bool:
+        return self.model_holder.is_loaded
+
+    @property
+    def has_fallback(self) -> bool:
+        return self.fallback_holder is not None and self.fallback_holder.is_loaded
+
+    def select_tier(self, deadline: Optional[float] = None, enqueued_at: Optional[float] = None) -> str:
+        """
+        Tier to score a call with: the fallback model if it is resident and the
+        call's request arrived fallback_queue_wait_ms ago or has less than
+        fallback_deadline_budget_ms left (time.monotonic() values), else the
+        primary model
+
+        :param deadline: Deadline of the call, None if it has none
+        :param enqueued_at: When the request of the call arrived, None if unknown
+        """
+        if not self.has_fallback:
+            return PRIMARY_TIER
+        config = self.prediction_pipeline_config
+        now = time.monotonic()
+        if (enqueued_at is not None and config.fallback_queue_wait_ms > 0
+                and (now - enqueued_at) * 1000 >= config.fallback_queue_wait_ms):
+            return FALLBACK_TIER
+        if (deadline is not None and config.fallback_deadline_budget_ms > 0
+                and (deadline - now) * 1000 <= config.fallback_deadline_budget_ms):
+            return FALLBACK_TIER
+        return PRIMARY_TIER
+
+    def _tier_model(self, tier: str) -> Tuple[MyModel, Optional[str]]:
+        # model and version come from one read of the holder, so a refresh
+        # in between cannot pair the answer with another version
+        _TIER_CALLS[tier].inc()
+        if tier == FALLBACK_TIER:
+            return self.fallback_holder.get_live()
+        return self.model_holder.get_live()
     
     def predict(self, dataframe) -> str:
         """
@@ -107,17 +308,67 @@ class MentalHealthPredictor:
         :return: Prediction for the user input
         """
         try:
-            logging.info('Entered predict method of MentalHeathPredictor class')
+            logger.info('Entered predict method of MentalHeathPredictor class')
 
-            logging.info('Applying transformations to the input data')
-            df_processed = self.transformer.transform(dataframe)
-            logging.info('Transformations done !!')
+            model = self.model_holder.get_model()
 
-            model = ProjEstimator(
-                bucket_name=self.prediction_pipeline_config.model_bucket_name,
-                model_path=self.prediction_pipeline_config.model_file_path
-            )
-            result = model.predict(df_processed)
+            logger.info('Applying transformations to the input data')
+            df_processed = self.transformer.transform(dataframe, model.get_feature_engineer())
+            logger.info('Transformations done !!')
+
+            result = model.predict(dataframe=df_processed)
             return result
         except Exception as e:
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
+
+    def predict_batch(self, dataframe: pd.DataFrame,
+                      tier: str = PRIMARY_TIER) -> Tuple[np.ndarray, np.ndarray, Optional[str]]:
+        """
+        Scores a whole DataFrame with a single transform and model call,
+        with the model of the given tier
+
+        :return: predicted labels, probability of the positive class and the version (ETag) of the model
+        """
+        try:
+            logger.info(f'Scoring a batch of {len(dataframe)} rows')
+            model, version = self._tier_model(tier)
+            df_processed = self.transformer.transform(dataframe, model.get_feature_engineer())
+            labels, probabilities = model.predict_with_proba(dataframe=df_processed)
+            return labels, probabilities[:, 1], version
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def predict_records(self, records: List[dict],
+                        tier: str = PRIMARY_TIER) -> Tuple[np.ndarray, np.ndarray, Optional[str]]:
+        """
+        Scores raw records (keyed by dataset column names) without building a
+        DataFrame, the fast path for single requests and micro-batches.
+        The prediction cache only serves and stores the primary tier, so every
+        answer comes from the model of the tier it reports.
+
+        :return: predicted labels, probability of the positive class and the version (ETag) of the model
+            of the tier
+        """
+        try:
+            model, version = self._tier_model(tier)
+            with time_stage(CUSTOM_TRANSFORM):
+                processed = [self.transformer.transform_record(record, model.get_feature_engineer())
+                             for record in records]
+            if self.prediction_cache is None or tier == FALLBACK_TIER:
+                labels, probabilities = model.predict_records_with_proba(processed)
+                return labels, probabilities[:, 1], version
+
+            # cache entries are those of the primary model version
+            keys = [self.prediction_cache.make_key(record) for record in processed]
+            results = [self.prediction_cache.get(version, key) for key in keys]
+            misses = [i for i, result in enumerate(results) if result is None]
+            if misses:
+                labels, probabilities = model.predict_records_with_proba([processed[i] for i in misses])
+                for i, label, probability in zip(misses, labels, probabilities[:, 1]):
+                    results[i] = (label, probability)
+                    self.prediction_cache.put(version, keys[i], results[i])
+
+            return (np.array([label for label, _ in results]), np.array([probability for _, probability in results]),
+                    version)
+        except Exception as e:
+            raise MyException(e, sys)
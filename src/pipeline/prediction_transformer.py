@@ -1,23 +1,45 @@
 import pandas as pd
 import numpy as np
 import sys
+from typing import Optional
 
+from src.entity.feature_engineer import DIET_MAP, SLEEP_MAP, FeatureEngineer
 from src.exception import MyException
 from src.logger import logging
+from src.metrics.stages import CUSTOM_TRANSFORM, time_stage
+
+# hot path logger, sampled (see LOG_SAMPLE_RATES)
+logger = logging.getLogger(__name__)
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
 
 
 class PredictionTransformer:
+    """
+    Cleaning of the raw inputs before the model's preprocessing object. Models
+    trained with a FeatureEngineer carry it and it does the work, with the
+    statistics of their training data; the fixed rules below are only kept
+    for models pickled before it existed.
+    """
 
     def __init__(self):
         pass
 
-    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+    def transform(self, df: pd.DataFrame, feature_engineer: Optional[FeatureEngineer] = None) -> pd.DataFrame:
         """
         Apply SAME transformations as training
         """
 
+        with time_stage(CUSTOM_TRANSFORM):
+            if feature_engineer is not None:
+                return feature_engineer.transform(df)
+            return self._transform(df)
+
+    def _transform(self, df: pd.DataFrame) -> pd.DataFrame:
         try:
-            logging.info("Starting prediction preprocessing")
+            logger.info("Starting prediction preprocessing")
 
             df = df.copy()
 
@@ -63,47 +85,64 @@ class PredictionTransformer:
             df["City"] = df["City"].fillna("other")
 
             # Dietary
-            diet_map = {
-                "More Healthy": "Healthy",
-                "No Healthy": "Unhealthy",
-                "Less Healthy": "Unhealthy",
-                "Less than Healthy": "Unhealthy"
-            }
-
-            df["Dietary Habits"] = df["Dietary Habits"].replace(diet_map)
+            df["Dietary Habits"] = df["Dietary Habits"].replace(DIET_MAP)
             df["Dietary Habits"] = df["Dietary Habits"].fillna("Healthy")
 
             # Degree
             df["Degree"] = df["Degree"].fillna("B.Ed")
 
             # Sleep
-            sleep_map = {
-                'Less than 5 hours': 'Very Low Sleep',
-                '7-8 hours': 'High Sleep',
-                'More than 8 hours': 'Very High Sleep',
-                '5-6 hours': 'Medium Sleep',
-                '3-4 hours': 'Very Low Sleep',
-                '6-7 hours': 'Medium Sleep',
-                '8 hours': 'High Sleep',
-                '8-9 hours': 'Very High Sleep',
-                '9-11 hours': 'Very High Sleep',
-                '10-11 hours': 'Very High Sleep',
-                '9-5 hours': 'Medium Sleep'
-            }
-
-            df["Sleep Duration"] = df["Sleep Duration"].map(sleep_map)
+            df["Sleep Duration"] = df["Sleep Duration"].map(SLEEP_MAP)
             df["Sleep Duration"] = df["Sleep Duration"].fillna("Medium Sleep")
 
-            # Numeric nulls
-            num_cols = ["Financial Stress", "Satisfaction", "Pressure"]
-
-            for col in num_cols:
-                if col in df.columns:
-                    df[col] = df[col].fillna(df[col].mean())
+            # Numeric nulls are left to the fitted median imputer of the preprocessor:
+            # a mean over the incoming rows would make a row's features depend on the
+            # other rows of its batch (and is a no-op for a single row)
 
-            logging.info("Prediction preprocessing completed")
+            logger.info("Prediction preprocessing completed")
 
             return df
 
         except Exception as e:
             raise MyException(e, sys)
+
+    def transform_record(self, record: dict, feature_engineer: Optional[FeatureEngineer] = None) -> dict:
+        """
+        Same transformations as transform() for a single row given as a dict
+        keyed by dataset column names, without building a DataFrame
+        """
+        if feature_engineer is not None:
+            return feature_engineer.transform_record(record)
+        try:
+            row = {column: value for column, value in record.items() if column != "Name"}
+
+            job, study = row.pop("Job Satisfaction", None), row.pop("Study Satisfaction", None)
+            row["Satisfaction"] = study if _is_missing(job) else job
+
+            work, academic = row.pop("Work Pressure", None), row.pop("Academic Pressure", None)
+            row["Pressure"] = academic if _is_missing(work) else work
+
+            status = row.get("Working Professional or Student")
+            if status == "Working Professional" and _is_missing(row.get("CGPA")):
+                row["CGPA"] = 0
+
+            profession = row.get("Profession")
+            if _is_missing(profession):
+                profession = "Student" if status == "Student" else "Teacher"
+            row["Profession"] = profession
+
+            if _is_missing(row.get("City")):
+                row["City"] = "other"
+
+            diet = row.get("Dietary Habits")
+            row["Dietary Habits"] = "Healthy" if _is_missing(diet) else DIET_MAP.get(diet, diet)
+
+            if _is_missing(row.get("Degree")):
+                row["Degree"] = "B.Ed"
+
+            row["Sleep Duration"] = SLEEP_MAP.get(row.get("Sleep Duration"), "Medium Sleep")
+
+            return row
+
+        except Exception as e:
+            raise MyException(e, sys)
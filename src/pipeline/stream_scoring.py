@@ -0,0 +1,283 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+import sys
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from src.constants import SCHEMA_FILE_PATH
+from src.exception import MyException
+from src.logger import logging
+from src.metrics import REGISTRY
+from src.pipeline.inference_executor import InferenceSaturatedError
+from src.pipeline.prediction_pipeline import INPUT_COLUMNS
+from src.utils.main_utils import read_yaml_file
+
+STREAM_ROWS = REGISTRY.counter('stream_scored_rows_total', 'Rows scored by the streaming endpoint')
+STREAM_ACTIVE = REGISTRY.gauge('stream_active', 'Streaming scoring requests in progress')
+STREAM_ROWS_PER_SECOND = REGISTRY.gauge('stream_rows_per_second', 'Throughput of the last completed scoring stream')
+STREAM_FAILURES = REGISTRY.counter('stream_failures_total', 'Scoring streams aborted by invalid input or an error')
+
+# Async scoring function: DataFrame of raw rows -> (labels, positive class probabilities, model tier, model version)
+ScoreFunction = Callable[[pd.DataFrame], Awaitable[Tuple[np.ndarray, np.ndarray, str, Optional[str]]]]
+
+FORMATS = ('csv', 'ndjson')
+
+
+class StreamInputError(ValueError):
+    """
+    The uploaded body could not be parsed; reported in the stream since the status is already sent
+    """
+
+
+def _float_columns() -> List[str]:
+    # dataset columns declared as float in the schema, parsed as such whatever a chunk contains
+    schema = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+    declared = {name: dtype for column in schema['columns'] for name, dtype in column.items()}
+    return [column for column in INPUT_COLUMNS.values() if declared.get(column) == 'float']
+
+
+def _complete_prefix_end(text: str) -> int:
+    """
+    Length of the longest prefix of text made of whole CSV lines, skipping line
+    breaks inside quoted fields; 0 if no line is complete yet
+    """
+    end = text.rfind('\n')
+    while end != -1 and text.count('"', 0, end) % 2:
+        end = text.rfind('\n', 0, end)
+    return end + 1
+
+
+class FullDuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for a body generator that itself reads the request body.
+    StreamingResponse listens for the client disconnect by calling receive()
+    concurrently, which would swallow request body messages; here a disconnect
+    surfaces as ClientDisconnect from request.stream() instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class StreamScorer:
+    """
+    Scores an uploaded CSV or NDJSON body while it is being received.
+
+    The body is cut into blocks of chunk_rows complete lines; each block is
+    parsed (in a worker thread) into a DataFrame, scored through
+    score_batch (PredictionTransformer + MyModel on the inference backend)
+    and its predictions are streamed back before more than one further block
+    is read. Memory therefore depends on chunk_rows, not on the body size.
+    Because of that backpressure the client has to read the response while it
+    is still uploading (curl, aiohttp, ...), as with any full duplex stream.
+
+    Input rows use either the dataset column names (the CSV format of the
+    training data) or the MentalHealthData field names; an 'id' column is
+    echoed back. Output rows are (row, id, label, probability), followed by
+    a trailer with the rows/sec of the stream: {"summary": {...}} for NDJSON,
+    a '# summary: ...' comment line for CSV ('error' instead if the stream
+    was aborted, the status code being already sent, e.g. after waiting
+    saturated_wait seconds for a free inference slot).
+    """
+
+    def __init__(self, score_batch: ScoreFunction, chunk_rows: int = 5000, saturated_wait: float = 30.0):
+        """
+        :param score_batch: Coroutine scoring a DataFrame of raw rows, e.g. InferenceExecutor.predict_batch
+        :param chunk_rows: Rows parsed and scored together
+        :param saturated_wait: Seconds a chunk waits for a free inference slot before the stream fails
+        """
+        self.score_batch = score_batch
+        self.chunk_rows = chunk_rows
+        self.saturated_wait = saturated_wait
+        self.float_columns = _float_columns()
+        self._renames = {field: column for field, column in INPUT_COLUMNS.items() if field != column}
+
+    # ---------------- parsing ----------------
+
+    def _to_frame(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[pd.Series]]:
+        df = df.rename(columns=self._renames)
+        ids = df['id'] if 'id' in df.columns else None
+        # absent optional columns behave like missing values, extra columns are ignored
+        frame = df.reindex(columns=list(INPUT_COLUMNS.values()))
+        for column in self.float_columns:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce')
+        return frame, ids
+
+    def _parse_csv(self, header: str, block: str) -> Tuple[pd.DataFrame, Optional[pd.Series]]:
+        try:
+            df = pd.read_csv(io.StringIO(header + block), dtype=str, keep_default_na=True)
+        except Exception as e:
+            raise StreamInputError(f"Invalid CSV: {e}") from e
+        return self._to_frame(df)
+
+    def _parse_ndjson(self, block: str, first_line: int) -> Tuple[pd.DataFrame, Optional[pd.Series]]:
+        rows = []
+        for offset, line in enumerate(block.splitlines()):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise StreamInputError(f"Invalid JSON on line {first_line + offset + 1}: {e}") from e
+            if not isinstance(row, dict):
+                raise StreamInputError(f"Line {first_line + offset + 1} is not a JSON object")
+            rows.append(row)
+        return self._to_frame(pd.DataFrame(rows))
+
+    async def _blocks(self, body: AsyncIterator[bytes],
+                      fmt: str) -> AsyncIterator[Tuple[pd.DataFrame, Optional[pd.Series]]]:
+        """
+        Yields the parsed chunks of the body, reading it only as fast as chunks are consumed
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='strict')
+        buffer, header, lines_read = '', None, 0
+
+        def cut(text: str) -> int:
+            return _complete_prefix_end(text) if fmt == 'csv' else text.rfind('\n') + 1
+
+        async def parse(block: str):
+            if fmt == 'csv':
+                return await run_in_threadpool(self._parse_csv, header, block)
+            return await run_in_threadpool(self._parse_ndjson, block, lines_read)
+
+        try:
+            async for piece in body:
+                buffer += decoder.decode(piece)
+                if fmt == 'csv' and header is None:
+                    end = buffer.find('\n')
+                    if end == -1:
+                        continue
+                    header, buffer = buffer[:end + 1], buffer[end + 1:]
+                if buffer.count('\n') < self.chunk_rows:
+                    continue
+                end = cut(buffer)
+                # a quoted field still open across every buffered line break: keep reading
+                if end == 0:
+                    continue
+                block, buffer = buffer[:end], buffer[end:]
+                yield await parse(block)
+                lines_read += block.count('\n')
+            buffer += decoder.decode(b'', final=True)
+        except UnicodeDecodeError as e:
+            raise StreamInputError(f"Body is not valid UTF-8: {e}") from e
+
+        if fmt == 'csv' and header is None:
+            header, buffer = buffer, ''
+        if buffer.strip():
+            yield await parse(buffer)
+
+    # ---------------- scoring ----------------
+
+    async def _score(self, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        # a stream waits for a free inference slot instead of failing half way through,
+        # up to saturated_wait seconds so a saturated backend cannot hold it forever
+        give_up_at = time.monotonic() + self.saturated_wait
+        while True:
+            try:
+                # no deadline nor arrival time: a stream is always scored by the primary model
+                labels, probabilities, _, _ = await self.score_batch(frame)
+                return labels, probabilities
+            except InferenceSaturatedError:
+                if time.monotonic() >= give_up_at:
+                    raise
+                await asyncio.sleep(0.01)
+
+    @staticmethod
+    def _format(fmt: str, first_row: int, ids: Optional[pd.Series], labels: np.ndarray,
+                probabilities: np.ndarray) -> bytes:
+        rows = range(first_row, first_row + len(labels))
+        labels = labels.astype(int).tolist()
+        probabilities = probabilities.tolist()
+        if fmt == 'csv':
+            output = io.StringIO()
+            writer = csv.writer(output, lineterminator='\n')
+            id_values = ids.tolist() if ids is not None else [''] * len(labels)
+            writer.writerows(zip(rows, id_values, labels, probabilities))
+            return output.getvalue().encode()
+        if ids is None:
+            lines = [f'{{"row":{row},"label":{label},"probability":{probability!r}}}'
+                     for row, label, probability in zip(rows, labels, probabilities)]
+        else:
+            lines = [f'{{"row":{row},"id":{json.dumps(id_value)},"label":{label},"probability":{probability!r}}}'
+                     for row, id_value, label, probability in zip(rows, ids.tolist(), labels, probabilities)]
+        return ('\n'.join(lines) + '\n').encode()
+
+    @staticmethod
+    def _trailer(fmt: str, kind: str, payload: Dict[str, object]) -> bytes:
+        if fmt == 'csv':
+            # comment line after the data, so it can only be read as a trailer
+            return (f'# {kind}: ' + ' '.join(f'{key}={value}' for key, value in payload.items()) + '\n').encode()
+        return (json.dumps({kind: payload}) + '\n').encode()
+
+    async def score_stream(self, body: AsyncIterator[bytes], fmt: str) -> AsyncIterator[bytes]:
+        """
+        Score the body chunk by chunk, yielding the encoded predictions of each chunk.
+        While chunk n is scored, chunk n + 1 is read and parsed.
+
+        :param body: Request body, e.g. request.stream()
+        :param fmt: 'csv' or 'ndjson' (input and output format)
+        """
+        if fmt not in FORMATS:
+            raise MyException(ValueError(f"Unknown stream format '{fmt}'"), sys)
+
+        STREAM_ACTIVE.inc()
+        started = time.perf_counter()
+        scored_rows, next_row = 0, 0
+        pending = None
+        try:
+            if fmt == 'csv':
+                yield b'row,id,label,probability\n'
+            async for frame, ids in self._blocks(body, fmt):
+                previous = pending
+                pending = (asyncio.ensure_future(self._score(frame)), next_row, ids)
+                next_row += len(frame)
+                if previous is not None:
+                    task, first_row, previous_ids = previous
+                    labels, probabilities = await task
+                    scored_rows += len(labels)
+                    yield self._format(fmt, first_row, previous_ids, labels, probabilities)
+
+            if pending is not None:
+                (task, first_row, previous_ids), pending = pending, None
+                labels, probabilities = await task
+                scored_rows += len(labels)
+                yield self._format(fmt, first_row, previous_ids, labels, probabilities)
+
+            elapsed = time.perf_counter() - started
+            rows_per_second = scored_rows / elapsed if elapsed > 0 else 0.0
+            STREAM_ROWS_PER_SECOND.set(rows_per_second)
+            logging.info(f"Scored a {fmt} stream of {scored_rows} rows in {elapsed:.2f}s "
+                         f"({rows_per_second:.0f} rows/s)")
+            yield self._trailer(fmt, 'summary', {'rows': scored_rows, 'seconds': round(elapsed, 3),
+                                                 'rows_per_second': round(rows_per_second, 1)})
+        except ClientDisconnect:
+            logging.info(f"Client disconnected from a {fmt} stream after {scored_rows} rows")
+        except StreamInputError as e:
+            STREAM_FAILURES.inc()
+            logging.info(f"Rejected {fmt} stream after {scored_rows} rows: {e}")
+            yield self._trailer(fmt, 'error', {'message': str(e), 'rows_scored': scored_rows})
+        except InferenceSaturatedError:
+            STREAM_FAILURES.inc()
+            logging.warning(f"Gave up a {fmt} stream after {scored_rows} rows: no free inference slot "
+                            f"for {self.saturated_wait}s")
+            yield self._trailer(fmt, 'error', {'message': 'Inference backend saturated', 'rows_scored': scored_rows})
+        except Exception as e:
+            STREAM_FAILURES.inc()
+            logging.error(f"Scoring stream failed after {scored_rows} rows: {e}")
+            yield self._trailer(fmt, 'error', {'message': 'Scoring failed', 'rows_scored': scored_rows})
+        finally:
+            if pending is not None and not pending[0].done():
+                pending[0].cancel()
+            STREAM_ACTIVE.dec()
+            STREAM_ROWS.inc(scored_rows)
@@ -1,9 +1,11 @@
 import os
+import shutil
 import sys
+import zipfile
+from typing import Iterable, Iterator, Optional, Tuple
 import numpy as np
 import yaml
 import pandas as pd
-import dill
 
 from src.exception import MyException
 from src.logger import logging
@@ -32,6 +34,9 @@ def load_object(file_path: str) -> object:
     """
     REturns model/object from project directory.
     """
+    # dill is only needed for model artifacts, not when importing the serving app
+    import dill
+
     try:
         with open(file_path, 'rb') as file_obj:
             obj = dill.load(file_obj)
@@ -61,8 +66,118 @@ def load_numpy_array_data(file_path: str) -> np.array:
     except Exception as e:
         raise MyException(e, sys) from e
 
+def save_sparse_matrix(file_path: str, matrix) -> None:
+    """
+    Save a scipy sparse matrix to an .npz file
+    """
+    # scipy is only needed for training artifacts, not when importing the serving app
+    import scipy.sparse
+
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # a file object, save_npz would append .npz to a path without it
+        with open(file_path, 'wb') as file_obj:
+            scipy.sparse.save_npz(file_obj, matrix)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def load_sparse_matrix(file_path: str):
+    """
+    load a scipy sparse matrix (CSR as saved by save_sparse_matrix) from file
+    """
+    import scipy.sparse
+
+    try:
+        with open(file_path, 'rb') as file_obj:
+            return scipy.sparse.load_npz(file_obj).tocsr()
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def _npy_header(dtype, shape: tuple) -> dict:
+    return {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': shape}
+
+def save_numpy_array_chunks(file_path: str, chunks: Iterable[np.ndarray], shape: Tuple[int, int],
+                            dtype=np.float64) -> None:
+    """
+    Writes row chunks one after the other into an .npy file of the given
+    shape: only one chunk is in memory at a time, and the file can be read
+    back whole or with np.load(mmap_mode='r')
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        n_rows = 0
+        with open(file_path, 'wb') as file_obj:
+            np.lib.format.write_array_header_2_0(file_obj, _npy_header(dtype, shape))
+            for chunk in chunks:
+                np.ascontiguousarray(chunk, dtype=dtype).tofile(file_obj)
+                n_rows += chunk.shape[0]
+        if n_rows != shape[0]:
+            raise ValueError(f"Expected {shape[0]} rows, got {n_rows}")
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def save_sparse_matrix_chunks(file_path: str, chunks: Iterable, n_columns: int) -> int:
+    """
+    Stacks CSR row chunks into an .npz file readable by load_sparse_matrix.
+    The data / indices / indptr arrays are appended to spool files next to it
+    and copied from there into the archive, so only one chunk is in memory at
+    a time. Returns the number of rows written
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        dtypes = {'indices': np.int32, 'indptr': np.int64, 'data': np.float64}
+        spools = {name: f"{file_path}.{name}" for name in dtypes}
+        n_rows, nnz = 0, 0
+        try:
+            with open(spools['data'], 'wb') as data, open(spools['indices'], 'wb') as indices, \
+                    open(spools['indptr'], 'wb') as indptr:
+                np.zeros(1, dtype=np.int64).tofile(indptr)
+                for chunk in chunks:
+                    chunk.data.astype(np.float64, copy=False).tofile(data)
+                    chunk.indices.astype(np.int32, copy=False).tofile(indices)
+                    (chunk.indptr[1:].astype(np.int64) + nnz).tofile(indptr)
+                    n_rows += chunk.shape[0]
+                    nnz += chunk.nnz
+
+            # the members of scipy.sparse.save_npz, written as np.savez_compressed does
+            with zipfile.ZipFile(file_path, mode='w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+                for name, value in (('format', np.array(b'csr')), ('shape', np.array((n_rows, n_columns)))):
+                    with archive.open(f'{name}.npy', 'w', force_zip64=True) as member:
+                        np.lib.format.write_array(member, value)
+                for name, dtype in dtypes.items():
+                    length = os.path.getsize(spools[name]) // np.dtype(dtype).itemsize
+                    with archive.open(f'{name}.npy', 'w', force_zip64=True) as member, \
+                            open(spools[name], 'rb') as spool:
+                        np.lib.format.write_array_header_2_0(member, _npy_header(dtype, (length,)))
+                        shutil.copyfileobj(spool, member, 16 * 2 ** 20)
+        finally:
+            for spool in spools.values():
+                if os.path.exists(spool):
+                    os.remove(spool)
+        return n_rows
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def load_transformed_data(file_path: str,
+                          target_file_path: Optional[str] = None) -> Tuple[object, Optional[np.ndarray]]:
+    """
+    Returns the features and the target of a transformed data file: a sparse
+    .npz matrix with the target read from target_file_path (None without
+    one), or a dense .npy array whose last column is the target
+    """
+    try:
+        # told apart by content, not by name: an .npz is a zip archive
+        if zipfile.is_zipfile(file_path):
+            target = load_numpy_array_data(target_file_path) if target_file_path else None
+            return load_sparse_matrix(file_path), target
+        array = load_numpy_array_data(file_path)
+        return array[:, :-1], array[:, -1]
+    except Exception as e:
+        raise MyException(e, sys) from e
+
 def save_object(file_path: str, obj: object) -> None:
     logging.info("Entered the save object method of utils")
+    import dill
 
     try:
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
@@ -72,4 +187,59 @@ def save_object(file_path: str, obj: object) -> None:
         logging.info('Exited the save_object method of utils')
     except Exception as e:
         raise MyException(e,sys) from e
-        
\ No newline at end of file
+        
+# pandas dtype of each column type of config/schema.yaml; int columns are downcast after reading
+SCHEMA_DTYPES = {'category': 'category', 'float': 'float32'}
+
+def schema_dtypes(schema_config: dict) -> dict:
+    """
+    Column -> pandas dtype for the category and float columns of the schema
+    """
+    dtypes = {}
+    for column in schema_config['columns']:
+        for name, column_type in column.items():
+            if column_type in SCHEMA_DTYPES:
+                dtypes[name] = SCHEMA_DTYPES[column_type]
+    return dtypes
+
+def _downcast_int_columns(df: pd.DataFrame, schema_config: dict) -> pd.DataFrame:
+    for column in schema_config['columns']:
+        for name, column_type in column.items():
+            # columns with missing values were read as float and stay so
+            if column_type == 'int' and name in df.columns and pd.api.types.is_integer_dtype(df[name]):
+                df[name] = pd.to_numeric(df[name], downcast='integer')
+    return df
+
+def read_csv(file_path: str, schema_config: dict, **kwargs) -> pd.DataFrame:
+    """
+    Reads a csv of the dataset with the dtypes of the schema: categoricals for
+    the category columns, float32 for the float ones and the smallest integer
+    type for the int ones. Columns of the file missing from the schema keep
+    the dtype pandas infers.
+    """
+    try:
+        df = pd.read_csv(file_path, dtype=schema_dtypes(schema_config), **kwargs)
+        return _downcast_int_columns(df, schema_config)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def read_csv_chunks(file_path: str, schema_config: dict, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Same as read_csv, chunk_size rows at a time
+    """
+    try:
+        with pd.read_csv(file_path, dtype=schema_dtypes(schema_config), chunksize=chunk_size) as reader:
+            for chunk in reader:
+                yield _downcast_int_columns(chunk, schema_config)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def apply_schema_dtypes(df: pd.DataFrame, schema_config: dict) -> pd.DataFrame:
+    """
+    Same dtypes as read_csv for a DataFrame built in memory (e.g. from MongoDB)
+    """
+    try:
+        dtypes = {name: dtype for name, dtype in schema_dtypes(schema_config).items() if name in df.columns}
+        return _downcast_int_columns(df.astype(dtypes, copy=False), schema_config)
+    except Exception as e:
+        raise MyException(e, sys) from e